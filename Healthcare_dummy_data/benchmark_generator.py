@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Healthcare Survey Data Generator - Throughput Benchmark
+Runs the generator at increasing record counts and records how each stage scales.
+"""
+
+import io
+import os
+import json
+import shutil
+import argparse
+import datetime
+import tempfile
+import contextlib
+
+from dummy_data_generation import (
+    BATCH_SIZE, DEFAULT_SEED, GenerationMetrics, generate_healthcare_data, generate_sharded_data
+)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+RESULTS_FILENAME = 'generator_benchmark.json'
+REFERENCE_TIME = datetime.datetime(2026, 1, 1)
+
+def run_benchmark(num_records, engine='numpy', workers=1, chunk_size=BATCH_SIZE,
+                  compression=None, counter_based=False):
+    """Generate num_records in a scratch directory and return the run's GenerationMetrics"""
+    metrics = GenerationMetrics()
+    scratch = tempfile.mkdtemp(prefix='generator_benchmark_')
+    cwd = os.getcwd()
+    try:
+        os.chdir(scratch)
+        with contextlib.redirect_stdout(io.StringIO()):  # Silence per-chunk progress
+            if workers > 1:
+                generate_sharded_data(num_records, workers, seed=DEFAULT_SEED,
+                                      reference_time=REFERENCE_TIME, compression=compression,
+                                      counter_based=counter_based, metrics=metrics)
+            else:
+                generate_healthcare_data(num_records, engine=engine, chunk_size=chunk_size,
+                                         seed=DEFAULT_SEED, reference_time=REFERENCE_TIME,
+                                         compression=compression, counter_based=counter_based,
+                                         metrics=metrics)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch, ignore_errors=True)
+    return metrics
+
+def print_scaling_table(results):
+    """rows/sec per stage for every size, plus each stage's throughput relative to the smallest run"""
+    stages = GenerationMetrics.STAGES
+    print(f"\n{'records':>12}  " + '  '.join(f'{stage:>19}' for stage in stages) + f"  {'total':>12}")
+    for result in results:
+        row = [f"{result['stages'][stage]['rows_per_second']:>19,.0f}" for stage in stages]
+        print(f"{result['num_records']:>12,}  " + '  '.join(row) + f"  {result['rows_per_second']:>12,.0f}")
+    
+    if len(results) < 2:
+        return
+    # A ratio well below 1.0 means the stage gets slower per row as the file grows
+    first = results[0]
+    print(f"\nThroughput relative to {first['num_records']:,} records:")
+    for result in results[1:]:
+        ratios = []
+        for stage in stages:
+            base = first['stages'][stage]['rows_per_second']
+            ratio = result['stages'][stage]['rows_per_second'] / base if base else 0.0
+            ratios.append(f'{stage}={ratio:.2f}')
+        print(f"  • {result['num_records']:,}: " + ', '.join(ratios))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark generator throughput per stage')
+    parser.add_argument('--sizes', type=lambda value: [int(float(size)) for size in value.split(',')],
+                        default=DEFAULT_SIZES, help='Comma-separated record counts, e.g. 1e4,1e5,1e6,1e7')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='numpy',
+                        help='Record generator to benchmark')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel shards (uses the NumPy engine)')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE, help='Records per chunk')
+    parser.add_argument('--compression', choices=['gzip', 'bz2', 'zstd'], help='Compress the CSV outputs')
+    parser.add_argument('--counter-based', action='store_true', help='Use counter-based generation')
+    parser.add_argument('--output', default=RESULTS_FILENAME, help='JSON file for the results')
+    args = parser.parse_args()
+    
+    results = []
+    for num_records in args.sizes:
+        print(f"Benchmarking {num_records:,} records...")
+        metrics = run_benchmark(num_records, engine=args.engine, workers=args.workers,
+                                chunk_size=args.chunk_size, compression=args.compression,
+                                counter_based=args.counter_based)
+        metrics.print_report()
+        results.append(metrics.as_dict())
+        
+        # Save after every size so a long 1e7 run still leaves the smaller results
+        with open(args.output, 'w') as f:
+            json.dump({'engine': args.engine, 'workers': args.workers, 'chunk_size': args.chunk_size,
+                       'compression': args.compression, 'counter_based': args.counter_based,
+                       'results': results}, f, indent=2)
+    
+    print_scaling_table(results)
+    print(f"\n📁 Results saved to {args.output}")
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+CSV Corruption Injector - Messy Copies of Existing Files
+Streams any CSV (e.g. a real provider extract) through the generator's
+corruption engine and writes a messy copy plus a per-issue log for ETL testing.
+"""
+
+import csv
+import io
+import argparse
+import collections
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+from dummy_data_generation import (
+    BATCH_SIZE, DEFAULT_SEED, ISSUE_TYPES, DataQualityTracker,
+    apply_csv_formatting_issues_batch, apply_targeted_corruption_batch,
+    corruption_draws, csv_format_draws, record_stream
+)
+
+MESSY_SUFFIX = '_messy'
+ISSUE_LOG_SUFFIX = '_issues.jsonl'
+REPORT_SUFFIX = '_issues_report.json'
+DATA_TYPES = ['Integer', 'Float', 'DateTime', 'String']
+SCHEMA_SAMPLE_ROWS = 10000  # Rows column types are inferred from, whatever the chunk size
+
+def infer_schema(sample):
+    """Guess each column's data type (Integer, Float, DateTime or String) from a DataFrame of strings
+    
+    Empty cells are ignored. Integers with leading zeros (zip codes,
+    identifiers) are kept as String.
+    """
+    schema = {}
+    for column in sample.columns:
+        values = sample[column].str.strip()
+        values = values[values != '']
+        if len(values) == 0 or values.str.match(r'[+-]?0\d').any():
+            schema[column] = 'String'
+        elif values.str.fullmatch(r'[+-]?\d+').all():
+            schema[column] = 'Integer'
+        elif pd.to_numeric(values, errors='coerce').notna().all():
+            schema[column] = 'Float'
+        elif pd.to_datetime(values, errors='coerce', format='ISO8601').notna().all():
+            schema[column] = 'DateTime'
+        else:
+            schema[column] = 'String'
+    return schema
+
+def parse_schema_overrides(schema_string):
+    """Parse 'column:Type,column:Type' into a dict"""
+    overrides = {}
+    for item in schema_string.split(','):
+        column, data_type = item.rsplit(':', 1)
+        data_type = data_type.strip()
+        if data_type not in DATA_TYPES:
+            raise ValueError(f"Unknown data type '{data_type}' for column '{column}' (use {', '.join(DATA_TYPES)})")
+        overrides[column.strip()] = data_type
+    return overrides
+
+def typed_columns(columns, schema):
+    """Typed arrays for corrupt_cells from string columns
+    
+    Unparseable numbers become 0 (so negative_value leaves them alone) and
+    unparseable dates NaT (so date_format turns them into 'invalid_date').
+    """
+    typed = {}
+    for column, data_type in schema.items():
+        values = pd.Series(columns[column])
+        if data_type in ['Integer', 'Float']:
+            numbers = pd.to_numeric(values.str.strip(), errors='coerce').fillna(0).to_numpy(dtype=np.float64)
+            typed[column] = numbers.astype(np.int64) if data_type == 'Integer' else numbers
+        elif data_type == 'DateTime':
+            dates = pd.to_datetime(values.str.strip(), errors='coerce', format='ISO8601')
+            typed[column] = dates.to_numpy(dtype='datetime64[s]')
+        else:
+            typed[column] = columns[column]
+    return typed
+
+def render_rows(records, clean_records, delimiter):
+    """Serialize a chunk's messy records
+    
+    Rows without CSV formatting issues are written with normal CSV quoting,
+    so delimiters inside the source's own values stay valid. Rows that got a
+    formatting issue are raw-joined like write_messy_records, so the issue
+    really breaks the row structure.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=delimiter, lineterminator='\n')
+    for record, clean_record in zip(records, clean_records):
+        if record is clean_record:
+            writer.writerow(record)
+        else:
+            buffer.write(delimiter.join('' if x is None else str(x) for x in record) + '\n')
+    return buffer.getvalue()
+
+def corrupt_chunk(task):
+    """Corrupt one chunk of rows; returns (messy CSV text, tracker holding the chunk's issues)
+    
+    Draws come from counter-based record streams, so a row's corruption
+    depends only on (seed, row number) - not on chunk size or worker count.
+    """
+    start_id, chunk, schema, options = task
+    field_names = list(schema)
+    chunk = chunk.fillna('')  # short rows leave trailing cells empty
+    columns = {column: chunk[column].to_numpy(dtype=object) for column in field_names}
+    
+    # Buffers the chunk's issues; the parent merges them into its own log
+    tracker = DataQualityTracker(options['issue_log'], flush_size=float('inf'))
+    
+    rng = record_stream(options['seed'], 'corruption', start_id, corruption_draws(len(field_names)))
+    messy_columns = apply_targeted_corruption_batch(
+        typed_columns(columns, schema), start_id, tracker, rng, options['corruption_rate'],
+        schema=schema, columns=columns, issue_types=options['issue_types'])
+    num_field_issues = tracker.total_issues
+    
+    records = [list(row) for row in zip(*(messy_columns[column] for column in field_names))]
+    clean_records = list(records)
+    rng = record_stream(options['seed'], 'csv_format', start_id, csv_format_draws(len(field_names)))
+    apply_csv_formatting_issues_batch(records, start_id, tracker, rng, options['csv_issue_rate'],
+                                      num_fields=len(field_names))
+    
+    # Log by (record id, stage) rather than stage by stage, so the log does not depend on chunk size either
+    stages = np.arange(tracker.total_issues) >= num_field_issues
+    tracker.reorder(np.lexsort((stages, np.frombuffer(tracker.record_ids, dtype=np.int64))))
+    
+    return render_rows(records, clean_records, options['delimiter']), tracker
+
+def ordered_results(tasks, workers):
+    """corrupt_chunk results in task order, with at most 2 chunks per worker in flight"""
+    if workers <= 1:
+        for task in tasks:
+            yield corrupt_chunk(task)
+        return
+    
+    with multiprocessing.Pool(workers) as pool:
+        in_flight = collections.deque()
+        for task in tasks:
+            in_flight.append(pool.apply_async(corrupt_chunk, (task,)))
+            if len(in_flight) >= 2 * workers:
+                yield in_flight.popleft().get()
+        while in_flight:
+            yield in_flight.popleft().get()
+
+def corrupt_csv(input_path, output_path=None, issue_log=None, report=None, chunk_size=BATCH_SIZE,
+                workers=1, seed=DEFAULT_SEED, corruption_rate=0.15, csv_issue_rate=0.05,
+                issue_types=ISSUE_TYPES, schema_overrides=None, delimiter=',', encoding='utf-8'):
+    """Write a messy copy of input_path and stream every injected issue to issue_log
+    
+    The input is read chunk_size rows at a time (all values as strings) and
+    each chunk is corrupted by a worker process, so files of any size run in
+    bounded memory. corruption_rate is the share of rows with 1-3 field-level
+    issues, drawn from issue_types; csv_issue_rate the share of rows with a
+    CSV structure issue. Column types are inferred from the first
+    SCHEMA_SAMPLE_ROWS rows, read on their own so they do not depend on
+    chunk_size; schema_overrides ({column: type}) corrects them. Record ids in the log
+    are 0-based data row numbers.
+    """
+    base = input_path.rsplit('.', 1)[0]
+    output_path = output_path or f'{base}{MESSY_SUFFIX}.csv'
+    issue_log = issue_log or f'{base}{ISSUE_LOG_SUFFIX}'
+    report = report or f'{base}{REPORT_SUFFIX}'
+    
+    print(f"Corrupting {input_path} in chunks of {chunk_size} rows...")
+    
+    sample = pd.read_csv(input_path, sep=delimiter, dtype=str, keep_default_na=False,
+                         nrows=SCHEMA_SAMPLE_ROWS, encoding=encoding, on_bad_lines='skip')
+    if len(sample) == 0:
+        raise ValueError(f"{input_path} has no data rows")
+    
+    schema = infer_schema(sample)
+    unknown = [column for column in schema_overrides or {} if column not in schema]
+    if unknown:
+        raise ValueError(f"Schema override for unknown columns: {', '.join(unknown)}")
+    schema.update(schema_overrides or {})
+    print("Column types:")
+    for column, data_type in schema.items():
+        print(f"  • {column}: {data_type}")
+    
+    options = {
+        'seed': seed,
+        'corruption_rate': corruption_rate,
+        'csv_issue_rate': csv_issue_rate,
+        'issue_types': list(issue_types),
+        'delimiter': delimiter,
+        'issue_log': issue_log
+    }
+    
+    def tasks():
+        start_id = 0
+        reader = pd.read_csv(input_path, sep=delimiter, dtype=str, keep_default_na=False,
+                             chunksize=chunk_size, encoding=encoding, on_bad_lines='warn')
+        for chunk in reader:
+            yield start_id, chunk, schema, options
+            start_id += len(chunk)
+    
+    tracker = DataQualityTracker(issue_log)
+    num_records = 0
+    with open(output_path, 'w', newline='', encoding='utf-8') as messy_file:
+        csv.writer(messy_file, delimiter=delimiter, lineterminator='\n').writerow(list(schema))
+        for messy_text, chunk_tracker in ordered_results(tasks(), workers):
+            messy_file.write(messy_text)
+            tracker.merge(chunk_tracker)
+            num_records += messy_text.count('\n')  # only used for progress output
+            print(f"  Processed ~{num_records:,} lines", end='\r')
+    
+    tracker.save_report(report)
+    
+    print("\n" + "="*60)
+    print("🎉 CORRUPTION COMPLETE!")
+    print("="*60)
+    print(f"📁 Messy copy: {output_path}")
+    print(f"📁 Issue report: {report}")
+    print(f"📁 Issue log: {issue_log}")
+    print(f"\n📊 SUMMARY:")
+    print(f"  • Records with issues: {tracker.total_records_with_issues:,}")
+    print(f"  • Total issues: {tracker.total_issues:,}")
+    print(f"\n🔍 ISSUE BREAKDOWN:")
+    for issue_type, count in sorted(tracker.issue_counts.items()):
+        print(f"  • {issue_type}: {count}")
+    
+    return output_path, issue_log
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Inject controlled data quality issues into an existing CSV')
+    parser.add_argument('input', help='CSV file to corrupt (first row is the header)')
+    parser.add_argument('-o', '--output', help='Messy copy (default: <input>_messy.csv)')
+    parser.add_argument('--issue-log', help='Per-issue log, .jsonl or .parquet (default: <input>_issues.jsonl)')
+    parser.add_argument('--report', help='Summary report (default: <input>_issues_report.json)')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE, help='Rows read and corrupted per chunk')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes corrupting chunks')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Seed; output does not depend on workers or chunk size')
+    parser.add_argument('--corruption-rate', type=float, default=0.15,
+                        help='Share of rows with 1-3 field-level issues')
+    parser.add_argument('--csv-issue-rate', type=float, default=0.05,
+                        help='Share of rows with a CSV structure issue')
+    parser.add_argument('--issue-types', default=','.join(ISSUE_TYPES),
+                        help='Comma-separated field-level issue types to inject')
+    parser.add_argument('--schema', help='Override inferred column types, e.g. "age:Integer,visit:DateTime"')
+    parser.add_argument('--delimiter', default=',', help='Input and output delimiter')
+    parser.add_argument('--encoding', default='utf-8', help='Input file encoding')
+    args = parser.parse_args()
+    
+    issue_types = [t.strip() for t in args.issue_types.split(',')]
+    unknown = [t for t in issue_types if t not in ISSUE_TYPES]
+    if unknown:
+        parser.error(f"Unknown issue types: {', '.join(unknown)} (choose from {', '.join(ISSUE_TYPES)})")
+    
+    try:
+        corrupt_csv(args.input, args.output, issue_log=args.issue_log, report=args.report,
+                    chunk_size=args.chunk_size, workers=args.workers, seed=args.seed,
+                    corruption_rate=args.corruption_rate, csv_issue_rate=args.csv_issue_rate,
+                    issue_types=issue_types,
+                    schema_overrides=parse_schema_overrides(args.schema) if args.schema else None,
+                    delimiter=args.delimiter, encoding=args.encoding)
+    except ImportError as e:
+        print(f"Missing required package: {e}")
+        print("Please install required packages:")
+        print("pip install faker numpy pandas")
+    except Exception as e:
+        print(f"Error corrupting data: {e}")
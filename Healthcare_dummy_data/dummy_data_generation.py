@@ -6,15 +6,41 @@ Generates both clean baseline data and controlled messy data for ETL testing.
 
 import random
 import csv
+import re
 import datetime
 from faker import Faker
 import numpy as np
 import pandas as pd
 import json
+import argparse
+import os
+import shutil
+import multiprocessing
+import collections
+import gzip
+import bz2
+import time
+import contextlib
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # Only needed for Parquet output
+    pa = pc = pq = None
+
+try:
+    import zstandard
+except ImportError:  # Only needed for zstd output
+    zstandard = None
+
+DEFAULT_SEED = 42
 
 fake = Faker()
-random.seed(42)  # For reproducible results
-np.random.seed(42)
+random.seed(DEFAULT_SEED)  # For reproducible results
+np.random.seed(DEFAULT_SEED)
 
 # Schema from the provided image
 SCHEMA = {
@@ -60,38 +86,315 @@ SCALE_CATEGORIES = [
     'Normal', 'Low', 'High', 'Clinical', 'Subclinical'
 ]
 
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+FIELD_NAMES = list(SCHEMA.keys())
+
+# Field-level issue types applied by apply_targeted_corruption
+ISSUE_TYPES = [
+    'missing_value', 'whitespace', 'wrong_type', 'negative_value',
+    'special_chars', 'null_string', 'date_format', 'encoding'
+]
+MISSING_VALUES = ['', None, 'NULL', 'null', 'N/A']
+NULL_STRINGS = ['null', 'NULL', 'None', 'undefined']
+SPECIAL_CHARS = ['@', '#', '$', '%', '^', '&', '*']
+BAD_DATE_FORMATS = ['%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%m-%d-%Y']
+
+# Faker parses '-2y' as 2 * 365.24 days; the batch engine samples the same window
+DATE_WINDOW_SECONDS = int(2 * 365.24 * 24 * 60 * 60)
+
+# Rows generated per NumPy call in batch mode (bounds the size of temporary arrays)
+BATCH_SIZE = 100000
+
+# Uniform draws consumed per record by each batch stage. Every record uses a
+# fixed-width row of draws, so in counter-based mode a record's draws sit at a
+# known Philox counter. Widths are multiples of 4 (one Philox block).
+BASE_DRAWS = 20
+
+def corruption_draws(num_fields):
+    """Draws per record for the corruption stage: decision, issue count, one key
+    per field, 3 issue types and 3 variants, padded to whole Philox blocks of 4"""
+    return -(-(2 + num_fields + 6) // 4) * 4
+
+def csv_format_draws(num_fields):
+    """Draws per record for the csv_format stage: decision, issue type, columns
+    removed, line break field and one per field, padded to whole Philox blocks of 4"""
+    return -(-(4 + num_fields) // 4) * 4
+
+CORRUPTION_DRAWS = corruption_draws(len(FIELD_NAMES))  # 32
+CSV_FORMAT_DRAWS = csv_format_draws(len(FIELD_NAMES))  # 28
+RECORD_STAGES = ['base', 'corruption', 'csv_format']
+STAGE_DRAWS = {'base': BASE_DRAWS, 'corruption': CORRUPTION_DRAWS, 'csv_format': CSV_FORMAT_DRAWS}
+
+CLEAN_FILENAME = 'healthcare_survey_clean_baseline.csv'
+CLEAN_PARQUET_PATH = 'healthcare_survey_clean_baseline.parquet'
+MESSY_FILENAME = 'healthcare_survey_messy_test.csv'
+REPORT_FILENAME = 'data_quality_issues_report.json'
+ISSUE_LOG_FILENAME = 'data_quality_issues.jsonl'
+
+# Compressed CSV output: file extension per codec, and the uncompressed size
+# of each independently compressed block
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'bz2': '.bz2', 'zstd': '.zst'}
+COMPRESSION_BLOCK_SIZE = 4 * 1024 * 1024
+
+# A few completely malformed rows appended to the messy file for extreme testing
+MALFORMED_ROWS = [
+    ',,,,malformed,row,with,issues',
+    '"unclosed quote field, causing issues',
+    'field1,field2,"field with\nmultiple\nlines",field4',
+]
+
 class DataQualityTracker:
-    """Track which records have which data quality issues"""
-    def __init__(self):
-        self.issues = {}
+    """Track which records have which data quality issues
+    
+    Every issue is kept as three compact typed columns: record id, issue
+    code and field code (indexes into issue_types and field_names). The
+    original and corrupted values are only streamed to issue_log - JSONL or
+    Parquet, chosen by its extension - in batches of flush_size issues, so
+    memory stays small however many issues are tracked.
+    Non-integer record ids (e.g. 'malformed') are stored as -1.
+    """
+    def __init__(self, issue_log=None, flush_size=100000):
+        self.issue_log = issue_log
+        self.flush_size = flush_size
+        self.issue_types = []
+        self.field_names = []
+        self._issue_codes = {}
+        self._field_codes = {}
+        self.record_ids = array('q')
+        self.issue_codes = array('B')
+        self.field_codes = array('H')
         self.issue_counts = {}
+        self.special_record_ids = []
+        self._pending = []
+        self._log_writer = None
+    
+    def issue_code(self, issue_type):
+        """Code for an issue type, registering it on first use"""
+        if issue_type not in self._issue_codes:
+            self._issue_codes[issue_type] = len(self.issue_types)
+            self.issue_types.append(issue_type)
+        return self._issue_codes[issue_type]
+    
+    def field_code(self, field_name):
+        """Code for a field name, registering it on first use"""
+        if field_name not in self._field_codes:
+            self._field_codes[field_name] = len(self.field_names)
+            self.field_names.append(field_name)
+        return self._field_codes[field_name]
     
     def add_issue(self, record_id, issue_type, field_name, original_value, corrupted_value):
-        if record_id not in self.issues:
-            self.issues[record_id] = []
-        
-        self.issues[record_id].append({
-            'issue_type': issue_type,
-            'field': field_name,
-            'original': original_value,
-            'corrupted': corrupted_value
-        })
+        if isinstance(record_id, (int, np.integer)):
+            self.record_ids.append(int(record_id))
+        else:
+            self.record_ids.append(-1)
+            if record_id not in self.special_record_ids:
+                self.special_record_ids.append(record_id)
+        self.issue_codes.append(self.issue_code(issue_type))
+        self.field_codes.append(self.field_code(field_name))
         
         if issue_type not in self.issue_counts:
             self.issue_counts[issue_type] = 0
         self.issue_counts[issue_type] += 1
+        
+        if self.issue_log:
+            self._pending.append((record_id, issue_type, field_name, original_value, corrupted_value))
+            if len(self._pending) >= self.flush_size:
+                self.flush()
+    
+    def add_issues(self, record_ids, issue_codes, field_codes, original_values, corrupted_values):
+        """Bulk add_issue for integer record ids and already registered codes"""
+        record_ids = np.asarray(record_ids, dtype=np.int64)
+        issue_codes = np.asarray(issue_codes, dtype=np.uint8)
+        field_codes = np.asarray(field_codes, dtype=np.uint16)
+        self.record_ids.frombytes(record_ids.tobytes())
+        self.issue_codes.frombytes(issue_codes.tobytes())
+        self.field_codes.frombytes(field_codes.tobytes())
+        
+        for code, count in zip(*np.unique(issue_codes, return_counts=True)):
+            issue_type = self.issue_types[code]
+            self.issue_counts[issue_type] = self.issue_counts.get(issue_type, 0) + int(count)
+        
+        if self.issue_log:
+            issue_types = [self.issue_types[code] for code in issue_codes.tolist()]
+            field_names = [self.field_names[code] for code in field_codes.tolist()]
+            self._pending.extend(zip(record_ids.tolist(), issue_types, field_names,
+                                     original_values, corrupted_values))
+            if len(self._pending) >= self.flush_size:
+                self.flush()
+    
+    def merge(self, other):
+        """Append another tracker's issues, e.g. from a shard
+        
+        Issues other has not flushed yet (a tracker whose log is never opened,
+        used to buffer one chunk in a worker) are queued for this tracker's log.
+        """
+        issue_map = np.array([self.issue_code(t) for t in other.issue_types] or [0], dtype=np.uint8)
+        field_map = np.array([self.field_code(f) for f in other.field_names] or [0], dtype=np.uint16)
+        self.record_ids.extend(other.record_ids)
+        self.issue_codes.frombytes(issue_map[np.frombuffer(other.issue_codes, dtype=np.uint8)].tobytes())
+        self.field_codes.frombytes(field_map[np.frombuffer(other.field_codes, dtype=np.uint16)].tobytes())
+        for issue_type, count in other.issue_counts.items():
+            self.issue_counts[issue_type] = self.issue_counts.get(issue_type, 0) + count
+        for record_id in other.special_record_ids:
+            if record_id not in self.special_record_ids:
+                self.special_record_ids.append(record_id)
+        if self.issue_log and other._pending:
+            self._pending.extend(other._pending)
+            if len(self._pending) >= self.flush_size:
+                self.flush()
+    
+    def reorder(self, order):
+        """Put the tracked issues in the given order (a permutation of their positions)
+        
+        Only for a tracker that has not flushed yet, e.g. one buffering a chunk.
+        """
+        order = np.asarray(order, dtype=np.int64)
+        self.record_ids = array('q', np.frombuffer(self.record_ids, dtype=np.int64)[order].tobytes())
+        self.issue_codes = array('B', np.frombuffer(self.issue_codes, dtype=np.uint8)[order].tobytes())
+        self.field_codes = array('H', np.frombuffer(self.field_codes, dtype=np.uint16)[order].tobytes())
+        if self._pending:
+            self._pending = [self._pending[i] for i in order.tolist()]
+    
+    @property
+    def total_issues(self):
+        return len(self.record_ids)
+    
+    @property
+    def total_records_with_issues(self):
+        record_ids = np.frombuffer(self.record_ids, dtype=np.int64)
+        return len(np.unique(record_ids[record_ids >= 0])) + len(self.special_record_ids)
+    
+    def flush(self):
+        """Write pending issues to the issue log"""
+        if not self._pending:
+            return
+        if self.issue_log.endswith('.parquet'):
+            self._flush_parquet()
+        else:
+            if self._log_writer is None:
+                self._log_writer = open(self.issue_log, 'w', encoding='utf-8')
+            for record_id, issue_type, field_name, original, corrupted in self._pending:
+                self._log_writer.write(json.dumps({
+                    'record_id': record_id,
+                    'issue_type': issue_type,
+                    'field': field_name,
+                    'original': original,
+                    'corrupted': corrupted
+                }, default=str) + '\n')
+        self._pending = []
+    
+    def _flush_parquet(self):
+        if pq is None:
+            raise ImportError("No module named 'pyarrow' (needed for a Parquet issue log)")
+        record_ids, issue_types, field_names, originals, corrupted = zip(*self._pending)
+        table = pa.table({
+            'record_id': pa.array([str(r) for r in record_ids]),
+            'issue_type': pa.array(issue_types, type=pa.string()),
+            'field': pa.array(field_names, type=pa.string()),
+            'original': pa.array([None if v is None else str(v) for v in originals], type=pa.string()),
+            'corrupted': pa.array([None if v is None else str(v) for v in corrupted], type=pa.string()),
+        })
+        if self._log_writer is None:
+            self._log_writer = pq.ParquetWriter(self.issue_log, table.schema)
+        self._log_writer.write_table(table)
+    
+    def close(self):
+        """Flush and close the issue log"""
+        if self.issue_log:
+            self.flush()
+        if self._log_writer is not None:
+            self._log_writer.close()
+            self._log_writer = None
     
     def save_report(self, filename):
-        """Save detailed issue report"""
+        """Close the issue log and save the summary report"""
+        self.close()
         report = {
             'summary': self.issue_counts,
-            'total_records_with_issues': len(self.issues),
-            'detailed_issues': self.issues
+            'total_issues': self.total_issues,
+            'total_records_with_issues': self.total_records_with_issues,
+            'issue_log': self.issue_log
         }
         
         with open(filename, 'w') as f:
             json.dump(report, f, indent=2, default=str)
 
+def merge_issue_logs(part_logs, issue_log):
+    """Concatenate part issue logs (JSONL or Parquet) into one log and remove the parts"""
+    part_logs = [part for part in part_logs if os.path.exists(part)]
+    if issue_log.endswith('.parquet'):
+        writer = None
+        for part in part_logs:
+            part_file = pq.ParquetFile(part)
+            if writer is None:
+                writer = pq.ParquetWriter(issue_log, part_file.schema_arrow)
+            for i in range(part_file.num_row_groups):
+                writer.write_table(part_file.read_row_group(i))
+        if writer is not None:
+            writer.close()
+    else:
+        with open(issue_log, 'wb') as merged:
+            for part in part_logs:
+                with open(part, 'rb') as f:
+                    shutil.copyfileobj(f, merged)
+    for part in part_logs:
+        os.remove(part)
+
+class GenerationMetrics:
+    """Wall-clock seconds and rows processed per generation stage
+    
+    Stages are timed with `with metrics.stage(name, rows):` around each
+    chunk's work. Metrics from parallel shards are merged by adding their
+    times, so a stage's rows/sec is the throughput of a single worker;
+    total_seconds is the run's wall-clock time.
+    """
+    STAGES = ['base_generation', 'targeted_corruption', 'csv_formatting',
+              'clean_write', 'messy_write', 'report_save']
+    
+    def __init__(self):
+        self.seconds = dict.fromkeys(self.STAGES, 0.0)
+        self.rows = dict.fromkeys(self.STAGES, 0)
+        self.num_records = 0
+        self.total_seconds = 0.0
+    
+    @contextlib.contextmanager
+    def stage(self, name, rows=0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] += time.perf_counter() - start
+            self.rows[name] += rows
+    
+    def merge(self, other):
+        """Add another run's (e.g. a shard's) stage times and row counts"""
+        for name in self.STAGES:
+            self.seconds[name] += other.seconds[name]
+            self.rows[name] += other.rows[name]
+    
+    def rows_per_second(self, name):
+        return self.rows[name] / self.seconds[name] if self.seconds[name] > 0 else 0.0
+    
+    def as_dict(self):
+        """Plain dict of the metrics, e.g. for json.dump"""
+        return {
+            'num_records': self.num_records,
+            'total_seconds': self.total_seconds,
+            'rows_per_second': self.num_records / self.total_seconds if self.total_seconds > 0 else 0.0,
+            'stages': {name: {'seconds': self.seconds[name],
+                              'rows': self.rows[name],
+                              'rows_per_second': self.rows_per_second(name)}
+                       for name in self.STAGES}
+        }
+    
+    def print_report(self):
+        print(f"\n⏱️ STAGE TIMINGS:")
+        for name in self.STAGES:
+            print(f"  • {name}: {self.seconds[name]:.2f}s ({self.rows_per_second(name):,.0f} rows/s)")
+        if self.total_seconds > 0:
+            print(f"  • total: {self.total_seconds:.2f}s ({self.num_records / self.total_seconds:,.0f} rows/s)")
+
 def generate_base_record(record_id):
     """Generate a clean, valid healthcare survey record"""
     user_id = random.randint(1000, 99999)
@@ -135,11 +438,294 @@ def generate_base_record(record_id):
         initial_survey_completed_at, file_date
     ]
 
+def draw_integers(draws, low, high):
+    """Map uniform draws to integers in [low, high], like random.randint"""
+    return low + (draws * (high - low + 1)).astype(np.int64)
+
+def draw_choice(draws, options):
+    """Map uniform draws to elements of options, like random.choice"""
+    return np.asarray(options)[(draws * len(options)).astype(np.int64)]
+
+def record_stream(seed, stage, start_id, draws_per_record=None):
+    """Counter-based generator positioned at record start_id's draws for one stage
+    
+    Draws come from Philox keyed on (seed, stage) with the counter advanced
+    past the rows of all earlier records, so record i's values depend only on
+    (seed, i) - never on which records were generated before it.
+    draws_per_record defaults to the stage's width for SCHEMA (STAGE_DRAWS).
+    """
+    if draws_per_record is None:
+        draws_per_record = STAGE_DRAWS[stage]
+    key = np.random.SeedSequence(seed, spawn_key=(RECORD_STAGES.index(stage),)).generate_state(2, np.uint64)
+    counter = start_id * (draws_per_record // 4)
+    return np.random.Generator(np.random.Philox(key=key, counter=counter))
+
+def stage_generators(rng, seed, start_id, counter_based=False):
+    """Generators for the base, corruption and csv_format stages of one chunk
+    
+    Sequential mode shares rng across stages; counter-based mode positions a
+    record_stream for each stage at start_id.
+    """
+    if counter_based:
+        return tuple(record_stream(seed, stage, start_id) for stage in RECORD_STAGES)
+    return rng, rng, rng
+
+def generate_base_records_batch(start_id, num_records, rng=None, reference_time=None):
+    """Generate a batch of clean records as NumPy columns.
+
+    Returns a dict mapping every SCHEMA field to an array of num_records values,
+    drawn from the same ranges and category pools as generate_base_record.
+    Record ids run from start_id to start_id + num_records - 1. DateTime fields
+    are datetime64[s] arrays; batch_to_records turns them into CSV strings.
+    Each record consumes one row of BASE_DRAWS uniform draws from rng.
+    """
+    if rng is None:
+        rng = np.random.default_rng(DEFAULT_SEED)
+    if reference_time is None:
+        reference_time = datetime.datetime.now()
+    n = num_records
+    u = rng.random((n, BASE_DRAWS))
+    now = np.datetime64(reference_time.replace(microsecond=0), 's')
+    
+    # Dates: base date uniformly within the last two years, like fake.date_time_between
+    base_date = now - draw_integers(u[:, 3], 0, DATE_WINDOW_SECONDS).astype('timedelta64[s]')
+    survey_completed_at = base_date + draw_integers(u[:, 4], 1, 48).astype('timedelta64[h]')
+    initial_survey_completed_at = base_date - draw_integers(u[:, 5], 30, 365).astype('timedelta64[D]')
+    
+    return {
+        'user_id': draw_integers(u[:, 0], 1000, 99999),
+        'room_id': draw_integers(u[:, 1], 100, 9999),
+        'survey_id': draw_integers(u[:, 2], 1, 500),
+        'survey_scale_result_id': np.arange(start_id, start_id + n, dtype=np.int64),
+        'survey_created_at': base_date,
+        'survey_completed_at': survey_completed_at,
+        'survey_name': draw_choice(u[:, 6], SURVEY_NAMES),
+        'scale_name': draw_choice(u[:, 7], SCALE_NAMES),
+        'scale_result_category': draw_choice(u[:, 8], SCALE_CATEGORIES),
+        'scale_result': draw_integers(u[:, 10], 0, 27),
+        'baseline_scale_result': draw_integers(u[:, 11], 0, 27),
+        'improvement_from_initial': np.round(-10.0 + u[:, 13] * 25.0, 2),
+        'improvement_from_previous': np.round(-5.0 + u[:, 14] * 15.0, 2),
+        'is_latest': draw_integers(u[:, 18], 0, 1),
+        'initial_scale_result_value': draw_integers(u[:, 12], 0, 27),
+        'initial_scale_result_category': draw_choice(u[:, 9], SCALE_CATEGORIES),
+        'improvement_from_initial_value': np.round(-10.0 + u[:, 15] * 25.0, 2),
+        'is_improvable': draw_integers(u[:, 19], 0, 1),
+        'is_sig_improvable_phq_gad': np.round(u[:, 16], 3),
+        'is_sig_improved_phq_gad': np.round(u[:, 17], 3),
+        'initial_survey_completed_at': initial_survey_completed_at,
+        'file_date': np.full(n, now),
+    }
+
+def format_timestamps(values):
+    """Format a datetime64 array as '%Y-%m-%d %H:%M:%S' strings"""
+    return np.char.replace(np.datetime_as_string(values, unit='s'), 'T', ' ')
+
+def batch_columns(batch):
+    """Convert a column batch into object arrays of the values generate_base_record returns
+    
+    Numbers become Python ints/floats and DateTime fields become
+    '%Y-%m-%d %H:%M:%S' strings.
+    """
+    columns = {}
+    for field_name, data_type in SCHEMA.items():
+        values = batch[field_name]
+        if data_type == 'DateTime':
+            values = format_timestamps(values)
+        columns[field_name] = values.astype(object)
+    return columns
+
+def columns_to_records(columns):
+    """Turn a dict of equal-length columns into row lists in SCHEMA order"""
+    return [list(row) for row in zip(*(columns[field_name] for field_name in FIELD_NAMES))]
+
+def batch_to_records(batch):
+    """Convert a column batch into row lists shaped like generate_base_record output"""
+    return columns_to_records(batch_columns(batch))
+
+def arrow_schema():
+    """Arrow schema matching SCHEMA's Integer/Float/String/DateTime types"""
+    arrow_types = {
+        'Integer': pa.int64(),
+        'Float': pa.float64(),
+        'String': pa.string(),
+        'DateTime': pa.timestamp('s'),
+    }
+    return pa.schema([(field_name, arrow_types[data_type]) for field_name, data_type in SCHEMA.items()])
+
+def batch_to_arrow_table(batch):
+    """Convert a generate_base_records_batch column batch into a typed Arrow table"""
+    schema = arrow_schema()
+    return pa.table([pa.array(batch[field.name], type=field.type) for field in schema], schema=schema)
+
+def records_to_arrow_table(records):
+    """Convert row lists (as from generate_base_record) into a typed Arrow table"""
+    schema = arrow_schema()
+    columns = list(zip(*records)) if records else [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_timestamp(field.type):
+            arrays.append(pc.strptime(pa.array(values, type=pa.string()),
+                                      format=TIMESTAMP_FORMAT, unit='s'))
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.table(arrays, schema=schema)
+
+def compress_block(data, compression):
+    """Compress one block as a complete gzip member, bz2 stream or zstd frame"""
+    if compression == 'gzip':
+        return gzip.compress(data, compresslevel=6, mtime=0)
+    if compression == 'bz2':
+        return bz2.compress(data)
+    return zstandard.ZstdCompressor().compress(data)
+
+class ParallelCompressedWriter:
+    """Text file whose content is compressed block by block on a thread pool
+    
+    Written text is collected into blocks of block_size characters. Each
+    block is compressed on its own (zlib, bz2 and zstandard release the GIL),
+    so compression runs in parallel with generation, and the compressed
+    blocks are written in order. Concatenated gzip members, bz2 streams and
+    zstd frames are valid files for gzip, bzip2, zstd, pandas and Spark.
+    write() only waits once 2 * workers blocks are queued.
+    """
+    def __init__(self, filename, compression, mode='w', workers=None,
+                 block_size=COMPRESSION_BLOCK_SIZE):
+        if compression not in COMPRESSION_EXTENSIONS:
+            raise ValueError(f"Unknown compression: {compression}")
+        if compression == 'zstd' and zstandard is None:
+            raise ImportError("No module named 'zstandard' (needed for zstd output)")
+        self.filename = filename
+        self.compression = compression
+        self.block_size = block_size
+        self.workers = workers or os.cpu_count() or 1
+        self.file = open(filename, mode + 'b')
+        self.executor = ThreadPoolExecutor(self.workers)
+        self.in_flight = collections.deque()
+        self.buffer = []
+        self.buffered = 0
+    
+    def write(self, text):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if self.buffered >= self.block_size:
+            self._submit_block()
+    
+    def _submit_block(self):
+        data = ''.join(self.buffer).encode('utf-8')
+        self.buffer = []
+        self.buffered = 0
+        self.in_flight.append(self.executor.submit(compress_block, data, self.compression))
+        # Write finished blocks; block only when too many are queued
+        while self.in_flight and (self.in_flight[0].done() or len(self.in_flight) > 2 * self.workers):
+            self.file.write(self.in_flight.popleft().result())
+    
+    def close(self):
+        if self.buffer:
+            self._submit_block()
+        while self.in_flight:
+            self.file.write(self.in_flight.popleft().result())
+        self.executor.shutdown()
+        self.file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+def output_filename(filename, compression=None):
+    """File name with the compression extension added, e.g. name.csv.gz"""
+    return filename + COMPRESSION_EXTENSIONS[compression] if compression else filename
+
+def open_output(filename, compression=None, mode='w', workers=None):
+    """Open a CSV output file for text writing, compressed in parallel blocks if requested"""
+    if compression:
+        return ParallelCompressedWriter(filename, compression, mode, workers)
+    return open(filename, mode, newline='', encoding='utf-8')
+
+class CsvBaselineWriter:
+    """Write clean record chunks to a (optionally compressed) CSV file with the SCHEMA header
+    
+    header=False leaves the header out, for shards appended to the first one.
+    """
+    def __init__(self, filename, compression=None, header=True, compress_workers=None):
+        self.filename = filename
+        self.file = open_output(filename, compression, workers=compress_workers)
+        self.writer = csv.writer(self.file)
+        if header:
+            self.writer.writerow(list(SCHEMA.keys()))  # Clean header
+    
+    def write_chunk(self, records, batch=None):
+        self.writer.writerows(records)
+    
+    def close(self):
+        self.file.close()
+
+class ParquetBaselineWriter:
+    """Write clean record chunks as a typed, optionally partitioned Parquet dataset
+    
+    Every chunk becomes its own file(s) under `path`, named with basename_prefix
+    so parallel shards can write into the same dataset. DateTime partition
+    columns are partitioned by day through an extra '<column>_day' column, so
+    the original timestamp column keeps its type.
+    """
+    def __init__(self, path, partition_by=None, basename_prefix='part'):
+        if pq is None:
+            raise ImportError("No module named 'pyarrow' (needed for Parquet output)")
+        if partition_by is not None and partition_by not in SCHEMA:
+            raise ValueError(f"Unknown partition column: {partition_by}")
+        self.filename = path
+        self.partition_by = partition_by
+        self.basename_prefix = basename_prefix
+        self.chunk_index = 0
+        os.makedirs(path, exist_ok=True)
+    
+    def write_chunk(self, records, batch=None):
+        table = batch_to_arrow_table(batch) if batch is not None else records_to_arrow_table(records)
+        basename = f'{self.basename_prefix}-{self.chunk_index:06d}'
+        self.chunk_index += 1
+        
+        if self.partition_by is None:
+            pq.write_table(table, os.path.join(self.filename, basename + '.parquet'))
+            return
+        
+        partition_column = self.partition_by
+        if SCHEMA[partition_column] == 'DateTime':
+            partition_column = f'{self.partition_by}_day'
+            table = table.append_column(partition_column, pc.cast(table[self.partition_by], pa.date32()))
+        pq.write_to_dataset(table, self.filename, partition_cols=[partition_column],
+                            basename_template=basename + '-{i}.parquet')
+    
+    def close(self):
+        pass
+
+def open_clean_writer(clean_format='csv', partition_by=None, shard_index=None,
+                      compression=None, header=True, compress_workers=None):
+    """Open the clean baseline writer for a whole run or for one shard
+    
+    compression (gzip, bz2 or zstd) applies to CSV output; Parquet files
+    use Parquet's own column compression.
+    """
+    if clean_format == 'parquet':
+        prefix = 'part' if shard_index is None else f'shard-{shard_index:05d}'
+        return ParquetBaselineWriter(CLEAN_PARQUET_PATH, partition_by, basename_prefix=prefix)
+    if clean_format == 'csv':
+        filename = CLEAN_FILENAME if shard_index is None else part_filename(CLEAN_FILENAME, shard_index)
+        return CsvBaselineWriter(output_filename(filename, compression), compression,
+                                 header, compress_workers)
+    raise ValueError(f"Unknown clean format: {clean_format}")
+
+def reset_parquet_output():
+    """Remove a previous run's Parquet dataset so chunks from old runs do not mix in"""
+    if os.path.isdir(CLEAN_PARQUET_PATH):
+        shutil.rmtree(CLEAN_PARQUET_PATH)
+
 def apply_targeted_corruption(record, record_id, tracker, corruption_probability=0.15):
     """Apply specific data quality issues to targeted records"""
     
     corrupted_record = record.copy()
-    field_names = list(SCHEMA.keys())
+    field_names = FIELD_NAMES
     
     # Decide if this record should have issues
     if random.random() > corruption_probability:
@@ -155,15 +741,12 @@ def apply_targeted_corruption(record, record_id, tracker, corruption_probability
         original_value = record[field_idx]
         
         # Choose specific issue type
-        issue_type = random.choice([
-            'missing_value', 'whitespace', 'wrong_type', 'negative_value',
-            'special_chars', 'null_string', 'date_format', 'encoding'
-        ])
+        issue_type = random.choice(ISSUE_TYPES)
         
         corrupted_value = original_value
         
         if issue_type == 'missing_value':
-            corrupted_value = random.choice(['', None, 'NULL', 'null', 'N/A'])
+            corrupted_value = random.choice(MISSING_VALUES)
             
         elif issue_type == 'whitespace':
             if original_value is not None:
@@ -190,17 +773,15 @@ def apply_targeted_corruption(record, record_id, tracker, corruption_probability
         
         elif issue_type == 'special_chars':
             if original_value is not None:
-                chars = ['@', '#', '$', '%', '^', '&', '*']
-                corrupted_value = f'{original_value}{random.choice(chars)}'
+                corrupted_value = f'{original_value}{random.choice(SPECIAL_CHARS)}'
         
         elif issue_type == 'null_string':
-            corrupted_value = random.choice(['null', 'NULL', 'None', 'undefined'])
+            corrupted_value = random.choice(NULL_STRINGS)
         
         elif issue_type == 'date_format' and data_type == 'DateTime':
             try:
                 date_obj = datetime.datetime.strptime(str(original_value), '%Y-%m-%d %H:%M:%S')
-                bad_formats = ['%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%m-%d-%Y']
-                corrupted_value = date_obj.strftime(random.choice(bad_formats))
+                corrupted_value = date_obj.strftime(random.choice(BAD_DATE_FORMATS))
             except:
                 corrupted_value = 'invalid_date'
         
@@ -213,12 +794,165 @@ def apply_targeted_corruption(record, record_id, tracker, corruption_probability
     
     return corrupted_record, True
 
-def apply_csv_formatting_issues(records, tracker):
-    """Apply CSV-specific formatting issues to select records"""
+def format_dates(values, date_format):
+    """Vectorized strftime for datetime64 values and formats built from %Y, %m and %d"""
+    days = values.astype('datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = days.astype('datetime64[Y]')
+    parts = {
+        '%Y': (years.astype(np.int64) + 1970).astype(str),
+        '%m': np.char.zfill(((months - years).astype(np.int64) + 1).astype(str), 2),
+        '%d': np.char.zfill(((days - months).astype(np.int64) + 1).astype(str), 2),
+    }
+    formatted = np.full(len(values), '')
+    for token in re.split('(%[Ymd])', date_format):
+        formatted = np.char.add(formatted, parts.get(token, token))
+    return formatted
+
+def fill_templates(values, templates, picks):
+    """Bulk random.choice([template.format(value) ...]) for an array of values
+    
+    picks[i] is the index of the template used for values[i]. Templates
+    without '{}' are used as literal values (e.g. 'null').
+    """
+    strings = values.astype(str)
+    filled = np.empty(len(values), dtype=object)
+    for k, template in enumerate(templates):
+        selected = picks == k
+        if not selected.any():
+            continue
+        if '{}' in template:
+            prefix, suffix = template.split('{}')
+            filled[selected] = np.char.add(np.char.add(prefix, strings[selected]), suffix)
+        else:
+            filled[selected] = template
+    return filled
+
+def corrupt_cells(issue_type, data_type, original, typed, variant):
+    """Corrupted values for one column's cells that all share one issue type
+    
+    original holds the cells' clean values (as in generate_base_record),
+    typed the same cells from the NumPy batch, and variant a uniform draw per
+    cell that picks between the alternatives of each issue type. Mirrors the
+    per-record rules in apply_targeted_corruption, including leaving values
+    unchanged when an issue does not apply to the column type.
+    """
+    def pick(options):
+        return np.minimum((variant * len(options)).astype(np.int64), len(options) - 1)
+    
+    corrupted = original.copy()
+    if issue_type == 'missing_value':
+        corrupted = np.array(MISSING_VALUES, dtype=object)[pick(MISSING_VALUES)]
+    elif issue_type == 'whitespace':
+        templates = ['  {}', '{}  ', '  {}  ', '\t{}\n']
+        corrupted = fill_templates(original, templates, pick(templates))
+    elif issue_type == 'wrong_type':
+        if data_type == 'Integer':
+            templates = ['{}.0', '{}.5', 'null', '"{}"', '{}L']
+            corrupted = fill_templates(original, templates, pick(templates))
+        elif data_type == 'Float':
+            templates = ['{}', 'null', 'NaN', '"{}"']
+            picks = pick(templates)
+            corrupted = fill_templates(original, templates, picks)
+            truncated = picks == 0
+            corrupted[truncated] = np.trunc(typed[truncated]).astype(np.int64).astype(str)
+    elif issue_type == 'negative_value':
+        if data_type in ['Integer', 'Float']:
+            positive = typed > 0
+            corrupted[positive] = (-typed[positive]).astype(object)
+    elif issue_type == 'special_chars':
+        corrupted = fill_templates(original, ['{}' + char for char in SPECIAL_CHARS],
+                                   pick(SPECIAL_CHARS))
+    elif issue_type == 'null_string':
+        corrupted = np.array(NULL_STRINGS, dtype=object)[pick(NULL_STRINGS)]
+    elif issue_type == 'date_format' and data_type == 'DateTime':
+        picks = pick(BAD_DATE_FORMATS)
+        unparsed = np.isnat(typed)
+        corrupted[unparsed] = 'invalid_date'
+        for k, date_format in enumerate(BAD_DATE_FORMATS):
+            selected = (picks == k) & ~unparsed
+            if selected.any():
+                corrupted[selected] = format_dates(typed[selected], date_format)
+    elif issue_type == 'encoding':
+        if data_type in ['String', 'DateTime']:  # the string-valued fields
+            corrupted = fill_templates(original, ['{}café'], np.zeros(len(original), dtype=np.int64))
+    return corrupted
+
+def apply_targeted_corruption_batch(batch, start_id, tracker, rng, corruption_probability=0.15,
+                                    schema=SCHEMA, columns=None, issue_types=ISSUE_TYPES):
+    """Column-oriented apply_targeted_corruption for a generate_base_records_batch batch
+    
+    Corrupted records, their 1-3 distinct fields and each cell's issue type
+    are drawn as arrays up front; each (column, issue type) group is then
+    corrupted in one bulk operation. Every corrupted cell is still tracked
+    individually, in record order, through one bulk tracker call. Returns
+    the messy columns as a dict of object arrays (see batch_columns).
+    Each record consumes one row of corruption_draws(len(schema)) uniform
+    draws from rng.
+    
+    Other tables can be corrupted by passing their schema (field name ->
+    data type), typed arrays as batch and the cell values to corrupt as
+    columns; issue_types restricts the issues cells are drawn from.
+    """
+    if columns is None:
+        columns = batch_columns(batch)
+    else:
+        columns = dict(columns)
+    field_names = list(schema)
+    n = len(columns[field_names[0]])
+    num_fields = len(field_names)
+    u = rng.random((n, corruption_draws(num_fields)))
+    
+    # Pick corrupted records, then 1-3 distinct fields in each of them
+    rows = np.flatnonzero(u[:, 0] < corruption_probability)
+    u = u[rows]
+    max_issues = min(3, num_fields)
+    num_issues = np.minimum(draw_integers(u[:, 1], 1, 3), max_issues)
+    field_order = np.argsort(u[:, 2:2 + num_fields], axis=1)[:, :max_issues]
+    chosen = np.arange(max_issues) < num_issues[:, None]
+    cell_rows = np.repeat(rows, num_issues)
+    cell_fields = field_order[chosen]
+    slots = 2 + num_fields
+    cell_issues = draw_integers(u[:, slots:slots + max_issues], 0, len(issue_types) - 1)[chosen]
+    cell_variants = u[:, slots + 3:slots + 3 + max_issues][chosen]
+    
+    cell_original = np.empty(len(cell_rows), dtype=object)
+    cell_corrupted = np.empty(len(cell_rows), dtype=object)
+    for field_idx, field_name in enumerate(field_names):
+        in_field = cell_fields == field_idx
+        if not in_field.any():
+            continue
+        clean_values = columns[field_name]
+        messy_values = clean_values.copy()
+        for issue_idx, issue_type in enumerate(issue_types):
+            cells = np.flatnonzero(in_field & (cell_issues == issue_idx))
+            if len(cells) == 0:
+                continue
+            target_rows = cell_rows[cells]
+            original = clean_values[target_rows]
+            corrupted = corrupt_cells(issue_type, schema[field_name], original,
+                                      batch[field_name][target_rows], cell_variants[cells])
+            messy_values[target_rows] = corrupted
+            cell_original[cells] = original
+            cell_corrupted[cells] = corrupted
+        columns[field_name] = messy_values
+    
+    issue_codes = np.array([tracker.issue_code(t) for t in issue_types])
+    field_codes = np.array([tracker.field_code(f) for f in field_names])
+    tracker.add_issues(start_id + cell_rows, issue_codes[cell_issues], field_codes[cell_fields],
+                       cell_original, cell_corrupted)
+    
+    return columns
+
+def apply_csv_formatting_issues(records, tracker, start_id=0):
+    """Apply CSV-specific formatting issues to select records
+    
+    Issues are tracked against start_id + position, so shards report global record ids.
+    """
     
     problematic_records = []
     
-    for i, record in enumerate(records):
+    for i, record in enumerate(records, start_id):
         # Most records stay normal
         if random.random() > 0.05:  # Only 5% get CSV issues
             problematic_records.append(record)
@@ -270,89 +1004,325 @@ def apply_csv_formatting_issues(records, tracker):
     
     return problematic_records
 
-def generate_healthcare_data(num_records=50000):
-    """Generate both clean and messy healthcare survey data"""
+def apply_csv_formatting_issues_batch(records, start_id, tracker, rng, issue_rate=0.05, num_fields=None):
+    """apply_csv_formatting_issues driven by one row of csv_format_draws(num_fields) draws per record
     
-    print(f"Generating {num_records} healthcare survey records...")
+    The affected records are selected with a single mask, so only those ~5%
+    are touched in Python. Records are modified in place and returned.
+    num_fields defaults to the number of SCHEMA fields.
+    """
+    if num_fields is None:
+        num_fields = len(FIELD_NAMES)
+    u = rng.random((len(records), csv_format_draws(num_fields)))
+    csv_issue_types = ['extra_columns', 'missing_columns', 'quote_issues',
+                       'line_breaks', 'delimiter_issues']
+    for i in np.flatnonzero(u[:, 0] < issue_rate).tolist():
+        record = records[i]
+        record_id = start_id + i
+        draws = u[i]
+        field_draws = draws[4:4 + len(record)]
+        issue_type = csv_issue_types[int(draws[1] * len(csv_issue_types))]
+        
+        if issue_type == 'extra_columns':
+            new_record = record + ['extra1', 'extra2']
+            tracker.add_issue(record_id, 'extra_columns', 'row_structure', len(record), len(new_record))
+        
+        elif issue_type == 'missing_columns':
+            new_record = record[:-int(draw_integers(draws[2], 1, 3))]
+            tracker.add_issue(record_id, 'missing_columns', 'row_structure', len(record), len(new_record))
+        
+        elif issue_type == 'quote_issues':
+            new_record = record.copy()
+            for j in np.flatnonzero(field_draws < 0.3).tolist():
+                if new_record[j] is not None:
+                    original = new_record[j]
+                    new_record[j] = f'"{original}""extra"'  # Problematic quotes
+                    tracker.add_issue(record_id, 'quote_issues', f'field_{j}', original, new_record[j])
+        
+        elif issue_type == 'line_breaks':
+            new_record = record.copy()
+            field_idx = int(draws[3] * len(new_record))
+            if new_record[field_idx] is not None:
+                original = new_record[field_idx]
+                new_record[field_idx] = f'"{original}\nline\nbreak"'
+                tracker.add_issue(record_id, 'line_breaks', f'field_{field_idx}', original, new_record[field_idx])
+        
+        else:  # delimiter_issues
+            new_record = record.copy()
+            for j in np.flatnonzero(field_draws < 0.2).tolist():
+                field = new_record[j]
+                if field is not None:
+                    new_record[j] = str(field).replace(',', ';')
+                    tracker.add_issue(record_id, 'delimiter_issues', 'field_content', field, new_record[j])
+        
+        records[i] = new_record
+    return records
+
+def write_messy_records(csvfile, records):
+    """Write messy records as raw comma-joined lines (no CSV quoting on purpose)"""
+    for record in records:
+        try:
+            row_str = ','.join([str(x) if x is not None else '' for x in record])
+            csvfile.write(row_str + '\n')
+        except:
+            # Handle encoding issues gracefully
+            safe_row = [str(x).encode('utf-8', errors='ignore').decode('utf-8') 
+                       if x is not None else '' for x in record]
+            csvfile.write(','.join(safe_row) + '\n')
+
+def choose_messy_header(rng=random):
+    """Pick a potentially problematic header for the messy file"""
+    return rng.choice([
+        list(SCHEMA.keys()),  # Normal
+        list(SCHEMA.keys()) + ['extra_col'],  # Extra column
+        [col.upper() for col in SCHEMA.keys()],  # Case issues
+    ])
+
+def shard_bounds(num_records, num_shards):
+    """Split record ids 0..num_records-1 into contiguous (start, stop) ranges"""
+    step, extra = divmod(num_records, num_shards)
+    bounds = []
+    start = 0
+    for shard_index in range(num_shards):
+        stop = start + step + (1 if shard_index < extra else 0)
+        bounds.append((start, stop))
+        start = stop
+    return bounds
+
+def part_filename(filename, shard_index):
+    """Name of one shard's part file, e.g. name.part-00003.csv"""
+    root, ext = os.path.splitext(filename)
+    return f'{root}.part-{shard_index:05d}{ext}'
+
+def generate_records_chunk(start_id, stop_id, tracker, rngs, reference_time, metrics=None):
+    """Generate, corrupt and CSV-mangle record ids start_id..stop_id-1 with the batch engine
     
-    # Generate base clean data
-    clean_records = []
-    messy_records = []
+    rngs are the base, corruption and csv_format generators (see
+    stage_generators). The chunk's issues are buffered and added to tracker
+    by (record id, stage), so the issue log does not depend on how records
+    are chunked. Stage times are added to metrics if given.
+    Returns the clean batch, clean records and messy records.
+    """
+    if metrics is None:
+        metrics = GenerationMetrics()
+    base_rng, corruption_rng, csv_rng = rngs
+    num_records = stop_id - start_id
+    chunk_tracker = DataQualityTracker(tracker.issue_log, flush_size=float('inf'))
+    with metrics.stage('base_generation', num_records):
+        batch = generate_base_records_batch(start_id, num_records, base_rng, reference_time)
+        clean_records = batch_to_records(batch)
+    with metrics.stage('targeted_corruption', num_records):
+        messy_columns = apply_targeted_corruption_batch(batch, start_id, chunk_tracker, corruption_rng)
+        num_field_issues = chunk_tracker.total_issues
+    with metrics.stage('csv_formatting', num_records):
+        messy_records = apply_csv_formatting_issues_batch(columns_to_records(messy_columns),
+                                                          start_id, chunk_tracker, csv_rng)
+        stages = np.arange(chunk_tracker.total_issues) >= num_field_issues
+        chunk_tracker.reorder(np.lexsort((stages, np.frombuffer(chunk_tracker.record_ids, dtype=np.int64))))
+        tracker.merge(chunk_tracker)
+    return batch, clean_records, messy_records
+
+def get_record(record_id, seed=DEFAULT_SEED, reference_time=None):
+    """Rebuild one record of a counter-based run in O(1)
+    
+    Returns a dict with the 'clean' record, the 'messy' record and its
+    'issues' as (issue_type, field) pairs, exactly as a --counter-based run
+    with the same seed and reference_time wrote them. No other record is
+    generated.
+    """
     tracker = DataQualityTracker()
+    rngs = stage_generators(None, seed, record_id, counter_based=True)
+    _, clean_records, messy_records = generate_records_chunk(
+        record_id, record_id + 1, tracker, rngs, reference_time)
+    issues = [(tracker.issue_types[issue_code], tracker.field_names[field_code])
+              for issue_code, field_code in zip(tracker.issue_codes, tracker.field_codes)]
+    return {'clean': clean_records[0], 'messy': messy_records[0], 'issues': issues}
+
+def stream_records(start_id, stop_id, tracker, clean_writer, messy_file, engine='numpy',
+                   rng=None, reference_time=None, chunk_size=BATCH_SIZE, progress=False,
+                   seed=DEFAULT_SEED, counter_based=False, metrics=None):
+    """Generate, corrupt and write record ids start_id..stop_id-1 chunk by chunk
     
-    print("Step 1: Generating clean baseline data...")
-    for i in range(num_records):
-        if i % 10000 == 0:
-            print(f"  Generated {i} clean records...")
-        clean_records.append(generate_base_record(i))
-    
-    print("Step 2: Creating messy version with targeted corruption...")
-    for i, record in enumerate(clean_records):
-        if i % 10000 == 0:
-            print(f"  Processed {i} records for corruption...")
-        
-        corrupted_record, was_corrupted = apply_targeted_corruption(record, i, tracker)
-        messy_records.append(corrupted_record)
-    
-    print("Step 3: Applying CSV formatting issues...")
-    messy_records = apply_csv_formatting_issues(messy_records, tracker)
-    
-    # Write clean file
-    print("Step 4: Writing clean baseline file...")
-    clean_filename = 'healthcare_survey_clean_baseline.csv'
-    with open(clean_filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(list(SCHEMA.keys()))  # Clean header
-        writer.writerows(clean_records)
-    
-    # Write messy file
-    print("Step 5: Writing messy test file...")
-    messy_filename = 'healthcare_survey_messy_test.csv' 
-    with open(messy_filename, 'w', newline='', encoding='utf-8') as csvfile:
-        # Write potentially problematic header
-        header_variation = random.choice([
-            list(SCHEMA.keys()),  # Normal
-            list(SCHEMA.keys()) + ['extra_col'],  # Extra column
-            [col.upper() for col in SCHEMA.keys()],  # Case issues
-        ])
-        csvfile.write(','.join(header_variation) + '\n')
+    Only one chunk of clean and messy records is alive at a time, so memory use
+    does not grow with the number of records. Clean rows go to clean_writer
+    (see open_clean_writer); messy rows are appended to the already open
+    messy_file after its header. With counter_based (numpy engine only) each
+    record's values come from (seed, record id) alone, so output does not
+    depend on chunk size or sharding. Stage times are added to metrics if given.
+    """
+    if metrics is None:
+        metrics = GenerationMetrics()
+    for chunk_start in range(start_id, stop_id, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, stop_id)
+        if progress:
+            print(f"  Processed {chunk_start - start_id} records...")
         
-        # Write messy records
-        for record in messy_records:
-            try:
-                row_str = ','.join([str(x) if x is not None else '' for x in record])
-                csvfile.write(row_str + '\n')
-            except:
-                # Handle encoding issues gracefully
-                safe_row = [str(x).encode('utf-8', errors='ignore').decode('utf-8') 
-                           if x is not None else '' for x in record]
-                csvfile.write(','.join(safe_row) + '\n')
+        if engine == 'numpy':
+            rngs = stage_generators(rng, seed, chunk_start, counter_based)
+            batch, clean_records, messy_records = generate_records_chunk(
+                chunk_start, chunk_stop, tracker, rngs, reference_time, metrics)
+        elif engine == 'python':
+            batch = None
+            num_records = chunk_stop - chunk_start
+            with metrics.stage('base_generation', num_records):
+                clean_records = [generate_base_record(i) for i in range(chunk_start, chunk_stop)]
+            with metrics.stage('targeted_corruption', num_records):
+                messy_records = []
+                for i, record in enumerate(clean_records, chunk_start):
+                    corrupted_record, was_corrupted = apply_targeted_corruption(record, i, tracker)
+                    messy_records.append(corrupted_record)
+            with metrics.stage('csv_formatting', num_records):
+                messy_records = apply_csv_formatting_issues(messy_records, tracker, chunk_start)
+        else:
+            raise ValueError(f"Unknown engine: {engine}")
         
-        # Add a few completely malformed rows for extreme testing
-        malformed_rows = [
-            ',,,,malformed,row,with,issues',
-            '"unclosed quote field, causing issues',
-            'field1,field2,"field with\nmultiple\nlines",field4',
-        ]
-        for row in malformed_rows:
-            csvfile.write(row + '\n')
-            tracker.add_issue('malformed', 'csv_structure', 'entire_row', 'valid_csv', row)
-    
-    # Save detailed issue report
-    print("Step 6: Generating data quality report...")
-    tracker.save_report('data_quality_issues_report.json')
-    
-    # Print summary
+        with metrics.stage('clean_write', len(clean_records)):
+            clean_writer.write_chunk(clean_records, batch)
+        with metrics.stage('messy_write', len(messy_records)):
+            write_messy_records(messy_file, messy_records)
+
+def generate_shard(shard_index, start_id, stop_id, seed, reference_time, messy_header,
+                   clean_format='csv', partition_by=None, issue_log=ISSUE_LOG_FILENAME,
+                   counter_based=False, compression=None, compress_workers=None, header=True):
+    """Generate, corrupt and write record ids start_id..stop_id-1 as one shard
+    
+    The shard's random state is derived only from (seed, shard_index), so the
+    same seed and shard layout always produce byte-identical part files
+    (with counter_based, from (seed, record id), independent of the layout).
+    header=False writes the part files without headers, ready to be appended
+    to the first part. Returns the part file names, the shard's closed
+    tracker and its GenerationMetrics.
+    """
+    seed_seq = np.random.SeedSequence(seed, spawn_key=(shard_index,))
+    rng = np.random.default_rng(seed_seq)
+    random.seed(int(seed_seq.generate_state(1)[0]))
+    tracker = DataQualityTracker(part_filename(issue_log, shard_index))
+    metrics = GenerationMetrics()
+    
+    clean_writer = open_clean_writer(clean_format, partition_by, shard_index,
+                                     compression, header, compress_workers)
+    messy_part = output_filename(part_filename(MESSY_FILENAME, shard_index), compression)
+    try:
+        with open_output(messy_part, compression, workers=compress_workers) as messy_file:
+            if header:
+                messy_file.write(','.join(messy_header) + '\n')
+            stream_records(start_id, stop_id, tracker, clean_writer, messy_file,
+                           rng=rng, reference_time=reference_time, seed=seed,
+                           counter_based=counter_based, metrics=metrics)
+    finally:
+        with metrics.stage('clean_write'):
+            clean_writer.close()
+        tracker.close()
+    
+    return clean_writer.filename, messy_part, tracker, metrics
+
+def _generate_shard_task(task):
+    return generate_shard(*task)
+
+def merge_part_files(part_files, filename):
+    """Concatenate part files into one file and remove the parts
+    
+    Only the first part has a header. Byte concatenation also works for
+    compressed parts, whose blocks are independent gzip members, bz2 streams
+    or zstd frames.
+    """
+    with open(filename, 'wb') as merged:
+        for part in part_files:
+            with open(part, 'rb') as f:
+                shutil.copyfileobj(f, merged)
+            os.remove(part)
+
+def generate_sharded_data(num_records, workers, seed=DEFAULT_SEED, reference_time=None,
+                          merge_output=True, clean_format='csv', partition_by=None,
+                          issue_log=ISSUE_LOG_FILENAME, counter_based=False, compression=None,
+                          compress_workers=None, metrics=None):
+    """Generate clean and messy data in parallel, one shard per worker process
+    
+    Record ids are split into `workers` contiguous shards. With merge_output
+    the parts are concatenated in shard order into the usual two files;
+    otherwise each shard's part files (each with a header) are kept.
+    A Parquet clean baseline is always one dataset shared by all shards.
+    With compression, each shard compresses its blocks on compress_workers
+    threads (default: its share of the CPUs). The shards' stage timings are
+    merged into metrics if given. For a fixed seed, worker count and reference_time the output is
+    byte-identical.
+    """
+    if metrics is None:
+        metrics = GenerationMetrics()
+    run_start = time.perf_counter()
+    if reference_time is None:
+        reference_time = datetime.datetime.now()
+    if clean_format == 'parquet':
+        reset_parquet_output()
+    messy_header = choose_messy_header(random.Random(seed))
+    if compress_workers is None:
+        compress_workers = max(1, (os.cpu_count() or 1) // workers)
+    tasks = [(shard_index, start, stop, seed, reference_time, messy_header,
+              clean_format, partition_by, issue_log, counter_based, compression,
+              compress_workers, shard_index == 0 or not merge_output)
+             for shard_index, (start, stop) in enumerate(shard_bounds(num_records, workers))]
+    
+    print(f"Generating {num_records} records in {workers} shards...")
+    with multiprocessing.Pool(workers) as pool:
+        results = pool.map(_generate_shard_task, tasks)
+    
+    # Merge shard trackers in shard order so the report is deterministic;
+    # this process logs its own issues (malformed rows) as one more part
+    tracker = DataQualityTracker(part_filename(issue_log, workers))
+    for _, _, shard_tracker, shard_metrics in results:
+        tracker.merge(shard_tracker)
+        metrics.merge(shard_metrics)
+    
+    clean_parts = [result[0] for result in results]
+    messy_parts = [result[1] for result in results]
+    if clean_format == 'parquet':
+        clean_output = CLEAN_PARQUET_PATH
+    elif merge_output:
+        clean_output = output_filename(CLEAN_FILENAME, compression)
+        with metrics.stage('clean_write'):
+            merge_part_files(clean_parts, clean_output)
+    else:
+        clean_output = clean_parts
+    if merge_output:
+        print("Merging part files...")
+        messy_output = output_filename(MESSY_FILENAME, compression)
+        with metrics.stage('messy_write'):
+            merge_part_files(messy_parts, messy_output)
+    else:
+        messy_output = messy_parts
+    
+    # Malformed rows go at the end of the messy output
+    with metrics.stage('messy_write', len(MALFORMED_ROWS)):
+        with open_output(messy_output if merge_output else messy_parts[-1], compression, 'a') as csvfile:
+            for row in MALFORMED_ROWS:
+                csvfile.write(row + '\n')
+                tracker.add_issue('malformed', 'csv_structure', 'entire_row', 'valid_csv', row)
+    
+    with metrics.stage('report_save', tracker.total_issues):
+        tracker.close()
+        merge_issue_logs([part_filename(issue_log, shard_index) for shard_index in range(workers + 1)],
+                         issue_log)
+        tracker.issue_log = issue_log
+        tracker.save_report(REPORT_FILENAME)
+    metrics.num_records = num_records
+    metrics.total_seconds = time.perf_counter() - run_start
+    print_generation_summary(num_records, tracker, clean_output, messy_output)
+    return clean_output, messy_output
+
+def print_generation_summary(num_records, tracker, clean_filename, messy_filename):
+    """Print the end-of-run summary"""
     print("\n" + "="*60)
     print("🎉 DATA GENERATION COMPLETE!")
     print("="*60)
     print(f"📁 Clean baseline file: {clean_filename}")
     print(f"📁 Messy test file: {messy_filename}")
-    print(f"📁 Issue report: data_quality_issues_report.json")
+    print(f"📁 Issue report: {REPORT_FILENAME}")
+    print(f"📁 Issue log: {tracker.issue_log}")
     print(f"\n📊 SUMMARY:")
     print(f"  • Total records: {num_records:,}")
-    print(f"  • Records with issues: {len(tracker.issues):,} ({len(tracker.issues)/num_records*100:.1f}%)")
-    print(f"  • Clean records: {num_records - len(tracker.issues):,} ({(num_records - len(tracker.issues))/num_records*100:.1f}%)")
+    records_with_issues = tracker.total_records_with_issues
+    print(f"  • Records with issues: {records_with_issues:,} ({records_with_issues/num_records*100:.1f}%)")
+    print(f"  • Clean records: {num_records - records_with_issues:,} ({(num_records - records_with_issues)/num_records*100:.1f}%)")
     
     print(f"\n🔍 ISSUE BREAKDOWN:")
     for issue_type, count in sorted(tracker.issue_counts.items()):
@@ -360,7 +1330,79 @@ def generate_healthcare_data(num_records=50000):
     
     print(f"\n✅ Use the clean file as your baseline for comparison")
     print(f"✅ Use the messy file to test your ETL validation")
-    print(f"✅ Check the JSON report for detailed issue tracking")
+    print(f"✅ Check the issue log for detailed issue tracking")
+
+def generate_healthcare_data(num_records=50000, engine='python', chunk_size=BATCH_SIZE,
+                             clean_format='csv', partition_by=None, issue_log=ISSUE_LOG_FILENAME,
+                             seed=DEFAULT_SEED, reference_time=None, counter_based=False,
+                             compression=None, compress_workers=None, metrics=None):
+    """Generate both clean and messy healthcare survey data
+    
+    engine='python' builds records one at a time with generate_base_record;
+    engine='numpy' builds them with generate_base_records_batch, which is much
+    faster for large files. Records are generated, corrupted and written
+    chunk_size at a time, so peak memory does not depend on num_records.
+    clean_format='parquet' writes the clean baseline as a typed Parquet
+    dataset, optionally partitioned by the partition_by column.
+    Every issue is streamed to issue_log (.jsonl or .parquet); the report
+    file only holds the summary. counter_based (numpy engine) makes every
+    record reproducible on its own with get_record(i, seed, reference_time).
+    compression ('gzip', 'bz2' or 'zstd') compresses the CSV outputs in
+    blocks on compress_workers threads (default: one per CPU).
+    Per-stage timings are recorded in metrics (a GenerationMetrics) if given.
+    """
+    
+    print(f"Generating {num_records} healthcare survey records...")
+    if metrics is None:
+        metrics = GenerationMetrics()
+    run_start = time.perf_counter()
+    
+    tracker = DataQualityTracker(issue_log)
+    messy_filename = output_filename(MESSY_FILENAME, compression)
+    
+    if counter_based and engine != 'numpy':
+        raise ValueError("counter_based generation requires engine='numpy'")
+    rng = np.random.default_rng(seed)
+    if reference_time is None:
+        reference_time = datetime.datetime.now()
+    
+    if clean_format == 'parquet':
+        reset_parquet_output()
+    clean_writer = open_clean_writer(clean_format, partition_by, compression=compression,
+                                     compress_workers=compress_workers)
+    clean_filename = clean_writer.filename
+    
+    with open_output(messy_filename, compression, workers=compress_workers) as messy_file:
+        # Write potentially problematic header (seeded like sharded runs for the numpy engine)
+        header_variation = choose_messy_header(random.Random(seed) if engine == 'numpy' else random)
+        messy_file.write(','.join(header_variation) + '\n')
+        
+        print(f"Step 1: Generating, corrupting and writing records in chunks of {chunk_size}...")
+        try:
+            stream_records(0, num_records, tracker, clean_writer, messy_file, engine=engine,
+                           rng=rng, reference_time=reference_time, chunk_size=chunk_size,
+                           progress=True, seed=seed, counter_based=counter_based,
+                           metrics=metrics)
+        finally:
+            with metrics.stage('clean_write'):
+                clean_writer.close()
+        
+        # Add a few completely malformed rows for extreme testing
+        print("Step 2: Appending malformed rows to messy test file...")
+        with metrics.stage('messy_write', len(MALFORMED_ROWS)):
+            for row in MALFORMED_ROWS:
+                messy_file.write(row + '\n')
+                tracker.add_issue('malformed', 'csv_structure', 'entire_row', 'valid_csv', row)
+            messy_file.close()  # Include the final flush (and compression) in messy_write
+    
+    # Flush the issue log and save the summary report
+    print("Step 3: Generating data quality report...")
+    with metrics.stage('report_save', tracker.total_issues):
+        tracker.save_report(REPORT_FILENAME)
+    metrics.num_records = num_records
+    metrics.total_seconds = time.perf_counter() - run_start
+    
+    print_generation_summary(num_records, tracker, clean_filename, messy_filename)
     
     return clean_filename, messy_filename
 
@@ -368,8 +1410,59 @@ if __name__ == "__main__":
     # Install required packages first:
     # pip install faker numpy pandas
     
+    parser = argparse.ArgumentParser(description='Generate clean and messy healthcare survey data')
+    parser.add_argument('--records', type=int, default=50000, help='Number of records to generate')
+    parser.add_argument('--engine', choices=['python', 'numpy'], default='python',
+                        help='Record generator: per-record Python or batched NumPy')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Generate in this many parallel shards (always uses the NumPy engine)')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED,
+                        help='Base seed for the NumPy engine; each shard derives its own seed')
+    parser.add_argument('--reference-time',
+                        help='Fixed "now" as YYYY-MM-DD HH:MM:SS, needed for byte-identical output')
+    parser.add_argument('--counter-based', action='store_true',
+                        help='Derive every record only from (seed, record id) so get_record(i) can rebuild it')
+    parser.add_argument('--part-files', action='store_true',
+                        help='Keep one clean/messy file per shard instead of merging them')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_SIZE,
+                        help='Records generated, corrupted and written per chunk')
+    parser.add_argument('--clean-format', choices=['csv', 'parquet'], default='csv',
+                        help='Format of the clean baseline (parquet needs pyarrow)')
+    parser.add_argument('--partition-by', choices=list(SCHEMA.keys()),
+                        help='Partition the Parquet baseline by this column (DateTime columns by day)')
+    parser.add_argument('--issue-log', default=ISSUE_LOG_FILENAME,
+                        help='Per-issue log streamed during generation (.jsonl or .parquet)')
+    parser.add_argument('--compression', choices=list(COMPRESSION_EXTENSIONS),
+                        help='Compress the CSV outputs (zstd needs the zstandard package)')
+    parser.add_argument('--compress-workers', type=int,
+                        help='Compression threads per output file (default: one per CPU, split across shards)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print time and rows/sec for each generation stage')
+    args = parser.parse_args()
+    
+    reference_time = None
+    if args.reference_time:
+        reference_time = datetime.datetime.strptime(args.reference_time, TIMESTAMP_FORMAT)
+    
+    metrics = GenerationMetrics()
     try:
-        clean_file, messy_file = generate_healthcare_data(50000)
+        if args.workers > 1:
+            clean_file, messy_file = generate_sharded_data(
+                args.records, args.workers, seed=args.seed,
+                reference_time=reference_time, merge_output=not args.part_files,
+                clean_format=args.clean_format, partition_by=args.partition_by,
+                issue_log=args.issue_log, counter_based=args.counter_based,
+                compression=args.compression, compress_workers=args.compress_workers,
+                metrics=metrics)
+        else:
+            clean_file, messy_file = generate_healthcare_data(
+                args.records, engine=args.engine, chunk_size=args.chunk_size,
+                clean_format=args.clean_format, partition_by=args.partition_by,
+                issue_log=args.issue_log, seed=args.seed, reference_time=reference_time,
+                counter_based=args.counter_based, compression=args.compression,
+                compress_workers=args.compress_workers, metrics=metrics)
+        if args.profile:
+            metrics.print_report()
         print(f"\n🚀 Ready for Databricks ETL testing!")
         
     except ImportError as e:
@@ -6,35 +6,1928 @@ No Spark dependency required - uses pandas and standard library
 """
 
 import pandas as pd
+import numpy as np
 import csv
 import argparse
 import sys
 import json
 from typing import Optional, List, Dict, Any, Union
 from collections import Counter, defaultdict
+from datetime import datetime
+import collections
+import bisect
+import bz2
+import gzip
+import mmap
+import multiprocessing
 import chardet
+import codecs
+import contextlib
+import glob
+import hashlib
+import io
 import os
+import pickle
+import shutil
+import tempfile
+import zipfile
+import math
+import re
+import statistics
+import warnings
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Single-pass scanning: the file is read once, in blocks of SCAN_BLOCK_SIZE bytes,
+# split into logical records and fed to every check SCAN_CHUNK_RECORDS at a time
+SCAN_BLOCK_SIZE = 8 * 1024 * 1024
+SCAN_CHUNK_RECORDS = 50000
+MAX_RECORD_LINES = 100  # A quoted field spanning more lines is treated as an unterminated quote
+LONG_FIELD_LENGTH = 1000  # BigQuery-style long field limit
+MAX_FRAME_WIDTH_FACTOR = 2  # Field-level checks see at most this many times the expected field count per record
+MAX_EXAMPLES = 10  # Example rows kept per check
+PARALLEL_MIN_RANGE_SIZE = 16 * 1024 * 1024  # Smallest byte range worth a parallel task
+MAX_LINE_RANGES = 10000  # Line ranges kept per issue type before neighbouring ranges are coalesced
+
+# Batch mode: files picked up from a directory, and severities from worst to best
+BATCH_EXTENSIONS = ('.csv', '.tsv', '.txt')
+SEVERITY_LEVELS = ['error', 'critical', 'warning', 'info', 'ok']
+
+# Encoding detection: byte order marks, and bytes of failing lines passed to chardet
+BYTE_ORDER_MARKS = [(codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF32_LE, 'utf-32'), (codecs.BOM_UTF32_BE, 'utf-32'),
+                    (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16')]
+ENCODING_SAMPLE_SIZE = 10000
+MIN_ENCODING_CONFIDENCE = 0.5  # Below this, non-UTF-8 lines are read as latin-1 (which decodes every byte)
+
+# Dialect sniffing: delimiters tried, and the confidence below which a warning is printed
+DELIMITER_CANDIDATES = [',', ';', '\t', '|']
+MIN_DIALECT_CONFIDENCE = 0.5
+
+# Scan cache: bytes hashed at the head of a file and before the end of its last scan
+CACHE_HASH_BYTES = 64 * 1024
+CACHE_VERSION = 1  # Bump when cached check state changes shape
+
+# Compressed inputs: streamed through open_input; archive.zip::member.csv names one member of a zip
+COMPRESSED_SUFFIXES = ('.gz', '.bz2', '.zip')
+ZIP_MEMBER_SEPARATOR = '::'
+
+# Quarantine mode: the scan also splits the records into clean, repaired and rejected outputs
+NULL_TOKENS = ['NULL', 'null', 'N/A', 'None', 'undefined']  # Repaired to empty fields
+CLEAN_SUFFIX = '_clean'
+REPAIRED_SUFFIX = '_repaired'
+REJECTS_SUFFIX = '_rejects.csv'
+REJECT_COLUMNS = ['line_num', 'reason', 'raw_record']
+
+def input_path(file_path: str) -> str:
+    """The file on disk for an input path (the archive for a zip member)"""
+    return file_path.split(ZIP_MEMBER_SEPARATOR, 1)[0]
+
+def is_compressed(file_path: str) -> bool:
+    return input_path(file_path).lower().endswith(COMPRESSED_SUFFIXES)
+
+def zip_members(archive: str) -> List[str]:
+    """Input paths of the files in a zip archive"""
+    with zipfile.ZipFile(archive) as zf:
+        return [f'{archive}{ZIP_MEMBER_SEPARATOR}{info.filename}' for info in zf.infolist() if not info.is_dir()]
+
+def open_input(file_path: str, mode: str = 'rb', encoding: str = None, errors: str = None):
+    """Open a plain, .gz, .bz2 or .zip input for streaming reads, in mode 'rb' or 'r'
+    
+    A zip archive must hold a single file unless the member is named
+    (archive.zip::member.csv). Compressed inputs cannot seek.
+    """
+    path, _, member = file_path.partition(ZIP_MEMBER_SEPARATOR)
+    lower = path.lower()
+    if lower.endswith('.gz'):
+        f = gzip.open(path, 'rb')
+    elif lower.endswith('.bz2'):
+        f = bz2.open(path, 'rb')
+    elif lower.endswith('.zip'):
+        if not member:
+            members = zip_members(path)
+            if len(members) != 1:
+                raise ValueError(f"{path} holds {len(members)} files; name one as "
+                                 f"{path}{ZIP_MEMBER_SEPARATOR}<member>")
+            member = members[0].split(ZIP_MEMBER_SEPARATOR, 1)[1]
+        with zipfile.ZipFile(path) as zf:
+            f = zf.open(member)  # Keeps the archive file open until f is closed
+    else:
+        f = open(path, 'rb')
+    if 'b' in mode:
+        return f
+    return io.TextIOWrapper(f, encoding=encoding, errors=errors)
+
+def input_stop(file_path: str) -> int:
+    """End offset for a scan of the whole input (compressed sizes say nothing about the data)"""
+    return sys.maxsize if is_compressed(file_path) else os.path.getsize(file_path)
+
+def iter_record_chunks(f, quote_char: str = '"', chunk_records: int = SCAN_CHUNK_RECORDS,
+                       block_size: int = SCAN_BLOCK_SIZE, max_record_lines: int = MAX_RECORD_LINES,
+                       line_num: int = 1):
+    """Split a binary file into logical CSV records, chunk_records at a time
+    
+    A record ends at a newline outside quotes, so quoted fields with embedded
+    line breaks stay in one record. A record whose quotes are still open
+    after max_record_lines lines (or at end of file) is emitted as its first
+    line only, flagged as unterminated, and scanning resumes on the next line.
+    Yields (line_nums, offsets, records, unterminated) lists, where line_nums
+    are 1-based first physical lines and offsets byte offsets in the file.
+    Reading starts at the file's current position, which is line line_num.
+    """
+    quote = quote_char.encode()
+    offset = f.tell()
+    partial = b''
+    open_parts = []  # (line_num, offset, line) of the record being assembled
+    open_quotes = 0
+    chunk = ([], [], [], [])
+    
+    def emit(num, start, record, unterminated=False):
+        chunk[0].append(num)
+        chunk[1].append(start)
+        chunk[2].append(record.rstrip(b'\r'))
+        chunk[3].append(unterminated)
+    
+    def feed(queue):
+        nonlocal open_parts, open_quotes
+        while queue:
+            part = queue.popleft()
+            if open_parts:
+                open_parts.append(part)
+                open_quotes += part[2].count(quote)
+            else:
+                quotes = part[2].count(quote)
+                if quotes % 2 == 0:
+                    emit(*part)
+                    continue
+                open_parts = [part]
+                open_quotes = quotes
+            if open_quotes % 2 == 0:
+                emit(open_parts[0][0], open_parts[0][1], b'\n'.join(p[2] for p in open_parts))
+                open_parts = []
+            elif len(open_parts) > max_record_lines:
+                release_open_record(queue)
+    
+    def release_open_record(queue):
+        # Give up on the open quote: flag its first line and rescan the rest
+        nonlocal open_parts, open_quotes
+        first, rest = open_parts[0], open_parts[1:]
+        open_parts = []
+        open_quotes = 0
+        emit(*first, unterminated=True)
+        queue.extendleft(reversed(rest))
+    
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        lines = (partial + block).split(b'\n')
+        partial = lines.pop()
+        queue = collections.deque()
+        for line in lines:
+            queue.append((line_num, offset, line))
+            line_num += 1
+            offset += len(line) + 1
+        feed(queue)
+        if len(chunk[0]) >= chunk_records:
+            yield chunk
+            chunk = ([], [], [], [])
+    
+    queue = collections.deque([(line_num, offset, partial)] if partial else [])
+    feed(queue)
+    while open_parts:
+        queue = collections.deque()
+        release_open_record(queue)
+        feed(queue)
+    if chunk[0]:
+        yield chunk
+
+def iter_record_boundaries(buffer, delimiter: str = ',', quote_char: str = '"', start: int = 0,
+                           line_num: int = 1, block_size: int = SCAN_BLOCK_SIZE,
+                           max_record_lines: int = MAX_RECORD_LINES):
+    """Record boundaries and field counts of CSV bytes (e.g. an mmap of the file), without decoding them
+    
+    Same record rules as iter_record_chunks, but quote state is tracked on
+    the raw bytes with numpy, block_size bytes at a time: newlines and
+    delimiters outside quotes end records and fields. No Python object is
+    created per record. Yields (offsets, ends, line_nums, field_counts,
+    unterminated) arrays per block: start offset, end offset (before the
+    line break), first line, number of fields (0 for an empty record) and
+    whether the record is an unterminated quote, which covers only its
+    first line. Scanning starts at offset start, which is line line_num.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    size = len(data)
+    delimiter, quote = ord(delimiter), ord(quote_char)
+    pos = record_start = start
+    record_line = line_num
+    parity = delims = lines = 0  # State of the record being assembled
+    
+    while pos < size:
+        block_end = min(pos + block_size, size)
+        block = data[pos:block_end]
+        quotes = block == quote
+        # uint8 wraps at 256, which keeps the parity
+        outside = (np.cumsum(quotes, dtype=np.uint8) + parity) & 1 == 0
+        newlines = np.flatnonzero(block == 10)
+        ends = newlines[outside[newlines]]
+        delimiter_positions = np.flatnonzero((block == delimiter) & outside)
+        
+        n = len(ends)
+        record_delims = np.bincount(np.searchsorted(ends, delimiter_positions), minlength=n + 1)
+        record_delims[0] += delims
+        end_ranks = np.searchsorted(newlines, ends)
+        start_ranks = np.concatenate(([0], end_ranks[:-1] + 1))
+        inner_lines = end_ranks - start_ranks
+        inner_lines[0:1] += lines
+        block_line = record_line + lines
+        starts = np.concatenate(([record_start], pos + ends[:-1] + 1))[:n]
+        line_nums = np.concatenate(([record_line], block_line + end_ranks[:-1] + 1))[:n]
+        
+        tail_start = pos + ends[-1] + 1 if n else record_start
+        tail_line = block_line + end_ranks[-1] + 1 if n else record_line
+        tail_lines = len(newlines) - (end_ranks[-1] + 1 if n else 0) + (0 if n else lines)
+        tail_parity = (parity + int(quotes.sum())) & 1
+        at_eof = block_end == size
+        
+        overlong = np.flatnonzero(inner_lines > max_record_lines)
+        if len(overlong):
+            cut = overlong[0]
+        elif tail_lines > max_record_lines or (at_eof and tail_parity and tail_start < size):
+            cut = n  # The open record at the end of the block
+        else:
+            cut = None
+        
+        keep = n if cut is None else cut
+        record_ends = pos + ends[:keep]
+        if keep:
+            yield record_fields(data, starts[:keep], record_ends, line_nums[:keep],
+                                record_delims[:keep], np.zeros(keep, dtype=bool), delimiter)
+        
+        if cut is not None:
+            # Give up on the open quote: flag its first line and rescan the rest
+            bad_start = starts[cut] if cut < n else tail_start
+            bad_line = line_nums[cut] if cut < n else tail_line
+            first_newline = buffer.find(b'\n', bad_start)
+            bad_end = size if first_newline < 0 else first_newline
+            yield record_fields(data, np.array([bad_start]), np.array([bad_end]), np.array([bad_line]),
+                                None, np.ones(1, dtype=bool), delimiter)
+            pos = record_start = bad_end + 1
+            record_line = bad_line + 1
+            parity = delims = lines = 0
+            continue
+        
+        pos = block_end
+        record_start, record_line = tail_start, tail_line
+        parity, delims, lines = tail_parity, int(record_delims[n]), tail_lines
+        if at_eof and record_start < size:
+            # Last record without a trailing newline
+            yield record_fields(data, np.array([record_start]), np.array([size]), np.array([record_line]),
+                                np.array([delims]), np.zeros(1, dtype=bool), delimiter)
+
+def record_fields(data: np.ndarray, starts: np.ndarray, ends: np.ndarray, line_nums: np.ndarray,
+                  delims: Optional[np.ndarray], unterminated: np.ndarray, delimiter: int) -> tuple:
+    """One block's output of iter_record_boundaries
+    
+    Drops the carriage return of CRLF endings and gives blank records 0
+    fields. Only records without a delimiter are looked at byte by byte.
+    delims=None counts the delimiters plainly (for unterminated records).
+    """
+    ends = ends - ((ends > starts) & (data[np.maximum(ends - 1, 0)] == 13))
+    if delims is None:
+        delims = np.array([np.count_nonzero(data[s:e] == delimiter) for s, e in zip(starts, ends)])
+    field_counts = delims.astype(np.int64) + 1
+    for k in np.flatnonzero(delims == 0):
+        if not data[starts[k]:ends[k]].tobytes().strip():
+            field_counts[k] = 0
+    return starts.astype(np.int64), ends.astype(np.int64), line_nums.astype(np.int64), field_counts, unterminated
+
+class ScanContext:
+    """File-level facts shared by the checks of one scan (picklable, for parallel workers)"""
+    def __init__(self, file_path: str, encoding: str, delimiter: str, quote_char: str = '"',
+                 has_header: bool = True, expected_schema: Optional[Dict[str, str]] = None):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.delimiter = delimiter
+        self.quote_char = quote_char
+        self.has_header = has_header
+        self.expected_schema = expected_schema
+        self.headers = None
+        self.header_line = None
+        self.header_offset = None
+        self.expected_field_count = None
+        self.total_lines = 0
+        self.total_records = 0
+        self.last_unterminated_line = None  # Line of the last record flagged as an unterminated quote
+        self.encoding_report = None  # Utf8Scan of the file, if the encoding was detected
+
+class RecordChunk:
+    """One chunk of decoded and parsed records, shared by all checks
+    
+    Every record is parsed once with a strict csv.reader. Records it rejects
+    (and unterminated ones) get an entry in parse_errors and fall back to a
+    plain split on the delimiter for their fields. Field-level checks share
+    one set of vectorized issue masks over the non-empty records (masks()).
+    """
+    def __init__(self, line_nums: List[int], offsets: List[int], raw_records: List[bytes],
+                 unterminated: List[bool], context: ScanContext):
+        self._frame = None
+        self._overflow = None
+        self._masks = None
+        self.line_nums = line_nums
+        self.offsets = offsets
+        self.raw_records = raw_records
+        self.texts = [record.decode(context.encoding, errors='replace') for record in raw_records]
+        self.empty = [not text.strip() for text in self.texts]
+        self.parse_errors = {}
+        self.fields = [None] * len(self.texts)
+        
+        parseable = []
+        for i, text in enumerate(self.texts):
+            if self.empty[i]:
+                self.fields[i] = []
+            elif unterminated[i]:
+                self.parse_errors[i] = 'unterminated quoted field'
+                self.fields[i] = text.split(context.delimiter)
+            else:
+                parseable.append(i)
+        
+        reader = csv.reader((self.texts[i] for i in parseable), delimiter=context.delimiter,
+                            quotechar=context.quote_char, strict=True)
+        for i in parseable:
+            try:
+                self.fields[i] = next(reader)
+            except csv.Error as e:
+                self.parse_errors[i] = str(e)
+                self.fields[i] = self.texts[i].split(context.delimiter)
+        self.parse_errors = dict(sorted(self.parse_errors.items()))
+    
+    def content(self, i: int) -> str:
+        text = self.texts[i]
+        return text[:200] + ('...' if len(text) > 200 else '')
+    
+    def frame(self, context: ScanContext) -> tuple:
+        """(rows, well_formed, DataFrame) for the non-empty records
+        
+        rows are the chunk indexes of the DataFrame's rows and well_formed marks
+        those that parsed cleanly with the expected field count. Columns are
+        field positions; short records are padded with ''. Fields past
+        MAX_FRAME_WIDTH_FACTOR times the expected field count are kept in a
+        separate frame of just those records, so one runaway record (e.g. an
+        unterminated quote) cannot widen the frame of the whole chunk.
+        """
+        if self._frame is None:
+            rows = [i for i in range(len(self.fields)) if not self.empty[i]]
+            well_formed = np.array([i not in self.parse_errors and len(self.fields[i]) == context.expected_field_count
+                                    for i in rows], dtype=bool)
+            cap = MAX_FRAME_WIDTH_FACTOR * context.expected_field_count if context.expected_field_count else None
+            frame = pd.DataFrame([self.fields[i][:cap] for i in rows])
+            width = max(frame.shape[1], context.expected_field_count or 0)
+            frame = frame.reindex(columns=range(width)).fillna('')
+            self._frame = (rows, well_formed, frame)
+            
+            overflow = [k for k, i in enumerate(rows) if cap and len(self.fields[i]) > cap]
+            if overflow:
+                self._overflow = pd.DataFrame([self.fields[rows[k]][cap:] for k in overflow], index=overflow)
+                self._overflow.columns = self._overflow.columns + cap
+        return self._frame
+    
+    def masks(self, context: ScanContext) -> Dict[str, pd.DataFrame]:
+        """issue_masks of frame(), computed once per chunk
+        
+        Overflow fields past the frame's width add only the columns where
+        some record has the issue.
+        """
+        if self._masks is None:
+            frame = self.frame(context)[2]
+            self._masks = issue_masks(frame)
+            if self._overflow is not None:
+                for name, mask in issue_masks(self._overflow.fillna('')).items():
+                    mask = mask & self._overflow.notna()
+                    mask = mask.loc[:, mask.any()].reindex(index=frame.index, fill_value=False)
+                    self._masks[name] = pd.concat([self._masks[name], mask], axis=1)
+        return self._masks
+
+class LineRanges:
+    """Line numbers as run-length encoded [first, last] ranges
+    
+    Past max_ranges ranges, neighbouring pairs are coalesced: the ranges then
+    also cover some lines without the issue and exact turns False, but
+    memory stays bounded. count is always exact.
+    """
+    def __init__(self, max_ranges: int = MAX_LINE_RANGES):
+        self.max_ranges = max_ranges
+        self.ranges = []
+        self.count = 0
+        self.exact = True
+    
+    def add(self, line_num: int) -> None:
+        """Add a line number at or after the last one added"""
+        self.count += 1
+        if self.ranges and line_num <= self.ranges[-1][1] + 1:
+            self.ranges[-1][1] = max(self.ranges[-1][1], line_num)
+        else:
+            self.ranges.append([line_num, line_num])
+            if len(self.ranges) > self.max_ranges:
+                self._coalesce()
+    
+    def extend(self, line_nums) -> None:
+        """Add increasing line numbers (a list or array) at or after the last one added"""
+        line_nums = np.asarray(line_nums, dtype=np.int64)
+        if not len(line_nums):
+            return
+        breaks = np.flatnonzero(np.diff(line_nums) != 1) + 1
+        starts = line_nums[np.concatenate(([0], breaks))].tolist()
+        ends = line_nums[np.concatenate((breaks - 1, [len(line_nums) - 1]))].tolist()
+        self.add(starts[0])
+        self.ranges[-1][1] = max(self.ranges[-1][1], ends[0])
+        self.ranges.extend([first, last] for first, last in zip(starts[1:], ends[1:]))
+        self.count += len(line_nums) - 1
+        while len(self.ranges) > self.max_ranges:
+            self._coalesce()
+    
+    def merge(self, other: 'LineRanges') -> None:
+        """Add the lines of another LineRanges (with no line in common)"""
+        ranges = sorted(self.ranges + other.ranges)
+        self.ranges = []
+        for first, last in ranges:
+            if self.ranges and first <= self.ranges[-1][1] + 1:
+                self.ranges[-1][1] = max(self.ranges[-1][1], last)
+            else:
+                self.ranges.append([first, last])
+        self.count += other.count
+        self.exact = self.exact and other.exact
+        while len(self.ranges) > self.max_ranges:
+            self._coalesce()
+    
+    def _coalesce(self) -> None:
+        self.ranges = [[self.ranges[k][0], self.ranges[min(k + 1, len(self.ranges) - 1)][1]]
+                       for k in range(0, len(self.ranges), 2)]
+        self.exact = False
+    
+    @property
+    def first(self) -> Optional[int]:
+        return self.ranges[0][0] if self.ranges else None
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {'count': self.count, 'ranges': self.ranges, 'exact': self.exact}
+
+def _example_key(line_num: int) -> int:
+    """A fixed pseudo-random 64-bit key for a line number (splitmix64)"""
+    x = (line_num + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+    return x ^ (x >> 31)
+
+class IssueLog:
+    """Bounded record of one issue type: LineRanges, counts per kind and a reservoir of examples
+    
+    The reservoir keeps the max_examples lines with the smallest
+    _example_key, a uniform sample that is the same whether the file was
+    scanned in one pass or in parallel ranges. Examples are only built
+    (make_example is only called) for lines that enter the reservoir.
+    """
+    def __init__(self, max_examples: int = MAX_EXAMPLES):
+        self.max_examples = max_examples
+        self.lines = LineRanges()
+        self.kinds = Counter()
+        self._examples = []  # (key, line_num, example)
+    
+    def add(self, line_num: int, make_example, kinds=()) -> None:
+        self.lines.add(line_num)
+        self.kinds.update(kinds)
+        key = _example_key(line_num)
+        if len(self._examples) < self.max_examples:
+            self._examples.append((key, line_num, make_example()))
+            return
+        largest = max(range(len(self._examples)), key=lambda k: self._examples[k][0])
+        if key < self._examples[largest][0]:
+            self._examples[largest] = (key, line_num, make_example())
+    
+    def merge(self, other: 'IssueLog') -> None:
+        self.lines.merge(other.lines)
+        self.kinds.update(other.kinds)
+        self._examples = sorted(self._examples + other._examples, key=lambda item: item[0])[:self.max_examples]
+    
+    @property
+    def examples(self) -> List[Dict[str, Any]]:
+        """The sampled examples in line order"""
+        return [example for key, line_num, example in sorted(self._examples, key=lambda item: item[1])]
+    
+    def __len__(self) -> int:
+        return self.lines.count
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {'count': self.lines.count, 'lines': self.lines.as_dict(), 'kinds': dict(self.kinds),
+                'examples': self.examples}
+
+class ScanCheck:
+    """A check fed every chunk of a single-pass scan (see CSVDebugger.scan_file)
+    
+    Subclasses implement process_chunk, result (a JSON-friendly dict) and
+    report (printed output). The header record is never passed to checks;
+    it is available as context.headers.
+    """
+    name = 'check'
+    
+    def process_chunk(self, chunk: RecordChunk, context: ScanContext) -> None:
+        raise NotImplementedError
+    
+    def finish(self, context: ScanContext) -> None:
+        pass
+    
+    def merge(self, other: 'ScanCheck') -> None:
+        """Append the results of the same check run on the following byte range"""
+        raise NotImplementedError
+    
+    def result(self) -> Dict[str, Any]:
+        raise NotImplementedError
+    
+    def report(self) -> None:
+        pass
+
+class RowIssueCheck(ScanCheck):
+    """Base for checks that flag rows by field: an IssueLog of the flagged
+    records, whose kinds are the columns with the issue"""
+    title = 'Row issues'
+    
+    def __init__(self):
+        self.issues = IssueLog()
+    
+    def flag(self, chunk: RecordChunk, i: int, columns: List[str]) -> None:
+        self.issues.add(chunk.line_nums[i], lambda: {'line_num': chunk.line_nums[i], 'fields': columns,
+                                                     'content': chunk.content(i)}, columns)
+    
+    def flag_mask(self, chunk: RecordChunk, context: ScanContext, rows: List[int], mask: pd.DataFrame) -> None:
+        """Flag every record with an issue in its mask row (mask rows follow rows, columns are field positions)"""
+        values = mask.to_numpy(dtype=bool)
+        columns = np.asarray(mask.columns)
+        for k in np.flatnonzero(values.any(axis=1)):
+            self.flag(chunk, rows[k], self.column_names(context, columns[values[k]].tolist()))
+    
+    def column_names(self, context: ScanContext, indexes: List[int]) -> List[str]:
+        return [column_label(context.headers, j) for j in indexes]
+    
+    def merge(self, other):
+        self.issues.merge(other.issues)
+    
+    def result(self) -> Dict[str, Any]:
+        return {'rows': self.issues.lines.as_dict(), 'column_counts': dict(self.issues.kinds),
+                'examples': self.issues.examples}
+    
+    def report(self) -> None:
+        if not self.issues:
+            return
+        print(f"\n{self.title} ({len(self.issues)} records):")
+        print("-" * 60)
+        for example in self.issues.examples:
+            print(f"Line {example['line_num']}: {example['fields']}")
+            print(f"  Content: {example['content']}")
+
+class StructureCheck(ScanCheck):
+    """Line and record counts, empty lines and the field count distribution"""
+    name = 'structure'
+    
+    def __init__(self, sample_size: int = 100):
+        self.sample_size = sample_size
+        self.field_counts = Counter()
+        self.empty_lines = LineRanges()
+        self.sample_lines = []
+        self.total_lines = 0
+        self.total_records = 0
+    
+    def process_chunk(self, chunk, context):
+        for i, fields in enumerate(chunk.fields):
+            if chunk.empty[i]:
+                self.empty_lines.add(chunk.line_nums[i])
+            else:
+                self.field_counts[len(fields)] += 1
+        if len(self.sample_lines) < self.sample_size:
+            self.sample_lines.extend(chunk.texts[:self.sample_size - len(self.sample_lines)])
+    
+    def finish(self, context):
+        self.total_lines = context.total_lines
+        self.total_records = context.total_records
+    
+    def merge(self, other):
+        self.field_counts.update(other.field_counts)
+        self.empty_lines.merge(other.empty_lines)
+        self.sample_lines.extend(other.sample_lines[:self.sample_size - len(self.sample_lines)])
+    
+    def result(self):
+        return {
+            'total_lines': self.total_lines,
+            'total_records': self.total_records,
+            'field_counts': dict(self.field_counts),
+            'empty_lines': self.empty_lines.as_dict(),
+            'sample_lines': self.sample_lines[:20]
+        }
+    
+    def report(self):
+        print(f"Total lines in file: {self.total_lines}")
+        print(f"Total records: {self.total_records}")
+        print(f"Field count distribution: {dict(self.field_counts.most_common(10))}")
+        print(f"Empty lines: {len(self.empty_lines)}")
+
+class FieldCountCheck(ScanCheck):
+    """Records whose field count differs from the header's (an IssueLog whose kinds are the actual counts)"""
+    name = 'field_count'
+    
+    def __init__(self):
+        self.valid_records = 0
+        self.field_count_issues = IssueLog()
+    
+    def process_chunk(self, chunk, context):
+        expected = context.expected_field_count
+        for i, fields in enumerate(chunk.fields):
+            if chunk.empty[i] or i in chunk.parse_errors:
+                continue
+            if len(fields) == expected:
+                self.valid_records += 1
+            else:
+                self.field_count_issues.add(chunk.line_nums[i], lambda: {
+                    'line_num': chunk.line_nums[i],
+                    'expected': expected,
+                    'actual': len(fields),
+                    'content': chunk.content(i)
+                }, [len(fields)])
+    
+    def merge(self, other):
+        self.valid_records += other.valid_records
+        self.field_count_issues.merge(other.field_count_issues)
+    
+    def result(self):
+        return {'valid_records': self.valid_records, 'field_count_issues': self.field_count_issues.as_dict()}
+    
+    def report(self):
+        if self.field_count_issues:
+            print(f"\nField Count Issues ({len(self.field_count_issues)} records):")
+            print("-" * 60)
+            for issue in self.field_count_issues.examples:
+                print(f"Line {issue['line_num']}: Expected {issue['expected']}, got {issue['actual']}")
+                print(f"  Content: {issue['content']}")
+
+class QuotingCheck(ScanCheck):
+    """Records the strict CSV parser rejects, including unterminated quotes (kinds are the errors)"""
+    name = 'quoting'
+    
+    def __init__(self):
+        self.quote_issues = IssueLog()
+    
+    def process_chunk(self, chunk, context):
+        for i, error in chunk.parse_errors.items():
+            self.quote_issues.add(chunk.line_nums[i], lambda: {
+                'line_num': chunk.line_nums[i],
+                'error': error,
+                'content': chunk.content(i)
+            }, [error])
+    
+    def merge(self, other):
+        self.quote_issues.merge(other.quote_issues)
+    
+    def result(self):
+        return {'quote_issues': self.quote_issues.as_dict()}
+    
+    def report(self):
+        if self.quote_issues:
+            print(f"\nQuote Issues ({len(self.quote_issues)} records):")
+            print("-" * 60)
+            for issue in self.quote_issues.examples[:5]:  # Show 5
+                print(f"Line {issue['line_num']}: {issue['error']}")
+                print(f"  Content: {issue['content']}")
+
+COLUMN_TYPE_ORDER = ['int64', 'float64', 'object']  # Each type also holds the ones before it
+
+class TypeCheck(RowIssueCheck):
+    """Per-column missing values and inferred types, plus schema type mismatches"""
+    name = 'types'
+    title = 'Schema Type Issues'
+    
+    def __init__(self, expected_schema: Optional[Dict[str, str]] = None):
+        super().__init__()
+        self.expected_schema = expected_schema or {}
+        self.missing_values = Counter()
+        self.column_types = {}
+        self.rows_checked = 0
+        self.headers = None
+        self.validator = SchemaValidator(expected_schema)
+    
+    def process_chunk(self, chunk, context):
+        headers = context.headers or []
+        width = context.expected_field_count
+        if width is None:
+            return
+        for j in range(width):
+            self.column_types.setdefault(j, 'int64')
+        
+        rows, well_formed, frame = chunk.frame(context)
+        if not well_formed.any():
+            return
+        rows = [i for i, ok in zip(rows, well_formed) if ok]
+        frame = frame.loc[well_formed, :width - 1]
+        empty = chunk.masks(context)['empty'].loc[well_formed, :width - 1]
+        self.rows_checked += len(frame)
+        self.missing_values.update({j: int(count) for j, count in empty.sum().items() if count})
+        
+        for j in range(width):
+            if self.column_types[j] == 'object':
+                continue
+            values = frame[j][~empty[j]]
+            if self.column_types[j] == 'int64' and not values.str.fullmatch(r'[+-]?\d+').all():
+                self.column_types[j] = 'float64'
+            if self.column_types[j] == 'float64' and not values.str.fullmatch(FLOAT_PATTERN).all():
+                self.column_types[j] = 'object'
+        
+        columns = self.validator.column_map(headers)
+        if columns:
+            line_nums = [chunk.line_nums[i] for i in rows]
+            self.flag_mask(chunk, context, rows, self.validator.validate(frame, line_nums, columns))
+    
+    def finish(self, context):
+        self.headers = context.headers
+    
+    def merge(self, other):
+        super().merge(other)
+        self.validator.merge(other.validator)
+        self.missing_values.update(other.missing_values)
+        self.rows_checked += other.rows_checked
+        for j, column_type in other.column_types.items():
+            current = self.column_types.get(j, 'int64')
+            self.column_types[j] = max(current, column_type, key=COLUMN_TYPE_ORDER.index)
+    
+    def result(self):
+        result = super().result()
+        result.update({
+            'rows_checked': self.rows_checked,
+            'missing_values': {column_label(self.headers, j): count
+                               for j, count in sorted(self.missing_values.items())},
+            'column_types': {column_label(self.headers, j): column_type
+                             for j, column_type in sorted(self.column_types.items())},
+            'schema_validation': self.validator.result()
+        })
+        return result
+    
+    def report(self):
+        result = self.result()
+        print(f"\nColumn types: {result['column_types']}")
+        missing = {col: count for col, count in result['missing_values'].items() if count}
+        if missing:
+            print(f"\nMissing values per column:")
+            for col, count in missing.items():
+                percentage = (count / self.rows_checked) * 100 if self.rows_checked else 0
+                print(f"  {col}: {count} ({percentage:.2f}%)")
+        self.validator.report()
+        super().report()
+
+class WhitespaceCheck(RowIssueCheck):
+    """Fields with leading or trailing whitespace (BigQuery can be sensitive)"""
+    name = 'whitespace'
+    title = 'Whitespace Fields'
+    
+    def process_chunk(self, chunk, context):
+        rows, well_formed, frame = chunk.frame(context)
+        self.flag_mask(chunk, context, rows, chunk.masks(context)['whitespace'])
+
+class NonAsciiCheck(RowIssueCheck):
+    """Fields with non-ASCII characters, and records with undecodable bytes"""
+    name = 'non_ascii'
+    title = 'Special Characters'
+    
+    def __init__(self):
+        super().__init__()
+        self.encoding_issues = IssueLog()
+    
+    def process_chunk(self, chunk, context):
+        for i, text in enumerate(chunk.texts):
+            if '\ufffd' in text:
+                self.encoding_issues.add(chunk.line_nums[i], lambda: {
+                    'line_num': chunk.line_nums[i],
+                    'error': f"bytes not valid in {context.encoding}",
+                    'content': chunk.content(i)
+                })
+        rows, well_formed, frame = chunk.frame(context)
+        self.flag_mask(chunk, context, rows, chunk.masks(context)['non_ascii'])
+    
+    def merge(self, other):
+        super().merge(other)
+        self.encoding_issues.merge(other.encoding_issues)
+    
+    def result(self):
+        result = super().result()
+        result['encoding_issues'] = self.encoding_issues.as_dict()
+        return result
+    
+    def report(self):
+        super().report()
+        if self.encoding_issues:
+            print(f"\nEncoding/Parsing Issues ({len(self.encoding_issues)} records):")
+            print("-" * 60)
+            for issue in self.encoding_issues.examples[:5]:  # Show 5
+                print(f"Line {issue['line_num']}: {issue['error']}")
+                print(f"  Content: {issue['content']}")
+
+class LongFieldCheck(RowIssueCheck):
+    """Fields longer than LONG_FIELD_LENGTH characters (BigQuery has limits)"""
+    name = 'long_fields'
+    title = f'Very Long Fields (>{LONG_FIELD_LENGTH} chars)'
+    
+    def process_chunk(self, chunk, context):
+        rows, well_formed, frame = chunk.frame(context)
+        self.flag_mask(chunk, context, rows, chunk.masks(context)['long'])
+
+def column_label(headers: Optional[List[str]], index: int) -> str:
+    """Header name of column index, or field_<index> past the header"""
+    return headers[index] if headers and index < len(headers) else f'field_{index}'
+
+INTEGER_PATTERN = r'\s*[+-]?\d+\s*'  # What int() accepts
+FLOAT_PATTERN = r'\s*[+-]?(?:(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?|(?i:nan|inf|infinity))\s*'  # What float() accepts
+BOOLEAN_VALUES = ['true', 'false', '1', '0', 'yes', 'no']
+
+def type_mismatch_mask(values: pd.Series, expected_type: str) -> pd.Series:
+    """True where a non-empty value does not convert to expected_type (int(), float(), a boolean word or a date)"""
+    expected_type = expected_type.lower()
+    if expected_type in ['int', 'integer', 'long']:
+        valid = values.str.fullmatch(INTEGER_PATTERN)
+    elif expected_type in ['float', 'double']:
+        valid = values.str.fullmatch(FLOAT_PATTERN)
+    elif expected_type in ['boolean', 'bool']:
+        valid = values.str.lower().isin(BOOLEAN_VALUES)
+    elif expected_type in DATE_TYPES:
+        valid = DateColumnParser().parse(values)[0].notna()
+    else:
+        return pd.Series(False, index=values.index)
+    return (values != '') & ~valid.astype(bool)
+
+def merge_dtypes(current: Optional[str], new: str) -> str:
+    """The dtype pandas gives a column read at once, from the dtypes it inferred for two of its chunks"""
+    if current is None or current == new:
+        return new
+    if {current, new} <= {'int64', 'float64'}:
+        return 'float64'
+    return 'object'
+
+def schema_mismatch_count(values: pd.Series, expected_type: str) -> int:
+    """Non-missing values of a pandas-typed column that are not of expected_type
+    
+    Columns pandas already read with a fitting dtype count none (int
+    columns with missing values are float64 of whole numbers, and 0/1 are
+    booleans); others are checked as strings with type_mismatch_mask.
+    """
+    expected_type = expected_type.lower()
+    if expected_type not in SCHEMA_TYPES:
+        return 0
+    values = values.dropna()
+    kind = values.dtype.kind
+    if expected_type in ['int', 'integer', 'long']:
+        if kind in 'iu':
+            return 0
+        if kind == 'f':
+            return int((values % 1 != 0).sum())
+    elif expected_type in ['float', 'double'] and kind in 'iuf':
+        return 0
+    elif expected_type in ['boolean', 'bool']:
+        if kind == 'b':
+            return 0
+        if kind in 'iuf':
+            return int((~values.isin([0, 1])).sum())
+    elif expected_type in DATE_TYPES and kind == 'M':
+        return 0
+    return int(type_mismatch_mask(values.astype(str), expected_type).sum())
+
+DATE_TYPES = ['date', 'timestamp']
+# Formats tried for date columns: ours plus the ones the generator's date_format issue injects
+DATE_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%m/%d/%Y', '%d/%m/%Y', '%Y/%m/%d', '%m-%d-%Y']
+MAX_DATE_LENGTH = 40  # Longer values are not dates
+
+def digit_patterns(values: pd.Series) -> pd.Series:
+    """values with every digit replaced by 9
+    
+    With pyarrow the digits are replaced in the column's UTF-8 buffer at
+    once, instead of a regex substitution per value.
+    """
+    if pa is None:
+        return values.str.replace(r'[0-9]', '9', regex=True)
+    array = pa.array(values)
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks()
+    array = array.cast(pa.large_string())
+    validity, offsets, data = array.buffers()
+    text = np.frombuffer(data, dtype=np.uint8).copy() if data is not None else np.zeros(0, dtype=np.uint8)
+    text[(text >= ord('0')) & (text <= ord('9'))] = ord('9')
+    patterns = pa.Array.from_buffers(pa.large_string(), len(array), [validity, offsets, pa.py_buffer(text)],
+                                     array.null_count, array.offset)
+    return pd.Series(pd.arrays.ArrowExtensionArray(patterns), index=values.index)
+
+class DateColumnParser:
+    """Bulk parser for date columns that mix several formats
+    
+    Values are grouped by pattern (each digit replaced by 9, e.g.
+    '99/99/9999'). A pattern's candidates are the formats in DATE_FORMATS
+    whose layout fits it, found once from the pattern alone, so the choice
+    does not depend on which rows a parser sees first. Each group is parsed
+    in bulk with every candidate and a value takes the date of the first
+    candidate that parses it. A value that two candidates read as different
+    dates (03/04/2024) is ambiguous. Values only one candidate parses are
+    counted under that format; values several parse are counted under the
+    tuple of those formats, for resolve_format_counts to settle once all
+    rows are counted. Patterns no format fits fall back to pandas' per-value
+    parsing, except ones without digits or longer than MAX_DATE_LENGTH,
+    which are not dates.
+    """
+    def __init__(self, formats: List[str] = DATE_FORMATS):
+        self.formats = formats
+        self.formats_by_pattern = {}
+    
+    def candidate_formats(self, pattern: str) -> List[str]:
+        """Formats whose layout fits pattern, tried on the pattern with every 9 made a 1"""
+        candidates = []
+        for date_format in self.formats:
+            try:
+                datetime.strptime(pattern.replace('9', '1'), date_format)
+            except ValueError:
+                continue
+            candidates.append(date_format)
+        return candidates
+    
+    def parse(self, values: pd.Series) -> tuple:
+        """Parse a column of strings; returns (datetimes, ambiguous mask, {format or formats: values parsed})
+        
+        Empty and unparseable values are NaT.
+        """
+        values = values.str.strip()
+        ambiguous = pd.Series(False, index=values.index)
+        format_counts = Counter()
+        parsed = [pd.Series(pd.NaT, index=values.index[values == ''], dtype='datetime64[us]')]
+        
+        present = values[values != '']
+        patterns = digit_patterns(present)
+        for pattern, index in patterns.groupby(patterns, sort=False).groups.items():
+            if '9' not in pattern or len(pattern) > MAX_DATE_LENGTH:
+                continue  # Stays NaT
+            group = present[index]
+            if pattern not in self.formats_by_pattern:
+                self.formats_by_pattern[pattern] = self.candidate_formats(pattern)
+            formats = self.formats_by_pattern[pattern]
+            
+            if not formats:
+                result = pd.to_datetime(group, errors='coerce', format='mixed')
+                format_counts['mixed'] += int(result.notna().sum())
+                parsed.append(result.astype('datetime64[us]'))
+                continue
+            
+            results = [pd.to_datetime(group, errors='coerce', format=date_format) for date_format in formats]
+            result = results[0]
+            for other in results[1:]:
+                ambiguous[index] |= result.notna() & other.notna() & (result != other)
+                result = result.where(result.notna(), other)
+            parsed.append(result.astype('datetime64[us]'))
+            
+            # Bit k set when formats[k] parses the value
+            fits = sum(other.notna().to_numpy().astype(np.int64) << k for k, other in enumerate(results))
+            for bits, count in zip(*np.unique(fits[fits > 0], return_counts=True)):
+                fitting = tuple(f for k, f in enumerate(formats) if bits >> k & 1)
+                format_counts[fitting[0] if len(fitting) == 1 else fitting] += int(count)
+        
+        return pd.concat(parsed).reindex(values.index), ambiguous, format_counts
+
+def resolve_format_counts(format_counts: Counter) -> Dict[str, int]:
+    """{format: values} from DateColumnParser counts
+    
+    Values several formats parse go to the one of them that parsed the most
+    values on its own, earlier in DATE_FORMATS on a tie. The counts are only
+    summed until then, so byte ranges scanned apart resolve like one scan.
+    """
+    alone = Counter({f: count for f, count in format_counts.items() if isinstance(f, str)})
+    resolved = Counter(alone)
+    for formats, count in format_counts.items():
+        if not isinstance(formats, str):
+            resolved[max(formats, key=lambda f: (alone[f], -formats.index(f)))] += count
+    return {f: count for f, count in resolved.items() if count}
+
+def _sample_value(value: str, length: int = 100) -> str:
+    return value[:length] + ('...' if len(value) > length else '')
+
+def issue_masks(frame: pd.DataFrame) -> Dict[str, pd.DataFrame]:
+    """Boolean masks, shaped like frame (a DataFrame of string fields), of the field-level issues
+    
+    empty, whitespace (leading/trailing), non_ascii and long (over
+    LONG_FIELD_LENGTH characters). Schema types are checked by SchemaValidator.
+    """
+    return {
+        'empty': frame == '',
+        'whitespace': frame.apply(lambda values: values != values.str.strip()),
+        'non_ascii': frame.apply(lambda values: ~values.str.isascii()),
+        'long': frame.apply(lambda values: values.str.len() > LONG_FIELD_LENGTH)
+    }
+
+SCHEMA_TYPES = ['int', 'integer', 'long', 'float', 'double', 'boolean', 'bool', 'date', 'timestamp']
+
+class SchemaValidator:
+    """Typed validation of whole columns against an expected schema (see parse_schema_string)
+    
+    Every column with a checkable type is validated at once with
+    type_mismatch_mask, or a DateColumnParser (one per column) for date and
+    timestamp columns. Per column it counts the values checked and the
+    invalid ones, and keeps the row numbers and values of the first
+    MAX_EXAMPLES invalid ones; date columns also count the values parsed per
+    format and the ambiguous day/month ones. Other types (e.g. string) are
+    not checked.
+    """
+    def __init__(self, expected_schema: Optional[Dict[str, str]] = None):
+        self.expected_schema = expected_schema or {}
+        self.column_types = {col: col_type for col, col_type in self.expected_schema.items()
+                             if col_type.lower() in SCHEMA_TYPES}
+        self.missing_columns = []
+        self.checked = Counter()
+        self.invalid = Counter()
+        self.samples = defaultdict(list)
+        self.date_parsers = {}
+        self.date_formats = defaultdict(Counter)
+        self.ambiguous = Counter()
+        self.ambiguous_samples = defaultdict(list)
+    
+    def column_map(self, headers: List[str]) -> Dict[str, int]:
+        """Positions of the checked schema columns in headers; notes the schema columns headers lack"""
+        self.missing_columns = [col for col in self.expected_schema if col not in headers]
+        return {col: headers.index(col) for col in self.column_types if col in headers}
+    
+    def validate(self, frame: pd.DataFrame, row_numbers, columns: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """Validate the schema columns of frame, whose rows are row_numbers
+        
+        columns maps schema columns to frame columns (default: the same
+        names). Returns the invalid-value mask, with those frame columns.
+        """
+        if columns is None:
+            columns = {col: col for col in self.column_types if col in frame.columns}
+        row_numbers = np.asarray(row_numbers)
+        masks = {}
+        for col, frame_column in columns.items():
+            values = frame[frame_column]
+            if self.column_types[col].lower() in DATE_TYPES:
+                parser = self.date_parsers.setdefault(col, DateColumnParser())
+                parsed, ambiguous, format_counts = parser.parse(values)
+                mask = (values != '') & parsed.isna()
+                self.date_formats[col].update(format_counts)
+                ambiguous = np.flatnonzero(ambiguous.to_numpy())
+                self.ambiguous[col] += len(ambiguous)
+                for k in ambiguous[:MAX_EXAMPLES - len(self.ambiguous_samples[col])]:
+                    self.ambiguous_samples[col].append((int(row_numbers[k]), _sample_value(values.iloc[k])))
+            else:
+                mask = type_mismatch_mask(values, self.column_types[col])
+            masks[frame_column] = mask
+            self.checked[col] += int(np.count_nonzero(values.to_numpy() != ''))
+            invalid = np.flatnonzero(mask.to_numpy())
+            self.invalid[col] += len(invalid)
+            for k in invalid[:MAX_EXAMPLES - len(self.samples[col])]:
+                self.samples[col].append((int(row_numbers[k]), _sample_value(values.iloc[k])))
+        return pd.DataFrame(masks, index=frame.index, columns=list(columns.values()))
+    
+    def merge(self, other: 'SchemaValidator') -> None:
+        """Append the results of validating the following rows"""
+        self.missing_columns = self.missing_columns or other.missing_columns
+        self.checked.update(other.checked)
+        self.invalid.update(other.invalid)
+        for col, samples in other.samples.items():
+            self.samples[col].extend(samples[:MAX_EXAMPLES - len(self.samples[col])])
+        for col, format_counts in other.date_formats.items():
+            self.date_formats[col].update(format_counts)
+        self.ambiguous.update(other.ambiguous)
+        for col, samples in other.ambiguous_samples.items():
+            self.ambiguous_samples[col].extend(samples[:MAX_EXAMPLES - len(self.ambiguous_samples[col])])
+    
+    def result(self) -> Dict[str, Any]:
+        columns = {}
+        for col, col_type in self.column_types.items():
+            if col in self.missing_columns:
+                continue
+            columns[col] = {
+                'expected_type': col_type,
+                'checked': self.checked[col],
+                'invalid': self.invalid[col],
+                'invalid_rate': self.invalid[col] / self.checked[col] if self.checked[col] else 0.0,
+                'sample_rows': [row for row, value in self.samples[col]],
+                'sample_values': [value for row, value in self.samples[col]]
+            }
+            if col_type.lower() in DATE_TYPES:
+                columns[col].update({
+                    'date_formats': resolve_format_counts(self.date_formats[col]),
+                    'ambiguous': self.ambiguous[col],
+                    'ambiguous_sample_rows': [row for row, value in self.ambiguous_samples[col]],
+                    'ambiguous_sample_values': [value for row, value in self.ambiguous_samples[col]]
+                })
+        return {'columns': columns, 'missing_columns': self.missing_columns}
+    
+    def report(self) -> None:
+        result = self.result()
+        if not result['columns'] and not result['missing_columns']:
+            return
+        print(f"\nSchema Validation:")
+        for col, info in result['columns'].items():
+            print(f"  {col} ({info['expected_type']}): {info['invalid']} invalid of {info['checked']} "
+                  f"({info['invalid_rate'] * 100:.2f}%)")
+            for row, value in zip(info['sample_rows'][:5], info['sample_values']):
+                print(f"    Row {row}: '{value}'")
+            if 'date_formats' in info:
+                print(f"    Formats: {info['date_formats']}")
+            if info.get('ambiguous'):
+                print(f"    Ambiguous day/month: {info['ambiguous']} "
+                      f"(e.g. row {info['ambiguous_sample_rows'][0]}: '{info['ambiguous_sample_values'][0]}')")
+        for col in result['missing_columns']:
+            print(f"  Missing column: {col}")
+
+def read_header(file_path: str, context: ScanContext) -> None:
+    """Find the first non-empty record and set the expected field count (and headers) from it"""
+    with open_input(file_path) as f:
+        for line_nums, offsets, records, unterminated in iter_record_chunks(f, context.quote_char):
+            first = next((i for i, record in enumerate(records) if record.strip()), None)
+            if first is None:
+                continue
+            first_line = records[first].decode(context.encoding, errors='replace')
+            try:
+                fields = next(csv.reader([first_line], delimiter=context.delimiter, quotechar=context.quote_char))
+            except csv.Error:
+                fields = first_line.split(context.delimiter)
+            context.expected_field_count = len(fields)
+            if context.has_header:
+                context.headers = fields
+                context.header_line = first_line
+                context.header_offset = offsets[first]
+            return
+
+def scan_range(file_path: str, checks: List[ScanCheck], context: ScanContext, start: int, stop: int,
+               line_num: int, chunk_records: int = SCAN_CHUNK_RECORDS) -> Dict[str, Any]:
+    """Feed every record that starts in [start, stop) to the checks
+    
+    start must be a record boundary on line line_num. The record running
+    past stop is still read to its end. Returns the number of records and
+    physical lines scanned, plus the offset and line of the first record at
+    or after stop (where the next range has to start).
+    """
+    stats = {'records': 0, 'lines': 0, 'handoff_offset': None, 'handoff_line': None,
+             'last_unterminated_line': None}
+    with open_input(file_path) as f:
+        if start:
+            f.seek(start)
+        for line_nums, offsets, records, unterminated in iter_record_chunks(f, context.quote_char, chunk_records,
+                                                                            line_num=line_num):
+            cut = bisect.bisect_left(offsets, stop)
+            if cut < len(offsets):
+                stats['handoff_offset'] = offsets[cut]
+                stats['handoff_line'] = line_nums[cut]
+                del line_nums[cut:], offsets[cut:], records[cut:], unterminated[cut:]
+            prepare_chunk(stats, context, line_nums, offsets, records, unterminated)
+            chunk = RecordChunk(line_nums, offsets, records, unterminated, context)
+            for check in checks:
+                check.process_chunk(chunk, context)
+            if stats['handoff_offset'] is not None:
+                break
+        if stats['handoff_offset'] is None:
+            stats['handoff_offset'] = max(stop, f.tell())
+    return stats
+
+def prepare_chunk(stats: Dict[str, Any], context: ScanContext, line_nums: List[int], offsets: List[int],
+                  records: List[bytes], unterminated: List[bool]) -> None:
+    """Count a chunk of records into stats and take the header record out of it"""
+    stats['records'] += len(records)
+    stats['lines'] += len(records) + sum(record.count(b'\n') for record in records)
+    flagged = [num for num, flag in zip(line_nums, unterminated) if flag]
+    if flagged:
+        stats['last_unterminated_line'] = flagged[-1]
+    
+    if context.header_offset is not None and offsets and offsets[0] <= context.header_offset <= offsets[-1]:
+        # The header is not a data record: keep it away from the checks
+        first = bisect.bisect_left(offsets, context.header_offset)
+        if offsets[first] == context.header_offset:
+            for column in (line_nums, offsets, records, unterminated):
+                del column[first]
+
+def _check_chunk_task(task) -> List[ScanCheck]:
+    """Run fresh checks on one chunk of records in a worker process"""
+    checks, context, line_nums, offsets, records, unterminated = task
+    chunk = RecordChunk(line_nums, offsets, records, unterminated, context)
+    for check in checks:
+        check.process_chunk(chunk, context)
+    return checks
+
+def _count_range(task) -> tuple:
+    """Newline and quote counts of one byte range"""
+    file_path, start, stop, quote = task
+    newlines = quotes = 0
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            block = f.read(min(SCAN_BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            newlines += block.count(b'\n')
+            quotes += block.count(quote)
+    return newlines, quotes
+
+def _scan_range_task(task) -> tuple:
+    """Scan one byte range in a worker process
+    
+    A range whose start lies inside a quoted field (odd number of quotes
+    before it) first skips the lines that close that field; they belong to
+    the record of the previous range.
+    """
+    file_path, checks, context, start, stop, line_num, in_quote, chunk_records = task
+    first_offset = start
+    if in_quote:
+        quote = context.quote_char.encode()
+        with open(file_path, 'rb') as f:
+            f.seek(start)
+            open_quotes = 1
+            for skipped in range(1, MAX_RECORD_LINES + 1):
+                line = f.readline()
+                if not line:
+                    break
+                open_quotes += line.count(quote)
+                if open_quotes % 2 == 0:
+                    first_offset = f.tell()
+                    line_num += skipped
+                    break
+    if first_offset >= stop:
+        return checks, first_offset, {'records': 0, 'lines': 0, 'handoff_offset': first_offset,
+                                      'handoff_line': line_num}
+    return checks, first_offset, scan_range(file_path, checks, context, first_offset, stop, line_num, chunk_records)
+
+def range_boundaries(file_path: str, num_ranges: int) -> List[int]:
+    """Byte offsets splitting the file into about num_ranges ranges, each starting just after a newline"""
+    size = os.path.getsize(file_path)
+    boundaries = [0]
+    with open(file_path, 'rb') as f:
+        for k in range(1, num_ranges):
+            f.seek(max(size * k // num_ranges - 1, boundaries[-1]))
+            f.readline()
+            if f.tell() >= size:
+                break
+            if f.tell() > boundaries[-1]:
+                boundaries.append(f.tell())
+    boundaries.append(size)
+    return boundaries
+
+def default_checks(expected_schema: Optional[Dict[str, str]] = None, sample_size: int = 100) -> List[ScanCheck]:
+    """The checks run by a default single-pass scan"""
+    return [StructureCheck(sample_size), FieldCountCheck(), QuotingCheck(), TypeCheck(expected_schema),
+            WhitespaceCheck(), NonAsciiCheck(), LongFieldCheck()]
+
+def quarantine_paths(file_path: str, output_dir: str, output_format: str = 'csv') -> Dict[str, str]:
+    """clean, repaired and rejects output paths in output_dir for an input (clean and repaired as csv or parquet)"""
+    name = os.path.basename(file_path.split(ZIP_MEMBER_SEPARATOR)[-1])
+    if name.lower().endswith(COMPRESSED_SUFFIXES):
+        name = name.rsplit('.', 1)[0]
+    stem = os.path.splitext(name)[0]
+    return {
+        'clean': os.path.join(output_dir, f'{stem}{CLEAN_SUFFIX}.{output_format}'),
+        'repaired': os.path.join(output_dir, f'{stem}{REPAIRED_SUFFIX}.{output_format}'),
+        'rejects': os.path.join(output_dir, f'{stem}{REJECTS_SUFFIX}')
+    }
+
+def _unquote(field: str, quote_char: str) -> str:
+    """field without the quotes around it, if it has them"""
+    if len(field) >= 2 and field[0] == field[-1] == quote_char:
+        return field[1:-1].replace(quote_char * 2, quote_char)
+    return field
+
+def _lenient_fields(text: str, context: ScanContext) -> tuple:
+    """(fields, repaired) for one line: strict CSV, then backslash-escaped quotes, then a plain split
+    
+    The plain split removes the quotes around a field and keeps the ones
+    inside it (unescaped or stray quotes). The first reading with the
+    expected field count wins; repaired is False if that is the strict one
+    and the line's quotes are balanced, i.e. the line is fine on its own.
+    """
+    escapes = [None, '\\'] if '\\' + context.quote_char in text else [None]
+    for escapechar in escapes:
+        try:
+            fields = next(csv.reader([text], delimiter=context.delimiter, quotechar=context.quote_char,
+                                     escapechar=escapechar, strict=True))
+            if len(fields) == context.expected_field_count:
+                return fields, escapechar is not None or text.count(context.quote_char) % 2 == 1
+        except csv.Error:
+            pass
+    return [_unquote(field, context.quote_char) for field in text.split(context.delimiter)], True
+
+def repair_quoting(text: str, context: ScanContext) -> List[tuple]:
+    """(fields, repaired) rows for a record the strict parser rejected, read leniently (see _lenient_fields)
+    
+    A record that spans several lines is first read with backslash-escaped
+    quotes; if that fails, a stray quote ran it past its line end and each
+    line is read on its own, one row per line. Rows without the expected
+    field count are not repaired.
+    """
+    if '\n' not in text:
+        return [_lenient_fields(text, context)]
+    if '\\' + context.quote_char in text:
+        try:
+            fields = next(csv.reader([text], delimiter=context.delimiter, quotechar=context.quote_char,
+                                     escapechar='\\', strict=True))
+            if len(fields) == context.expected_field_count:
+                return [(fields, True)]
+        except csv.Error:
+            pass
+    return [_lenient_fields(line.rstrip('\r'), context) for line in text.split('\n')]
+
+class QuarantineWriter(ScanCheck):
+    """Splits the scanned records into clean, repaired and rejects outputs (paths maps each to a file)
+    
+    Well-formed records with nothing to repair are clean and copied as their
+    raw bytes. Repairs trim whitespace, empty NULL_TOKENS and re-quote the
+    records the strict parser rejected (see repair_quoting). Records with
+    the wrong field count, undecodable bytes or, after repair, a value that
+    is not of its expected schema type are rejected: the rejects CSV holds
+    REJECT_COLUMNS, with the record's original bytes. clean and repaired
+    are Parquet (string columns, empty fields null) if their path ends in
+    .parquet, otherwise CSV in the input's encoding. Blank records are
+    dropped.
+    
+    Every instance writes each chunk to part files next to the outputs, so
+    parallel ranges and chunks can each run their own; finish joins the
+    merged parts in file order.
+    """
+    name = 'quarantine'
+    
+    def __init__(self, paths: Dict[str, str], token: str = None):
+        if pq is None and any(path.lower().endswith('.parquet') for path in paths.values()):
+            raise ImportError("No module named 'pyarrow' (needed for Parquet output)")
+        self.paths = paths
+        self.token = token or os.urandom(4).hex()  # Names this run's part files
+        self.parts = {kind: [] for kind in paths}
+        self.counts = Counter()
+        self.repairs = Counter()
+        self.rejects = IssueLog()
+        self.validator = None
+    
+    def spawn(self) -> 'QuarantineWriter':
+        """A fresh writer for the same outputs, e.g. for another byte range"""
+        return QuarantineWriter(self.paths, self.token)
+    
+    def is_parquet(self, kind: str) -> bool:
+        return kind != 'rejects' and self.paths[kind].lower().endswith('.parquet')
+    
+    def process_chunk(self, chunk, context):
+        expected = context.expected_field_count
+        if self.validator is None:
+            self.validator = SchemaValidator(context.expected_schema)
+        rows, well_formed, frame = chunk.frame(context)
+        self.counts['blank'] += len(chunk.texts) - len(rows)
+        rejects = []  # (line_num, reason, raw record)
+        undecodable = np.array(['\ufffd' in chunk.texts[i] for i in rows], dtype=bool)
+        for k in np.flatnonzero(undecodable):
+            rejects.append((chunk.line_nums[rows[k]], f'undecodable {context.encoding} bytes',
+                            chunk.raw_records[rows[k]]))
+        
+        # Re-quoted records join the well-formed ones, in line order
+        keep = well_formed & ~undecodable
+        requoted = []  # (line_num, raw record, fields, whether quotes were repaired)
+        for k in np.flatnonzero(~well_formed & ~undecodable):
+            i = rows[k]
+            if i not in chunk.parse_errors:
+                rejects.append((chunk.line_nums[i], f'expected {expected} fields, found {len(chunk.fields[i])}',
+                                chunk.raw_records[i]))
+                continue
+            repaired_rows = repair_quoting(chunk.texts[i], context)
+            if len(repaired_rows) == 1:
+                lines = [(chunk.texts[i], chunk.raw_records[i])]
+            else:
+                lines = list(zip(chunk.texts[i].split('\n'), chunk.raw_records[i].split(b'\n')))
+            for n, ((fields, repaired), (text, raw)) in enumerate(zip(repaired_rows, lines)):
+                line_num = chunk.line_nums[i] + n
+                if not text.strip():
+                    self.counts['blank'] += 1
+                elif len(fields) == expected:
+                    requoted.append((line_num, raw.rstrip(b'\r'), fields, repaired))
+                elif len(repaired_rows) == 1:
+                    rejects.append((line_num, chunk.parse_errors[i], raw))
+                else:
+                    rejects.append((line_num, f'expected {expected} fields, found {len(fields)}', raw.rstrip(b'\r')))
+        
+        values = frame.loc[keep, :expected - 1].reset_index(drop=True)
+        line_nums = np.asarray(chunk.line_nums)[np.asarray(rows, dtype=np.int64)[keep]]
+        raws = [chunk.raw_records[rows[k]] for k in np.flatnonzero(keep)]
+        quote_fixed = np.zeros(len(values), dtype=bool)
+        if requoted:
+            values = pd.concat([values, pd.DataFrame([row[2] for row in requoted], columns=values.columns)],
+                               ignore_index=True)
+            line_nums = np.concatenate([line_nums, [row[0] for row in requoted]])
+            raws += [row[1] for row in requoted]
+            quote_fixed = np.concatenate([quote_fixed, np.array([row[3] for row in requoted], dtype=bool)])
+            order = np.argsort(line_nums, kind='stable')
+            values = values.iloc[order].reset_index(drop=True)
+            line_nums, quote_fixed = line_nums[order], quote_fixed[order]
+            raws = [raws[k] for k in order]
+        
+        if len(values):
+            stripped = values.apply(lambda column: column.str.strip())
+            nulls = stripped.isin(NULL_TOKENS)
+            repaired = stripped.mask(nulls, '')
+            trimmed = (stripped != values).to_numpy().any(axis=1)
+            emptied = nulls.to_numpy().any(axis=1)
+            
+            invalid = np.zeros(len(values), dtype=bool)
+            columns = self.validator.column_map(context.headers or [])
+            if columns:
+                type_mask = self.validator.validate(repaired, line_nums, columns)
+                for col, position in columns.items():
+                    bad = type_mask[position].to_numpy(dtype=bool) & ~invalid
+                    invalid |= bad
+                    reason = f'invalid {self.validator.column_types[col]} in {col}'
+                    rejects.extend((line_nums[k], reason, raws[k]) for k in np.flatnonzero(bad))
+            
+            fixed = (quote_fixed | trimmed | emptied) & ~invalid
+            clean = ~invalid & ~fixed
+            self.counts['clean'] += int(clean.sum())
+            self.counts['repaired'] += int(fixed.sum())
+            for repair, flags in [('whitespace', trimmed), ('null_token', emptied), ('quote_escaping', quote_fixed)]:
+                self.repairs[repair] += int((flags & fixed).sum())
+            
+            if clean.any():
+                if self.is_parquet('clean'):
+                    self._write_table('clean', values[clean], context)
+                else:
+                    self._write_bytes('clean', b''.join(raws[k] + b'\n' for k in np.flatnonzero(clean)))
+            if fixed.any():
+                if self.is_parquet('repaired'):
+                    self._write_table('repaired', repaired[fixed], context)
+                else:
+                    buffer = io.StringIO()
+                    repaired[fixed].to_csv(buffer, sep=context.delimiter, quotechar=context.quote_char,
+                                           header=False, index=False, lineterminator='\n')
+                    self._write_bytes('repaired', buffer.getvalue().encode(self.output_encoding(context)))
+        
+        if rejects:
+            rejects.sort(key=lambda reject: reject[0])
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, delimiter=',', lineterminator='\n')
+            for line_num, reason, raw in rejects:
+                record = raw.decode(self.output_encoding(context), errors='surrogateescape')
+                writer.writerow([int(line_num), reason, record])
+                self.rejects.add(int(line_num), lambda: {
+                    'line_num': int(line_num),
+                    'reason': reason,
+                    'content': _sample_value(record, 200)
+                }, [reason])
+            self._write_bytes('rejects', buffer.getvalue().encode(self.output_encoding(context), errors='surrogateescape'))
+    
+    @staticmethod
+    def output_encoding(context: ScanContext) -> str:
+        # A BOM is written once, by finish, not before every part
+        return 'utf-8' if codecs.lookup(context.encoding).name == 'utf-8-sig' else context.encoding
+    
+    def _new_part(self, kind: str) -> str:
+        directory, name = os.path.split(os.path.abspath(self.paths[kind]))
+        fd, part = tempfile.mkstemp(prefix=f'.{name}.{self.token}.', suffix='.part', dir=directory)
+        os.close(fd)
+        self.parts[kind].append(part)
+        return part
+    
+    def _write_bytes(self, kind: str, data: bytes) -> None:
+        with open(self._new_part(kind), 'wb') as f:
+            f.write(data)
+    
+    def _write_table(self, kind: str, values: pd.DataFrame, context: ScanContext) -> None:
+        pq.write_table(self._table(values, context), self._new_part(kind))
+    
+    def _table(self, values: pd.DataFrame, context: ScanContext):
+        arrays = []
+        for j in values.columns:
+            column = values[j].to_numpy(dtype=object)
+            column[column == ''] = None
+            arrays.append(pa.array(column, type=pa.string()))
+        return pa.Table.from_arrays(arrays, names=[column_label(context.headers, j) for j in values.columns])
+    
+    def finish(self, context):
+        encoding = self.output_encoding(context)
+        for kind, path in self.paths.items():
+            if self.is_parquet(kind):
+                names = [column_label(context.headers, j) for j in range(context.expected_field_count or 0)]
+                with pq.ParquetWriter(path, pa.schema([(name, pa.string()) for name in names])) as writer:
+                    for part in self.parts[kind]:
+                        writer.write_table(pq.read_table(part))
+                continue
+            with open(path, 'wb') as out:
+                if kind == 'rejects':
+                    out.write((','.join(REJECT_COLUMNS) + '\n').encode(encoding))
+                elif context.header_line is not None:
+                    out.write(context.header_line.encode(context.encoding) + b'\n')
+                for part in self.parts[kind]:
+                    with open(part, 'rb') as f:
+                        shutil.copyfileobj(f, out, SCAN_BLOCK_SIZE)
+        
+        # Also the parts of ranges that were scanned again and never merged
+        for path in self.paths.values():
+            directory, name = os.path.split(os.path.abspath(path))
+            for part in glob.glob(os.path.join(glob.escape(directory), f'.{glob.escape(name)}.{self.token}.*.part')):
+                os.remove(part)
+        self.parts = {kind: [] for kind in self.paths}
+    
+    def merge(self, other):
+        for kind, parts in other.parts.items():
+            self.parts[kind].extend(parts)
+        self.counts.update(other.counts)
+        self.repairs.update(other.repairs)
+        self.rejects.merge(other.rejects)
+    
+    def result(self):
+        return {
+            'outputs': self.paths,
+            'clean_records': self.counts['clean'],
+            'repaired_records': self.counts['repaired'],
+            'rejected_records': len(self.rejects),
+            'blank_records': self.counts['blank'],
+            'repairs': dict(self.repairs),
+            'rejects': self.rejects.as_dict()
+        }
+    
+    def report(self):
+        print(f"\nQuarantine:")
+        print("-" * 60)
+        print(f"Clean: {self.counts['clean']:,} records -> {self.paths['clean']}")
+        repairs = ', '.join(f'{repair} {count:,}' for repair, count in self.repairs.items() if count)
+        print(f"Repaired: {self.counts['repaired']:,} records -> {self.paths['repaired']}"
+              + (f" ({repairs})" if repairs else ''))
+        print(f"Rejected: {len(self.rejects):,} records -> {self.paths['rejects']}")
+        for reason, count in self.rejects.kinds.most_common(5):
+            print(f"  • {reason}: {count:,}")
+        for issue in self.rejects.examples[:5]:
+            print(f"Line {issue['line_num']}: {issue['reason']}")
+            print(f"  Content: {issue['content']}")
+
+# Sampling mode: records read around K stratified seek offsets (or a reservoir of
+# the whole file) stand in for the file, and issue rates come with confidence intervals
+SAMPLE_WINDOW = 256 * 1024  # Bytes read to realign a seek offset to a record boundary
+SAMPLE_SCORE_RECORDS = 5  # Records scored per quote-state guess when realigning
+SAMPLE_ISSUES = ['malformed', 'field_count', 'quoting', 'encoding', 'whitespace', 'non_ascii', 'long_fields']
+
+class Utf8Scan:
+    """Chunked UTF-8 validation of a file's raw bytes
+    
+    Blocks that are pure ASCII are skipped without decoding; the others are
+    decoded strictly, resuming after each invalid sequence, so every scan
+    keeps its own error positions. invalid is an IssueLog of the lines with invalid
+    sequences (kinds are the first invalid byte, examples have the byte
+    offset), and failing_sample collects up to sample_size bytes of those
+    lines for a statistical detector.
+    """
+    def __init__(self, sample_size: int = ENCODING_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self.bytes_scanned = 0
+        self.utf8_non_ascii = False  # Valid multi-byte UTF-8 seen
+        self.invalid_sequences = 0
+        self.invalid = IssueLog()
+        self.failing_sample = bytearray()
+        self._last_line = None
+    
+    def scan(self, file_path: str, start: int = 0, line_num: int = 1, block_size: int = SCAN_BLOCK_SIZE,
+             stop: Optional[int] = None) -> None:
+        """Validate the bytes from start (on line line_num) to stop, or the end of the file
+        
+        A sequence cut by stop is left out rather than counted as invalid.
+        """
+        with open_input(file_path) as f:
+            if start:
+                f.seek(start)
+            offset = start
+            carry = b''
+            while True:
+                block = f.read(block_size if stop is None else min(block_size, stop - offset - len(carry)))
+                data = carry + block
+                if not data or (not block and stop is not None and offset + len(data) >= stop):
+                    break
+                carry = b''
+                if not data.isascii():
+                    non_ascii, errors = self._decode_errors(data)
+                    if block and errors and errors[-1][1] == len(data) and len(data) - errors[-1][0] < 4:
+                        # A sequence cut by the block boundary: retry it with the next block
+                        carry = data[errors[-1][0]:]
+                        data = data[:errors[-1][0]]
+                        errors.pop()
+                    self.utf8_non_ascii = self.utf8_non_ascii or non_ascii
+                    self._add_errors(data, errors, offset, line_num)
+                self.bytes_scanned += len(data)
+                line_num += data.count(b'\n')
+                offset += len(data)
+    
+    @staticmethod
+    def _decode_errors(data: bytes) -> tuple:
+        """(whether data has valid non-ASCII UTF-8, [(start, end) of each invalid sequence])"""
+        view = memoryview(data)
+        non_ascii = False
+        errors = []
+        start = 0
+        while start < len(data):
+            try:
+                codecs.utf_8_decode(view[start:], 'strict', True)
+            except UnicodeDecodeError as error:
+                non_ascii = non_ascii or not data[start:start + error.start].isascii()
+                errors.append((start + error.start, start + error.end))
+                start += error.end
+                continue
+            non_ascii = non_ascii or not data[start:].isascii()
+            break
+        return non_ascii, errors
+    
+    def scan_records(self, records: List[bytes]) -> None:
+        """Validate sampled records as well
+        
+        Their line numbers are unknown, so invalid ones only add to the
+        counts and failing_sample, not to invalid.
+        """
+        for record in records:
+            self.bytes_scanned += len(record)
+            if record.isascii():
+                continue
+            non_ascii, errors = self._decode_errors(record)
+            self.utf8_non_ascii = self.utf8_non_ascii or non_ascii
+            self.invalid_sequences += len(errors)
+            if errors and len(self.failing_sample) < self.sample_size:
+                self.failing_sample += record[:self.sample_size - len(self.failing_sample)] + b'\n'
+    
+    def _add_errors(self, data: bytes, errors: List[tuple], offset: int, line_num: int) -> None:
+        self.invalid_sequences += len(errors)
+        counted = 0
+        for error_start, error_end in errors:
+            line_num += data.count(b'\n', counted, error_start)
+            counted = error_start
+            if line_num == self._last_line:
+                continue  # Lines are logged once, at their first invalid sequence
+            self._last_line = line_num
+            line_start = data.rfind(b'\n', 0, error_start) + 1
+            line_end = data.find(b'\n', error_start)
+            line = data[line_start:line_end if line_end >= 0 else len(data)].rstrip(b'\r')
+            if len(self.failing_sample) < self.sample_size:
+                self.failing_sample += line[:self.sample_size - len(self.failing_sample)] + b'\n'
+            self.invalid.add(line_num, lambda: {
+                'line_num': line_num,
+                'offset': offset + error_start,
+                'bytes': data[error_start:error_end].hex(),
+                'content': _sample_value(line.decode('utf-8', errors='replace'), 200)
+            }, [f'0x{data[error_start]:02x}'])
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {'bytes_scanned': self.bytes_scanned, 'utf8_non_ascii': self.utf8_non_ascii,
+                'invalid_sequences': self.invalid_sequences, 'invalid_lines': self.invalid.as_dict()}
+
+def _hash_range(file_path: str, start: int, length: int) -> str:
+    with open(input_path(file_path), 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(length)).hexdigest()
+
+class ScanCache:
+    """Single-pass scan state of previously analyzed files, one pickle per file and options in cache_dir
+    
+    An entry keeps the scan's context and checks, the size and mtime of the
+    file it covered and hashes of the first and last CACHE_HASH_BYTES of the
+    scanned bytes. lookup() finds an entry and returns it with a status:
+    'hit' if the file is unchanged, 'append' if it only grew and the scan
+    ended on a record boundary (scanning resumes there; not for compressed
+    inputs), None otherwise.
+    Entries hold example rows, so keep cache_dir as private as the data.
+    """
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+    
+    def entry_path(self, file_path: str, options: tuple) -> str:
+        key = repr((CACHE_VERSION, os.path.abspath(file_path), options))
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode()).hexdigest() + '.pickle')
+    
+    def lookup(self, file_path: str, options: tuple) -> tuple:
+        try:
+            with open(self.entry_path(file_path, options), 'rb') as f:
+                entry = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            return None, None
+        
+        stat = os.stat(input_path(file_path))
+        size = entry['size']
+        if stat.st_size < size or _hash_range(file_path, 0, min(size, CACHE_HASH_BYTES)) != entry['head_hash']:
+            return None, None
+        if stat.st_size == size:
+            return (entry, 'hit') if stat.st_mtime_ns == entry['mtime_ns'] else (None, None)
+        tail_start = max(0, size - CACHE_HASH_BYTES)
+        if entry['resumable'] and _hash_range(file_path, tail_start, size - tail_start) == entry['tail_hash']:
+            return entry, 'append'
+        return None, None
+    
+    def save(self, file_path: str, options: tuple, stat: os.stat_result, context: ScanContext,
+             checks: List[ScanCheck], delimiter_analysis: Optional[Dict[str, Any]] = None) -> None:
+        """Store a scan of the first stat.st_size bytes of file_path"""
+        size = stat.st_size
+        tail_start = max(0, size - CACHE_HASH_BYTES)
+        with open(input_path(file_path), 'rb') as f:
+            f.seek(max(0, size - 1))
+            ends_with_newline = size == 0 or f.read(1) == b'\n'
+        # Appended bytes can still close a quote opened in the last MAX_RECORD_LINES lines
+        next_line = context.total_lines + 1
+        recent_quote = (context.last_unterminated_line is not None and
+                        context.last_unterminated_line > next_line - MAX_RECORD_LINES)
+        entry = {
+            'size': size,
+            'mtime_ns': stat.st_mtime_ns,
+            'head_hash': _hash_range(file_path, 0, min(size, CACHE_HASH_BYTES)),
+            'tail_hash': _hash_range(file_path, tail_start, size - tail_start),
+            'resumable': ends_with_newline and not recent_quote and not is_compressed(file_path),
+            'resume_line': next_line,
+            'context': context,
+            'checks': checks,
+            'delimiter_analysis': delimiter_analysis
+        }
+        path = self.entry_path(file_path, options)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + '.tmp', path)
+
+def wilson_interval(count: int, n: int, z: float = 1.96) -> tuple:
+    """Wilson score interval for a proportion of count in n (95% for z=1.96)"""
+    if n == 0:
+        return 0.0, 1.0
+    p = count / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(0.0, center - half_width), min(1.0, center + half_width)
+
+def align_to_record(f, offset: int, context: ScanContext) -> int:
+    """Best guess at the first record boundary after byte offset
+    
+    The start of the next line is a boundary unless the offset fell inside
+    a quoted field with line breaks. Both cases are tried - starting at
+    that line, or after the line that closes the quote - and the one whose
+    first SAMPLE_SCORE_RECORDS records have the expected field count more
+    often wins (the first on a tie).
+    """
+    f.seek(max(offset - 1, 0))
+    if offset > 0:
+        f.readline()  # Rest of the line the offset fell in (none if offset starts a line)
+    start = f.tell()
+    window = f.read(SAMPLE_WINDOW)
+    quote = context.quote_char.encode()
+    
+    candidates = [0]
+    open_quotes = 1
+    position = 0
+    for _ in range(MAX_RECORD_LINES):
+        end = window.find(b'\n', position)
+        if end < 0:
+            break
+        open_quotes += window.count(quote, position, end)
+        position = end + 1
+        if open_quotes % 2 == 0:
+            candidates.append(position)
+            break
+    
+    def score(candidate):
+        good = 0
+        for offsets, ends, line_nums, field_counts, unterminated in iter_record_boundaries(
+                window, context.delimiter, context.quote_char, start=candidate):
+            complete = ends < len(window)  # The window cuts the last record short
+            good += int(np.count_nonzero(((field_counts == context.expected_field_count) & ~unterminated &
+                                          complete)[:SAMPLE_SCORE_RECORDS]))
+            break
+        return good
+    
+    return start + max(candidates, key=lambda candidate: (score(candidate), -candidate))
+
+def sample_records_seek(file_path: str, context: ScanContext, num_samples: int, records_per_sample: int,
+                        seed: int = 0) -> tuple:
+    """Records read at num_samples stratified random offsets
+    
+    The data part of the file is cut into num_samples equal byte strata; in
+    each, reading starts at a random offset realigned with align_to_record
+    and takes up to records_per_sample records that start in the stratum.
+    Returns (offsets, records, unterminated) lists; line numbers are unknown.
+    """
+    size = os.path.getsize(file_path)
+    data_start = 0
+    if context.header_offset is not None:
+        with open(file_path, 'rb') as f:
+            f.seek(context.header_offset)
+            for line_nums, offsets, records, unterminated in iter_record_chunks(
+                    f, context.quote_char, 2, SAMPLE_WINDOW):
+                data_start = offsets[1] if len(offsets) > 1 else size
+                break
+    rng = np.random.default_rng(seed)
+    width = (size - data_start) / num_samples
+    sample = ([], [], [])
+    with open(file_path, 'rb') as f:
+        for k in range(num_samples):
+            stratum_start = data_start + int(k * width)
+            stratum_end = data_start + int((k + 1) * width)
+            if stratum_end <= stratum_start:
+                continue
+            start = align_to_record(f, stratum_start + int(rng.random() * (stratum_end - stratum_start)), context)
+            if start >= stratum_end:
+                continue
+            f.seek(start)
+            taken = 0
+            for line_nums, offsets, records, unterminated in iter_record_chunks(
+                    f, context.quote_char, records_per_sample, SAMPLE_WINDOW):
+                for offset, record, flag in zip(offsets, records, unterminated):
+                    if offset >= stratum_end or taken >= records_per_sample:
+                        break
+                    sample[0].append(offset)
+                    sample[1].append(record)
+                    sample[2].append(flag)
+                    taken += 1
+                break
+    return sample
+
+def sample_records_reservoir(file_path: str, context: ScanContext, sample_size: int, seed: int = 0) -> tuple:
+    """A uniform random sample of sample_size data records from one streaming pass
+    
+    Each record gets a random key and the sample_size smallest keys are
+    kept, so memory stays at one chunk plus the sample. Returns (line_nums,
+    offsets, records, unterminated) lists in file order; context.total_records
+    is set to the number of data records in the file.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.zeros(0)
+    kept = []
+    context.total_records = 0
+    with open_input(file_path) as f:
+        for line_nums, offsets, records, unterminated in iter_record_chunks(f, context.quote_char):
+            candidates = [(num, offset, record, flag) for num, offset, record, flag
+                          in zip(line_nums, offsets, records, unterminated) if offset != context.header_offset]
+            context.total_records += len(candidates)
+            keys = np.concatenate([keys, rng.random(len(candidates))])
+            kept.extend(candidates)
+            if len(kept) > sample_size:
+                best = np.argpartition(keys, sample_size)[:sample_size]
+                keys = keys[best]
+                kept = [kept[i] for i in best]
+    kept.sort(key=lambda record: record[1])
+    return tuple(list(column) for column in zip(*kept)) if kept else ([], [], [], [])
 
 class CSVDebugger:
     def __init__(self):
         self.encoding = None
+        self.encoding_report = None
         self.delimiter = None
         self.quote_char = '"'
         
-    def detect_encoding(self, file_path: str, sample_size: int = 10000) -> str:
-        """Detect file encoding"""
+    def detect_encoding(self, file_path: str, sample_size: int = ENCODING_SAMPLE_SIZE,
+                        full_scan: bool = True) -> str:
+        """Detect file encoding
+        
+        A byte order mark decides it outright. Otherwise the whole file (only
+        the first sample_size bytes without full_scan) is validated as UTF-8
+        (see Utf8Scan, kept as self.encoding_report) and chardet only looks
+        at the lines that are not valid UTF-8. A file with both valid
+        multi-byte UTF-8 and invalid bytes stays utf-8; the invalid lines are
+        reported and decoded with replacement characters.
+        """
+        self.encoding_report = None
         try:
-            with open(file_path, 'rb') as f:
-                raw_data = f.read(sample_size)
-                result = chardet.detect(raw_data)
-                encoding = result['encoding']
-                confidence = result['confidence']
-                print(f"Detected encoding: {encoding} (confidence: {confidence:.2f})")
-                return encoding
+            with open_input(file_path) as f:
+                head = f.read(4)
+            for bom, encoding in BYTE_ORDER_MARKS:
+                if head.startswith(bom):
+                    print(f"Detected encoding: {encoding} (byte order mark)")
+                    return encoding
+            
+            scan = Utf8Scan(sample_size)
+            scan.scan(file_path, stop=None if full_scan else sample_size)
+            self.encoding_report = scan
+            return self.encoding_from_scan(scan)
         except Exception as e:
             print(f"Encoding detection failed: {e}. Using utf-8.")
             return 'utf-8'
     
+    def encoding_from_scan(self, scan: Utf8Scan) -> str:
+        """The encoding detect_encoding picks for what scan has validated"""
+        if not scan.invalid_sequences:
+            print(f"Detected encoding: utf-8 ({'valid UTF-8' if scan.utf8_non_ascii else 'ASCII only'}, "
+                  f"{scan.bytes_scanned:,} bytes checked)")
+            return 'utf-8'
+        
+        if scan.invalid:
+            first = scan.invalid.examples[0]
+            print(f"Invalid UTF-8: {scan.invalid_sequences:,} sequences on {len(scan.invalid):,} lines "
+                  f"(first on line {scan.invalid.lines.first}); e.g. line {first['line_num']}, "
+                  f"byte {first['offset']:,}: {first['bytes']}")
+        else:
+            print(f"Invalid UTF-8: {scan.invalid_sequences:,} sequences in sampled records")
+        result = chardet.detect(bytes(scan.failing_sample))
+        print(f"Invalid lines look like {result['encoding']} (confidence: {result['confidence']:.2f})")
+        if scan.utf8_non_ascii:
+            print("Detected encoding: utf-8 (mixed: invalid lines are decoded with replacement characters)")
+            return 'utf-8'
+        if not result['encoding'] or result['confidence'] < MIN_ENCODING_CONFIDENCE:
+            print("Detected encoding: latin-1 (low confidence guess; every byte decodes)")
+            return 'latin-1'
+        print(f"Detected encoding: {result['encoding']}")
+        return result['encoding']
+    
     def analyze_csv_structure(self, file_path: str, sample_size: int = 100) -> Dict[str, Any]:
         """Analyze the basic structure of the CSV file"""
         print("=" * 80)
@@ -45,7 +1938,7 @@ class CSVDebugger:
         self.encoding = self.detect_encoding(file_path)
         
         try:
-            with open(file_path, 'r', encoding=self.encoding, errors='replace') as f:
+            with open_input(file_path, 'r', encoding=self.encoding, errors='replace') as f:
                 lines = []
                 total_lines = 0
                 
@@ -68,15 +1961,11 @@ class CSVDebugger:
         print(f"Analyzing first {len(lines)} lines...")
         
         # Analyze potential delimiters
-        delimiter_analysis = {',': 0, ';': 0, '\t': 0, '|': 0}
+        likely_delimiter, delimiter_analysis = self.sniff_dialect(file_path, sample_size)
         field_counts = Counter()
         quote_analysis = {'"': 0, "'": 0}
         
         for i, line in enumerate(lines):
-            # Count potential delimiters
-            for delim in delimiter_analysis:
-                delimiter_analysis[delim] += line.count(delim)
-            
             # Count quotes
             for quote in quote_analysis:
                 quote_analysis[quote] += line.count(quote)
@@ -84,8 +1973,6 @@ class CSVDebugger:
             if i < 10:  # Show first 10 lines
                 print(f"Line {i+1}: {len(line)} chars | {line[:100]}{'...' if len(line) > 100 else ''}")
         
-        # Determine most likely delimiter
-        likely_delimiter = max(delimiter_analysis, key=delimiter_analysis.get)
         self.delimiter = likely_delimiter
         
         # Analyze field counts with likely delimiter
@@ -93,8 +1980,7 @@ class CSVDebugger:
             field_count = line.count(likely_delimiter) + 1
             field_counts[field_count] += 1
         
-        print(f"\nDelimiter analysis: {delimiter_analysis}")
-        print(f"Most likely delimiter: '{likely_delimiter}'")
+        print(f"\nMost likely delimiter: '{likely_delimiter}' (confidence {delimiter_analysis['confidence']:.2f})")
         print(f"Quote analysis: {quote_analysis}")
         print(f"Field count distribution: {dict(field_counts.most_common(10))}")
         
@@ -112,9 +1998,458 @@ class CSVDebugger:
             'delimiter_analysis': delimiter_analysis,
             'header_line': header_line,
             'encoding': self.encoding,
+            'encoding_report': self.encoding_report,
             'sample_lines': lines[:20]  # Keep first 20 lines for further analysis
         }
     
+    def sniff_dialect(self, file_path: str, sample_size: int = 100) -> tuple:
+        """Most likely delimiter, by how consistent its field count is outside quotes
+        
+        sample_size records are taken from the start, the middle and the end
+        of the file (quoted line breaks included; only the start of a
+        compressed input, which cannot seek). Each candidate delimiter
+        scores the share of sampled records that, split as CSV, have its most
+        common field count and no quote left inside a field (0 if that count
+        is 1). confidence is
+        best score * best score / sum of all scores, so it drops when a
+        runner-up is nearly as consistent. Returns (delimiter, analysis).
+        """
+        size = os.path.getsize(file_path) if not is_compressed(file_path) else 0
+        regions = {}
+        seen = set()
+        with open_input(file_path) as f:
+            for region in ['start', 'middle', 'end'] if size else ['start']:
+                if region == 'start':
+                    offset = 0
+                else:
+                    sampled = [record for records in regions.values() for record in records]
+                    average = sum(len(record) + 1 for record in sampled) / len(sampled) if sampled else 1
+                    offset = size // 2 if region == 'middle' else max(0, size - int(average * sample_size * 2))
+                f.seek(offset)
+                if offset:
+                    f.readline()  # Start on the next line
+                records = []
+                for line_nums, offsets, raw_records, unterminated in iter_record_chunks(
+                        f, self.quote_char, sample_size, block_size=SAMPLE_WINDOW):
+                    records.extend((record_offset, record) for record_offset, record in zip(offsets, raw_records)
+                                   if record.strip())
+                    if region != 'end' and len(records) >= sample_size:
+                        break
+                records = records[-sample_size:] if region == 'end' else records[:sample_size]
+                regions[region] = [record.decode(self.encoding or 'utf-8', errors='replace')
+                                   for record_offset, record in records if record_offset not in seen]
+                seen.update(record_offset for record_offset, record in records)
+        
+        candidates = {}
+        for delimiter in DELIMITER_CANDIDATES:
+            # (field count, quote left inside a field) per record: splitting on the wrong
+            # delimiter breaks quoted fields open, leaving their quotes mid-field
+            region_splits = {}
+            for region, records in regions.items():
+                region_splits[region] = []
+                for record in records:
+                    fields = self._split_csv_line(record, delimiter)
+                    region_splits[region].append((len(fields), any(self.quote_char in field for field in fields)))
+            counts = Counter(count for splits in region_splits.values() for count, stray_quote in splits)
+            field_count = counts.most_common(1)[0][0] if counts else 1
+            
+            def consistent(splits):
+                return sum(count == field_count and not stray_quote for count, stray_quote in splits)
+            
+            total = sum(counts.values())
+            consistency = sum(consistent(splits) for splits in region_splits.values()) / total if total else 0.0
+            candidates[delimiter] = {
+                'field_count': field_count,
+                'consistency': round(consistency, 4),
+                'score': round(consistency if field_count > 1 else 0.0, 4),
+                'regions': {region: round(consistent(splits) / len(splits), 4)
+                            for region, splits in region_splits.items() if splits}
+            }
+        
+        likely_delimiter = max(DELIMITER_CANDIDATES, key=lambda d: (candidates[d]['score'], candidates[d]['field_count']))
+        best = candidates[likely_delimiter]['score']
+        total_score = sum(candidate['score'] for candidate in candidates.values())
+        confidence = best * best / total_score if total_score else 0.0
+        analysis = {
+            'delimiter': likely_delimiter,
+            'confidence': round(confidence, 4),
+            'records_sampled': {region: len(records) for region, records in regions.items()},
+            'candidates': candidates
+        }
+        
+        winner = candidates[likely_delimiter]
+        print(f"Delimiter '{likely_delimiter}' (confidence {confidence:.2f}): {winner['field_count']} fields in "
+              f"{winner['consistency']:.1%} of {sum(analysis['records_sampled'].values())} sampled records "
+              f"(start/middle/end: {', '.join(f'{share:.0%}' for share in winner['regions'].values())})")
+        if confidence < MIN_DIALECT_CONFIDENCE:
+            print(f"Warning: low delimiter confidence; pass --delimiter if '{likely_delimiter}' is wrong")
+        return likely_delimiter, analysis
+    
+    def scan_file(self, file_path: str, checks: List[ScanCheck], delimiter: str = None,
+                  has_header: bool = True, expected_schema: Optional[Dict[str, str]] = None,
+                  chunk_records: int = SCAN_CHUNK_RECORDS) -> ScanContext:
+        """Read the file once and feed every chunk of records to all checks"""
+        context = ScanContext(file_path, self.encoding or 'utf-8', delimiter or self.delimiter or ',',
+                              self.quote_char, has_header, expected_schema)
+        read_header(file_path, context)
+        
+        stats = scan_range(file_path, checks, context, 0, input_stop(file_path), 1, chunk_records)
+        context.total_records = stats['records']
+        context.total_lines = stats['lines']
+        context.last_unterminated_line = stats['last_unterminated_line']
+        for check in checks:
+            check.finish(context)
+        return context
+    
+    def scan_stream_parallel(self, file_path: str, make_checks, workers: int, delimiter: str = None,
+                             has_header: bool = True, expected_schema: Optional[Dict[str, str]] = None,
+                             chunk_records: int = SCAN_CHUNK_RECORDS) -> tuple:
+        """scan_file for inputs that cannot be split into byte ranges (compressed streams)
+        
+        This process decompresses the input and splits it into chunks of
+        records; the checks run on the chunks in a pool of workers processes,
+        at most two chunks per worker in flight, and are merged in file order.
+        Returns (context, merged checks), the same as scan_file_parallel.
+        """
+        context = ScanContext(file_path, self.encoding or 'utf-8', delimiter or self.delimiter or ',',
+                              self.quote_char, has_header, expected_schema)
+        read_header(file_path, context)
+        
+        checks = make_checks()
+        stats = {'records': 0, 'lines': 0, 'last_unterminated_line': None}
+        
+        def merge(chunk_checks):
+            for check, chunk_check in zip(checks, chunk_checks):
+                check.merge(chunk_check)
+        
+        with open_input(file_path) as f, multiprocessing.Pool(workers) as pool:
+            in_flight = collections.deque()
+            for line_nums, offsets, records, unterminated in iter_record_chunks(f, self.quote_char, chunk_records):
+                prepare_chunk(stats, context, line_nums, offsets, records, unterminated)
+                in_flight.append(pool.apply_async(_check_chunk_task, ((
+                    make_checks(), context, line_nums, offsets, records, unterminated),)))
+                if len(in_flight) >= 2 * workers:
+                    merge(in_flight.popleft().get())
+            while in_flight:
+                merge(in_flight.popleft().get())
+        
+        context.total_records = stats['records']
+        context.total_lines = stats['lines']
+        context.last_unterminated_line = stats['last_unterminated_line']
+        for check in checks:
+            check.finish(context)
+        return context, checks
+    
+    def scan_file_parallel(self, file_path: str, make_checks, workers: int, delimiter: str = None,
+                           has_header: bool = True, expected_schema: Optional[Dict[str, str]] = None,
+                           chunk_records: int = SCAN_CHUNK_RECORDS, num_ranges: int = None) -> tuple:
+        """scan_file over byte ranges in a process pool; returns (context, merged checks)
+        
+        Phase 1 counts newlines and quotes per range, so prefix sums give each
+        range's first line number and whether it starts inside a quoted field.
+        Phase 2 scans the ranges with a fresh make_checks() list each. Each
+        range reports where the record after its end starts; a range that
+        started anywhere else (e.g. because an unterminated quote earlier in
+        the file flipped the quote parity) is rescanned from that offset, in
+        parallel rounds until all ranges agree. Results are merged in file
+        order, so they are the same as scan_file's.
+        """
+        context = ScanContext(file_path, self.encoding or 'utf-8', delimiter or self.delimiter or ',',
+                              self.quote_char, has_header, expected_schema)
+        read_header(file_path, context)
+        
+        if num_ranges is None:
+            num_ranges = max(1, min(workers * 4, os.path.getsize(file_path) // PARALLEL_MIN_RANGE_SIZE))
+        boundaries = range_boundaries(file_path, num_ranges)
+        ranges = list(zip(boundaries[:-1], boundaries[1:]))
+        quote = self.quote_char.encode()
+        
+        with multiprocessing.Pool(workers) as pool:
+            counts = pool.map(_count_range, [(file_path, start, stop, quote) for start, stop in ranges])
+            
+            tasks = []
+            line_num, quotes = 1, 0
+            for (start, stop), (range_newlines, range_quotes) in zip(ranges, counts):
+                tasks.append((file_path, make_checks(), context, start, stop, line_num, quotes % 2 == 1,
+                              chunk_records))
+                line_num += range_newlines
+                quotes += range_quotes
+            results = pool.map(_scan_range_task, tasks)
+            
+            while True:
+                # Check every range against where the previous one handed off
+                redo = []
+                handoff_offset, handoff_line = 0, 1
+                for k, (start, stop) in enumerate(ranges):
+                    range_checks, first_offset, stats = results[k]
+                    if handoff_offset >= stop:
+                        # The previous range's last record covers this whole range
+                        if stats['records']:
+                            results[k] = (make_checks(), handoff_offset, dict(stats, records=0, lines=0,
+                                                                               handoff_offset=handoff_offset,
+                                                                               handoff_line=handoff_line))
+                        continue
+                    if first_offset != handoff_offset:
+                        redo.append(k)
+                        tasks[k] = (file_path, make_checks(), context, handoff_offset, stop, handoff_line,
+                                    False, chunk_records)
+                    handoff_offset, handoff_line = stats['handoff_offset'], stats['handoff_line']
+                if not redo:
+                    break
+                for k, result in zip(redo, pool.map(_scan_range_task, [tasks[k] for k in redo])):
+                    results[k] = result
+        
+        checks = make_checks()
+        for range_checks, first_offset, stats in results:
+            for check, range_check in zip(checks, range_checks):
+                check.merge(range_check)
+            context.total_records += stats['records']
+            context.total_lines += stats['lines']
+            if stats.get('last_unterminated_line') is not None:
+                context.last_unterminated_line = stats['last_unterminated_line']
+        for check in checks:
+            check.finish(context)
+        return context, checks
+    
+    def run_single_pass(self, file_path: str, delimiter: str = None, has_header: bool = True,
+                        expected_schema: Optional[Dict[str, str]] = None,
+                        sample_size: int = 100, workers: int = 1, cache: Optional[ScanCache] = None,
+                        quarantine: Optional[QuarantineWriter] = None) -> tuple:
+        """Run all default checks in one pass over the file (split into byte ranges over workers processes if > 1)
+        
+        Returns (structure_info, malformed_info, results), where the first two
+        have the shapes used by generate_summary_report (issues as LineRanges
+        and IssueLogs) and results maps each check's name to its JSON-ready result.
+        With a cache, an unchanged file is not scanned again and a file that
+        was appended to is only scanned from where the last scan ended.
+        A quarantine writer splits the records into its outputs in the same
+        pass; the cache is not used then.
+        """
+        print("=" * 80)
+        print("SINGLE-PASS SCAN")
+        print("=" * 80)
+        
+        if quarantine is not None:
+            cache = None  # The outputs are written while scanning
+        
+        def make_checks():
+            return default_checks(expected_schema, sample_size) + ([quarantine.spawn()] if quarantine else [])
+        
+        stat = os.stat(input_path(file_path))
+        cache_options = (delimiter, has_header, expected_schema, sample_size, self.encoding, self.quote_char)
+        entry, status = cache.lookup(file_path, cache_options) if cache else (None, None)
+        delimiter_analysis = None
+        if status:
+            context, checks = entry['context'], entry['checks']
+            self.encoding, delimiter = context.encoding, context.delimiter
+            self.encoding_report = context.encoding_report
+            delimiter_analysis = entry['delimiter_analysis']
+        else:
+            if self.encoding is None:
+                self.encoding = self.detect_encoding(file_path)
+            if delimiter is None:
+                delimiter, delimiter_analysis = self.sniff_dialect(file_path, sample_size)
+        self.delimiter = delimiter
+        print(f"Delimiter: '{delimiter}'")
+        
+        if status == 'hit':
+            print(f"Unchanged since the last scan: using cached results")
+        elif status == 'append':
+            print(f"File grew by {stat.st_size - entry['size']:,} bytes: resuming the cached scan "
+                  f"at line {entry['resume_line']:,}")
+            stats = scan_range(file_path, checks, context, entry['size'], stat.st_size, entry['resume_line'])
+            if self.encoding_report is not None:
+                self.encoding_report.scan(file_path, entry['size'], entry['resume_line'])
+            context.total_records += stats['records']
+            context.total_lines += stats['lines']
+            if stats['last_unterminated_line'] is not None:
+                context.last_unterminated_line = stats['last_unterminated_line']
+            for check in checks:
+                check.finish(context)
+        elif workers > 1 and is_compressed(file_path):
+            context, checks = self.scan_stream_parallel(file_path, make_checks, workers, delimiter,
+                                                        has_header, expected_schema)
+        elif workers > 1:
+            context, checks = self.scan_file_parallel(file_path, make_checks, workers, delimiter,
+                                                      has_header, expected_schema)
+        else:
+            checks = make_checks()
+            context = self.scan_file(file_path, checks, delimiter, has_header, expected_schema)
+        context.encoding_report = self.encoding_report
+        if cache and status != 'hit':
+            cache.save(file_path, cache_options, stat, context, checks, delimiter_analysis)
+        if context.headers:
+            print(f"Detected {len(context.headers)} columns: {context.headers}")
+        for check in checks:
+            check.report()
+        results = {check.name: check.result() for check in checks}
+        
+        structure = results['structure']
+        checks = {check.name: check for check in checks}
+        field_count_issues = checks['field_count'].field_count_issues
+        quote_issues = checks['quoting'].quote_issues
+        malformed_records = LineRanges()
+        malformed_records.merge(field_count_issues.lines)
+        malformed_records.merge(quote_issues.lines)
+        if malformed_records:
+            print(f"\n*** MOST LIKELY MALFORMED RECORD ***")
+            print(f"Line {malformed_records.first}")
+        
+        structure_info = {
+            'total_lines': structure['total_lines'],
+            'field_counts': structure['field_counts'],
+            'likely_delimiter': delimiter,
+            'delimiter_analysis': delimiter_analysis,
+            'header_line': context.header_line,
+            'encoding': self.encoding,
+            'encoding_report': self.encoding_report,
+            'sample_lines': structure['sample_lines']
+        }
+        malformed_info = {
+            'total_records': structure['total_records'],
+            'valid_records': results['field_count']['valid_records'],
+            'malformed_records': malformed_records,
+            'field_count_issues': field_count_issues,
+            'quote_issues': quote_issues,
+            'encoding_issues': checks['non_ascii'].encoding_issues,
+            'empty_lines': checks['structure'].empty_lines,
+            'headers': context.headers
+        }
+        return structure_info, malformed_info, results
+    
+    def estimate_error_rates(self, file_path: str, num_samples: int = 1000, records_per_sample: int = 10,
+                             method: str = 'seek', delimiter: str = None, has_header: bool = True,
+                             expected_schema: Optional[Dict[str, str]] = None, confidence: float = 0.95,
+                             seed: int = 0) -> Dict[str, Any]:
+        """Estimate issue rates from a sample of records instead of reading the whole file
+        
+        method 'seek' reads up to records_per_sample records at each of
+        num_samples stratified offsets (see sample_records_seek), so the cost
+        depends on num_samples, not on the file size. 'reservoir' streams the
+        file once and keeps a uniform sample of num_samples * records_per_sample
+        records (with real line numbers). Every issue rate comes with a Wilson
+        interval at the given confidence; records read at the same seek point
+        are treated as independent, so issues that cluster get intervals that
+        are somewhat too narrow. Seeking cannot know the quote state of the
+        whole file: an unterminated quote that swallows the following lines
+        in a full scan only counts once here - use 'reservoir' when that
+        matters. Compressed inputs cannot seek and always use 'reservoir'.
+        A detected encoding is only checked on the first ENCODING_SAMPLE_SIZE
+        bytes and the sampled records.
+        """
+        print("=" * 80)
+        print("SAMPLING ESTIMATE")
+        print("=" * 80)
+        
+        detected = self.encoding is None
+        if detected:
+            # Only the head: validating the whole file would read every byte before the first sample
+            self.encoding = self.detect_encoding(file_path, full_scan=False)
+        if delimiter is None:
+            delimiter, delimiter_analysis = self.sniff_dialect(file_path)
+        self.delimiter = delimiter
+        context = ScanContext(file_path, self.encoding or 'utf-8', delimiter, self.quote_char,
+                              has_header, expected_schema)
+        read_header(file_path, context)
+        if context.expected_field_count is None:
+            print("No records found.")
+            return {}
+        
+        if method == 'seek' and is_compressed(file_path):
+            print("Compressed input cannot seek: sampling with one streaming pass (reservoir)")
+            method = 'reservoir'
+        if method == 'reservoir':
+            line_nums, offsets, records, unterminated = sample_records_reservoir(
+                file_path, context, num_samples * records_per_sample, seed)
+        else:
+            offsets, records, unterminated = sample_records_seek(file_path, context, num_samples,
+                                                                 records_per_sample, seed)
+            line_nums = [None] * len(offsets)
+        scan = self.encoding_report
+        if detected and scan is not None:
+            invalid_sequences = scan.invalid_sequences
+            scan.scan_records(records)
+            if scan.invalid_sequences > invalid_sequences:
+                print(f"Sampled records have invalid UTF-8 the first {scan.sample_size:,} bytes did not:")
+                self.encoding = context.encoding = self.encoding_from_scan(scan)
+        chunk = RecordChunk(line_nums, offsets, records, unterminated, context)
+        
+        # One flag per sampled record and issue
+        data = ~np.array(chunk.empty, dtype=bool)
+        quoting = np.zeros(len(records), dtype=bool)
+        quoting[list(chunk.parse_errors)] = True
+        field_counts = np.array([len(fields) for fields in chunk.fields], dtype=np.int64)
+        field_count = data & ~quoting & (field_counts != context.expected_field_count)
+        flags = {
+            'malformed': quoting | field_count,
+            'field_count': field_count,
+            'quoting': quoting,
+            'encoding': np.array(['\ufffd' in text for text in chunk.texts], dtype=bool)
+        }
+        rows, well_formed, frame = chunk.frame(context)
+        masks = chunk.masks(context)
+        for name, mask_name in [('whitespace', 'whitespace'), ('non_ascii', 'non_ascii'), ('long_fields', 'long')]:
+            flags[name] = np.zeros(len(records), dtype=bool)
+            flags[name][rows] = masks[mask_name].to_numpy(dtype=bool).any(axis=1)
+        validator = SchemaValidator(expected_schema)
+        columns = validator.column_map(context.headers or [])
+        if columns and well_formed.any():
+            typed_rows = np.asarray(rows)[well_formed]
+            type_mask = validator.validate(frame.loc[well_formed], typed_rows, columns)
+            for col, position in columns.items():
+                flags[f'type:{col}'] = np.zeros(len(records), dtype=bool)
+                flags[f'type:{col}'][typed_rows] = type_mask[position].to_numpy(dtype=bool)
+        
+        # Rates, intervals and the implied number of records in the whole file
+        n = int(np.count_nonzero(data))
+        if method == 'reservoir':
+            estimated_records = context.total_records  # The streaming pass saw every record
+        else:
+            size = os.path.getsize(file_path)
+            mean_record_bytes = (sum(len(record) for record in records) + len(records)) / len(records) if records else 0
+            estimated_records = int(size / mean_record_bytes) if mean_record_bytes else 0
+        z = statistics.NormalDist().inv_cdf((1 + confidence) / 2)
+        rates = {}
+        for name, flag in flags.items():
+            flagged = np.flatnonzero(flag & data)
+            low, high = wilson_interval(len(flagged), n, z)
+            rates[name] = {
+                'count': len(flagged),
+                'rate': len(flagged) / n if n else 0.0,
+                'ci_low': low,
+                'ci_high': high,
+                'estimated_records': int(round(len(flagged) / n * estimated_records)) if n else 0,
+                'examples': [{'offset': int(offsets[i]), 'line_num': line_nums[i], 'content': chunk.content(i)}
+                             for i in flagged[:MAX_EXAMPLES]]
+            }
+        
+        print(f"Sampled {n} records ({method}, {num_samples} sample points) of ~{estimated_records:,} in the file")
+        print(f"\n{'Issue':<24} {'Rate':>8}   {int(confidence * 100)}% interval          {'~Records':>10}")
+        print("-" * 80)
+        for name, info in rates.items():
+            print(f"{name:<24} {info['rate']:>8.3%}   [{info['ci_low']:.3%}, {info['ci_high']:.3%}]"
+                  f"{info['estimated_records']:>14,}")
+        
+        malformed = rates['malformed']
+        if not n:
+            print("\nNo data records sampled.")
+        elif malformed['count']:
+            example = malformed['examples'][0]
+            print(f"\n*** NOT LOADABLE AS IS: ~{malformed['rate']:.3%} of records are malformed "
+                  f"(e.g. byte offset {example['offset']}) ***")
+        else:
+            print(f"\nNo malformed records sampled: at most {malformed['ci_high']:.3%} of records are malformed "
+                  f"({int(confidence * 100)}% confidence)")
+        
+        return {
+            'method': method,
+            'num_samples': num_samples,
+            'records_sampled': n,
+            'estimated_total_records': estimated_records,
+            'confidence': confidence,
+            'rates': rates
+        }
+    
     def _split_csv_line(self, line: str, delimiter: str) -> List[str]:
         """Split CSV line handling quotes properly"""
         try:
@@ -126,85 +2461,86 @@ class CSVDebugger:
     
     def detect_malformed_records(self, file_path: str, delimiter: str = None, 
                                has_header: bool = True, expected_columns: Optional[List[str]] = None) -> Dict[str, Any]:
-        """Detect malformed records by parsing the entire file"""
+        """Detect malformed records by scanning the entire file
+        
+        Record boundaries and field counts come from iter_record_boundaries
+        over an mmap of the file, so quoted line breaks do not split records
+        and valid records are never decoded. Compressed inputs cannot be
+        mapped; they are streamed through the structure, field count and
+        quoting checks of the single-pass scan instead.
+        """
         print("\n" + "=" * 80)
         print("MALFORMED RECORDS DETECTION")
         print("=" * 80)
         
         if delimiter is None:
             delimiter = self.delimiter or ','
+        if is_compressed(file_path):
+            return self._detect_malformed_records_stream(file_path, delimiter, has_header)
         
-        malformed_records = []
+        malformed_records = LineRanges()
         valid_records = 0
         total_records = 0
-        field_count_issues = []
-        quote_issues = []
-        encoding_issues = []
-        empty_lines = []
+        field_count_issues = IssueLog()
+        quote_issues = IssueLog()
+        encoding_issues = IssueLog()
+        empty_lines = LineRanges()
         
         expected_field_count = None
         headers = None
         
+        def content(mm, start, end):
+            line = mm[start:end].decode(self.encoding or 'utf-8', errors='replace')
+            return line[:200] + ('...' if len(line) > 200 else '')
+        
         try:
-            with open(file_path, 'r', encoding=self.encoding, errors='replace') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.rstrip('\n\r')
-                    total_records += 1
+            if os.path.getsize(file_path) == 0:
+                raise ValueError("file is empty")
+            # Records are found on the raw bytes; only the header and malformed records are decoded
+            with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for offsets, ends, line_nums, field_counts, unterminated in iter_record_boundaries(
+                        mm, delimiter, self.quote_char):
+                    total_records += len(offsets)
                     
                     # Skip empty lines
-                    if not line.strip():
-                        empty_lines.append(line_num)
-                        continue
-                    
-                    # Get headers from first line
-                    if line_num == 1 and has_header:
-                        headers = self._split_csv_line(line, delimiter)
-                        expected_field_count = len(headers)
-                        print(f"Expected {expected_field_count} fields based on header")
-                        continue
+                    empty = field_counts == 0
+                    empty_lines.extend(line_nums[empty].tolist())
+                    data = ~empty
                     
-                    # If no header, use first data line to determine field count
+                    # Get headers (or the field count) from the first record
                     if expected_field_count is None:
-                        fields = self._split_csv_line(line, delimiter)
+                        first = np.flatnonzero(data)
+                        if not len(first):
+                            continue
+                        first = first[0]
+                        fields = self._split_csv_line(mm[offsets[first]:ends[first]].decode(
+                            self.encoding or 'utf-8', errors='replace'), delimiter)
                         expected_field_count = len(fields)
-                        print(f"Expected {expected_field_count} fields based on first line")
-                    
-                    # Parse the line
-                    try:
-                        fields = self._split_csv_line(line, delimiter)
-                        field_count = len(fields)
-                        
-                        # Check field count
-                        if field_count != expected_field_count:
-                            field_count_issues.append({
-                                'line_num': line_num,
-                                'expected': expected_field_count,
-                                'actual': field_count,
-                                'content': line[:200] + ('...' if len(line) > 200 else '')
-                            })
-                            malformed_records.append(line_num)
+                        if has_header:
+                            headers = fields
+                            data[first] = False
+                            print(f"Expected {expected_field_count} fields based on header")
                         else:
-                            valid_records += 1
-                            
-                    except Exception as e:
-                        malformed_records.append(line_num)
-                        if 'quote' in str(e).lower():
-                            quote_issues.append({
+                            print(f"Expected {expected_field_count} fields based on first line")
+                    
+                    malformed = data & ((field_counts != expected_field_count) | unterminated)
+                    valid_records += int(np.count_nonzero(data & ~malformed))
+                    for k in np.flatnonzero(malformed):
+                        line_num = int(line_nums[k])
+                        malformed_records.add(line_num)
+                        if unterminated[k]:
+                            quote_issues.add(line_num, lambda: {
                                 'line_num': line_num,
-                                'error': str(e),
-                                'content': line[:200] + ('...' if len(line) > 200 else '')
-                            })
+                                'error': 'unterminated quoted field',
+                                'content': content(mm, offsets[k], ends[k])
+                            }, ['unterminated quoted field'])
                         else:
-                            encoding_issues.append({
+                            field_count_issues.add(line_num, lambda: {
                                 'line_num': line_num,
-                                'error': str(e),
-                                'content': line[:200] + ('...' if len(line) > 200 else '')
-                            })
-                    
-                    # Stop after analyzing reasonable number of records for performance
-                    if total_records > 100000:
-                        print(f"Analyzed first 100,000 records...")
-                        break
+                                'expected': expected_field_count,
+                                'actual': int(field_counts[k]),
+                                'content': content(mm, offsets[k], ends[k])
+                            }, [int(field_counts[k])])
         
         except Exception as e:
             print(f"Error reading file: {e}")
@@ -220,21 +2556,21 @@ class CSVDebugger:
         if field_count_issues:
             print(f"\nField Count Issues ({len(field_count_issues)} records):")
             print("-" * 60)
-            for issue in field_count_issues[:10]:  # Show first 10
+            for issue in field_count_issues.examples:
                 print(f"Line {issue['line_num']}: Expected {issue['expected']}, got {issue['actual']}")
                 print(f"  Content: {issue['content']}")
         
         if quote_issues:
             print(f"\nQuote Issues ({len(quote_issues)} records):")
             print("-" * 60)
-            for issue in quote_issues[:5]:  # Show first 5
+            for issue in quote_issues.examples[:5]:  # Show 5
                 print(f"Line {issue['line_num']}: {issue['error']}")
                 print(f"  Content: {issue['content']}")
         
         if encoding_issues:
             print(f"\nEncoding/Parsing Issues ({len(encoding_issues)} records):")
             print("-" * 60)
-            for issue in encoding_issues[:5]:  # Show first 5
+            for issue in encoding_issues.examples[:5]:  # Show 5
                 print(f"Line {issue['line_num']}: {issue['error']}")
                 print(f"  Content: {issue['content']}")
         
@@ -249,60 +2585,204 @@ class CSVDebugger:
             'headers': headers
         }
     
+    def _detect_malformed_records_stream(self, file_path: str, delimiter: str, has_header: bool) -> Dict[str, Any]:
+        """detect_malformed_records for inputs that can only be streamed"""
+        checks = [StructureCheck(), FieldCountCheck(), QuotingCheck()]
+        try:
+            context = self.scan_file(file_path, checks, delimiter, has_header)
+        except Exception as e:
+            print(f"Error reading file: {e}")
+            return {}
+        structure, field_count, quoting = checks
+        
+        malformed_records = LineRanges()
+        malformed_records.merge(field_count.field_count_issues.lines)
+        malformed_records.merge(quoting.quote_issues.lines)
+        print(f"\nAnalysis Results:")
+        print(f"Total records analyzed: {context.total_records}")
+        print(f"Valid records: {field_count.valid_records}")
+        print(f"Malformed records: {len(malformed_records)}")
+        print(f"Empty lines: {len(structure.empty_lines)}")
+        field_count.report()
+        quoting.report()
+        
+        return {
+            'total_records': context.total_records,
+            'valid_records': field_count.valid_records,
+            'malformed_records': malformed_records,
+            'field_count_issues': field_count.field_count_issues,
+            'quote_issues': quoting.quote_issues,
+            'encoding_issues': IssueLog(),
+            'empty_lines': structure.empty_lines,
+            'headers': context.headers
+        }
+    
     def pandas_validation(self, file_path: str, delimiter: str = None, 
-                         expected_schema: Optional[Dict[str, str]] = None) -> None:
-        """Use pandas to validate and identify issues"""
+                         expected_schema: Optional[Dict[str, str]] = None,
+                         chunk_records: int = SCAN_CHUNK_RECORDS) -> Dict[str, Any]:
+        """Use pandas to validate and identify issues, at least chunk_records records at a time
+        
+        The file is split into chunks of whole records (iter_record_chunks),
+        each read with the pyarrow engine (the C engine without pyarrow);
+        rows with too many fields are counted and skipped. Only chunks that
+        engine cannot read are read again with the python engine. Missing
+        values, dtypes (as pandas would infer them for the whole file, see
+        merge_dtypes) and schema mismatches are added up per chunk, so only
+        one chunk is in memory at a time.
+        """
         print("\n" + "=" * 80)
         print("PANDAS VALIDATION")
         print("=" * 80)
         
         if delimiter is None:
             delimiter = self.delimiter or ','
+        encoding = self.encoding or 'utf-8'
+        engine = 'pyarrow' if pa is not None else 'c'
+        context = ScanContext(file_path, encoding, delimiter, self.quote_char)
+        read_header(file_path, context)
+        if context.header_line is None:
+            print("Pandas failed to read file: no header row")
+            return {}
+        header = context.header_line.encode(encoding) + b'\n'
         
-        try:
-            # Try to read with pandas
-            df = pd.read_csv(file_path, delimiter=delimiter, encoding=self.encoding, 
-                           on_bad_lines='warn', engine='python')
-            
-            print(f"Pandas successfully loaded {len(df)} rows and {len(df.columns)} columns")
-            print(f"\nColumn names: {list(df.columns)}")
-            print(f"\nData types:")
-            print(df.dtypes)
-            
-            # Check for missing values
-            missing_values = df.isnull().sum()
-            if missing_values.any():
-                print(f"\nMissing values per column:")
-                for col, count in missing_values.items():
-                    if count > 0:
-                        percentage = (count / len(df)) * 100
-                        print(f"  {col}: {count} ({percentage:.2f}%)")
-            
-            # Show sample data
-            print(f"\nFirst 5 rows:")
-            print(df.head().to_string())
-            
-            # Schema validation if provided
-            if expected_schema:
-                print(f"\nSchema Validation:")
-                for col, expected_type in expected_schema.items():
-                    if col in df.columns:
-                        actual_type = str(df[col].dtype)
-                        if expected_type.lower() not in actual_type.lower():
-                            print(f"  {col}: Expected {expected_type}, got {actual_type}")
-                    else:
-                        print(f"  Missing column: {col}")
-            
-        except Exception as e:
-            print(f"Pandas failed to read file: {e}")
-            
-            # Try with error_bad_lines=False for older pandas versions
-            try:
-                df = pd.read_csv(file_path, delimiter=delimiter, encoding=self.encoding, 
-                               error_bad_lines=False, warn_bad_lines=True, engine='python')
-                print(f"Pandas loaded {len(df)} rows with some lines skipped")
-            except Exception as e2:
-                print(f"Alternative pandas approach also failed: {e2}")
+        stats = {'records': 0, 'lines': 0, 'last_unterminated_line': None}
+        rows = 0
+        bad_lines = 0
+        columns = None
+        dtypes = {}
+        missing_values = Counter()
+        schema_mismatches = Counter()
+        fallback_chunks = []  # [first line, last line] of chunks read with the python engine
+        failed_chunks = []  # ... and of chunks no engine could read
+        num_chunks = 0
+        head = None
+        chunk_bad_lines = []
+        short_rows = []
+        
+        def skip_bad_row(row):
+            # pyarrow's invalid_row_handler: unlike the other engines, pyarrow also rejects
+            # short rows, which are read separately so that they are padded all the same
+            if row.actual_columns < row.expected_columns:
+                short_rows.append(row.text)
+            else:
+                chunk_bad_lines.append(row.number)
+            return 'skip'
+        
+        def skip_bad_line(fields):
+            chunk_bad_lines.append(fields)  # python engine: returning None drops the line
+        
+        def add_frame(df):
+            nonlocal rows, columns, head
+            if columns is None:
+                columns = list(df.columns)
+            if head is None or head.empty:
+                head = df.head()
+            rows += len(df)
+            missing = df.isnull().sum()
+            missing_values.update({col: int(count) for col, count in missing.items() if count})
+            for col in df.columns:
+                if missing[col] < len(df):  # An all-missing chunk says nothing about the type
+                    dtypes[col] = merge_dtypes(dtypes.get(col), str(df[col].dtype))
+            for col, expected_type in (expected_schema or {}).items():
+                if col in df.columns:
+                    schema_mismatches[col] += schema_mismatch_count(df[col], expected_type)
+        
+        with open_input(file_path) as f:
+            for line_nums, offsets, records, unterminated in iter_record_chunks(f, self.quote_char, chunk_records):
+                prepare_chunk(stats, context, line_nums, offsets, records, unterminated)
+                if not records:
+                    continue
+                num_chunks += 1
+                data = header + b'\n'.join(records) + b'\n'
+                chunk_bad_lines.clear()
+                short_rows.clear()
+                frames = []
+                try:
+                    with warnings.catch_warnings(record=True) as caught:
+                        warnings.simplefilter('always', pd.errors.ParserWarning)
+                        frames.append(pd.read_csv(io.BytesIO(data), delimiter=delimiter, encoding=encoding,
+                                                  engine=engine,
+                                                  on_bad_lines=skip_bad_row if engine == 'pyarrow' else 'warn'))
+                    # The C engine reports the lines it skips in warnings
+                    for warning in caught:
+                        chunk_bad_lines.extend(re.findall(r'Skipping line (\d+)', str(warning.message)))
+                    # pyarrow keeps columns with undecodable bytes as bytes instead of failing
+                    for col in frames[0].columns:
+                        values = frames[0][col].dropna()
+                        if values.dtype == object and len(values) and isinstance(values.iloc[0], bytes):
+                            raise UnicodeDecodeError(encoding, values.iloc[0], 0, 1, f'undecodable bytes in {col}')
+                    if short_rows:
+                        short_data = header + '\n'.join(short_rows).encode(encoding) + b'\n'
+                        frames.append(pd.read_csv(io.BytesIO(short_data), delimiter=delimiter, encoding=encoding,
+                                                  engine='c'))
+                except Exception:
+                    chunk_bad_lines.clear()
+                    frames = []
+                    fallback_chunks.append([line_nums[0], line_nums[-1]])
+                    try:
+                        frames.append(pd.read_csv(io.BytesIO(data), delimiter=delimiter, encoding=encoding,
+                                                  engine='python', on_bad_lines=skip_bad_line))
+                    except Exception as e:
+                        failed_chunks.append([line_nums[0], line_nums[-1]])
+                        print(f"Pandas failed to read lines {line_nums[0]}-{line_nums[-1]}: {e}")
+                        continue
+                
+                for df in frames:
+                    add_frame(df)
+                bad_lines += len(chunk_bad_lines)
+        
+        if columns is None:
+            print("Pandas failed to read file: no data rows could be read")
+            return {}
+        
+        print(f"Pandas successfully loaded {rows} rows and {len(columns)} columns "
+              f"({engine} engine, {len(fallback_chunks)} of {num_chunks} chunks "
+              f"read with the python engine)")
+        if bad_lines:
+            print(f"Skipped {bad_lines} bad lines (wrong number of fields)")
+        for first, last in failed_chunks:
+            print(f"  Unreadable lines {first}-{last}")
+        print(f"\nColumn names: {columns}")
+        print(f"\nData types:")
+        print(pd.Series({col: dtypes.get(col, 'object') for col in columns}, dtype=object))
+        
+        # Check for missing values
+        if missing_values:
+            print(f"\nMissing values per column:")
+            for col in columns:
+                count = missing_values[col]
+                if count > 0:
+                    percentage = (count / rows) * 100
+                    print(f"  {col}: {count} ({percentage:.2f}%)")
+        
+        # Show sample data
+        print(f"\nFirst 5 rows:")
+        print(head.to_string())
+        
+        # Schema validation if provided
+        missing_columns = [col for col in expected_schema or {} if col not in columns]
+        if expected_schema:
+            print(f"\nSchema Validation:")
+            for col, expected_type in expected_schema.items():
+                if col in missing_columns:
+                    print(f"  Missing column: {col}")
+                elif schema_mismatches[col]:
+                    print(f"  {col}: Expected {expected_type}, got {dtypes.get(col, 'object')} "
+                          f"({schema_mismatches[col]} values do not convert)")
+        
+        return {
+            'engine': engine,
+            'rows': rows,
+            'columns': columns,
+            'dtypes': {col: dtypes.get(col, 'object') for col in columns},
+            'missing_values': dict(missing_values),
+            'bad_lines': bad_lines,
+            'schema_mismatches': dict(schema_mismatches),
+            'missing_columns': missing_columns,
+            'chunks': num_chunks,
+            'fallback_chunks': fallback_chunks,
+            'failed_chunks': failed_chunks
+        }
     
     def spark_compatible_validation(self, file_path: str, delimiter: str = None, 
                                   expected_schema: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
@@ -314,113 +2794,122 @@ class CSVDebugger:
         if delimiter is None:
             delimiter = self.delimiter or ','
         
-        spark_issues = []
+        spark_issues = IssueLog()
+        culprit = None
         data_type_issues = []
         bigquery_issues = []
         
         try:
             # Read with pandas using strict mode
-            df = pd.read_csv(file_path, delimiter=delimiter, encoding=self.encoding, 
-                           dtype=str, keep_default_na=False)  # Read everything as string first
+            with open_input(file_path) as f:
+                df = pd.read_csv(f, delimiter=delimiter, encoding=self.encoding,
+                                 dtype=str, keep_default_na=False)  # Read everything as string first
             
             print(f"Loaded {len(df)} rows for Spark-compatible analysis")
             
-            # Check each record for Spark/BigQuery compatibility issues
-            for idx, row in df.iterrows():
+            # Check every record for Spark/BigQuery compatibility issues, one column at a time
+            df = df.fillna('')
+            validator = SchemaValidator(expected_schema)
+            masks = issue_masks(df)
+            schema_columns = validator.column_map(list(df.columns))
+            masks['type'] = validator.validate(df, np.arange(len(df)) + 2,  # Row numbers as in the report
+                                               {col: col for col in schema_columns})
+            masks = {name: (mask.to_numpy(dtype=bool), np.asarray(mask.columns)) for name, mask in masks.items()}
+            flagged = np.zeros(len(df), dtype=bool)
+            for values, columns in masks.values():
+                if values.shape[1]:
+                    flagged |= values.any(axis=1)
+            
+            # Row reports only for the flagged rows
+            records = df.to_numpy()
+            df_columns = list(df.columns)
+            type_values = {col: df[col].to_numpy() for col in schema_columns}
+            for idx in np.flatnonzero(flagged):
                 row_issues = []
-                actual_row_num = idx + 2  # +1 for 0-based index, +1 for header
+                kinds = []
+                actual_row_num = int(idx) + 2  # +1 for 0-based index, +1 for header
                 
-                # Check for empty strings vs nulls (Spark treats these differently)
-                empty_fields = [col for col, val in row.items() if val == '']
+                def flagged_columns(name):
+                    values, columns = masks[name]
+                    return columns[values[idx]].tolist()
+                
+                # Empty strings vs nulls (Spark treats these differently)
+                empty_fields = flagged_columns('empty')
                 if empty_fields:
                     row_issues.append(f"Empty string fields: {empty_fields}")
+                    kinds.append('empty')
                 
-                # Check for leading/trailing whitespace (BigQuery can be sensitive)
-                whitespace_fields = [col for col, val in row.items() if isinstance(val, str) and val != val.strip()]
+                # Leading/trailing whitespace (BigQuery can be sensitive)
+                whitespace_fields = flagged_columns('whitespace')
                 if whitespace_fields:
                     row_issues.append(f"Whitespace fields: {whitespace_fields}")
+                    kinds.append('whitespace')
                 
-                # Check for potential data type issues if schema provided
-                if expected_schema:
-                    for col, expected_type in expected_schema.items():
-                        if col in row:
-                            val = row[col]
-                            if self._check_data_type_compatibility(val, expected_type):
-                                row_issues.append(f"Type issue in {col}: '{val}' (expected {expected_type})")
+                # Data type issues if schema provided
+                type_fields = flagged_columns('type')
+                for col in type_fields:
+                    row_issues.append(f"Type issue in {col}: '{type_values[col][idx]}' (expected {validator.column_types[col]})")
+                if type_fields:
+                    kinds.append('type')
                 
-                # Check for special characters that might cause issues
-                special_char_fields = []
-                for col, val in row.items():
-                    if isinstance(val, str) and any(ord(c) > 127 for c in val):
-                        special_char_fields.append(col)
+                # Special characters that might cause issues
+                special_char_fields = flagged_columns('non_ascii')
                 if special_char_fields:
                     row_issues.append(f"Special characters in: {special_char_fields}")
+                    kinds.append('non_ascii')
                 
-                # Check for very long fields (BigQuery has limits)
-                long_fields = [col for col, val in row.items() if isinstance(val, str) and len(val) > 1000]
+                # Very long fields (BigQuery has limits)
+                long_fields = flagged_columns('long')
                 if long_fields:
-                    row_issues.append(f"Very long fields (>1000 chars): {long_fields}")
+                    row_issues.append(f"Very long fields (>{LONG_FIELD_LENGTH} chars): {long_fields}")
+                    kinds.append('long')
                 
-                if row_issues:
-                    spark_issues.append({
+                def make_example():
+                    content = str(dict(zip(df_columns, records[idx])))
+                    return {
                         'row_num': actual_row_num,
                         'issues': row_issues,
-                        'content': str(dict(row))[:200] + ('...' if len(str(dict(row))) > 200 else '')
-                    })
+                        'content': content[:200] + ('...' if len(content) > 200 else '')
+                    }
                 
-                # Stop after checking reasonable number for performance
-                if idx > 10000:
-                    break
+                if culprit is None:
+                    culprit = make_example()
+                spark_issues.add(actual_row_num, make_example, kinds)
             
+            validator.report()
             print(f"\nSpark-compatible issues found: {len(spark_issues)}")
             
             if spark_issues:
                 print(f"\nPotential Spark/BigQuery Issues ({min(10, len(spark_issues))} shown):")
                 print("-" * 80)
-                for issue in spark_issues[:10]:
+                for issue in spark_issues.examples[:10]:
                     print(f"Row {issue['row_num']}: {'; '.join(issue['issues'])}")
                     if len(issue['content']) < 150:
                         print(f"  Data: {issue['content']}")
                 
                 # Find the most likely culprit (first issue)
-                if len(spark_issues) >= 1:
+                if culprit is not None:
                     print(f"\n*** MOST LIKELY MALFORMED RECORD ***")
-                    culprit = spark_issues[0]
                     print(f"Row {culprit['row_num']}: {'; '.join(culprit['issues'])}")
                     print(f"Content: {culprit['content']}")
             
             return {
                 'spark_issues': spark_issues,
-                'total_checked': min(len(df), 10000)
+                'first_issue': culprit,
+                'total_checked': len(df),
+                'schema_validation': validator.result()
             }
             
         except Exception as e:
             print(f"Spark-compatible validation failed: {e}")
             return {}
     
-    def _check_data_type_compatibility(self, value: str, expected_type: str) -> bool:
-        """Check if value is compatible with expected type"""
+    @staticmethod
+    def _check_data_type_compatibility(value: str, expected_type: str) -> bool:
+        """Check if value is compatible with expected type (one value; use SchemaValidator for columns)"""
         if not isinstance(value, str) or value == '':
             return False
-        
-        expected_type = expected_type.lower()
-        
-        try:
-            if expected_type in ['int', 'integer', 'long']:
-                int(value)
-            elif expected_type in ['float', 'double']:
-                float(value)
-            elif expected_type in ['boolean', 'bool']:
-                if value.lower() not in ['true', 'false', '1', '0', 'yes', 'no']:
-                    return True
-            elif expected_type in ['date']:
-                pd.to_datetime(value)
-            elif expected_type in ['timestamp']:
-                pd.to_datetime(value)
-        except:
-            return True  # Type conversion failed
-        
-        return False
+        return bool(type_mismatch_mask(pd.Series([value]), expected_type).iloc[0])
     
     def generate_summary_report(self, file_path: str, structure_info: Dict, 
                               malformed_info: Dict) -> None:
@@ -430,8 +2919,13 @@ class CSVDebugger:
         print("=" * 80)
         
         print(f"File: {file_path}")
-        print(f"File size: {os.path.getsize(file_path):,} bytes")
+        print(f"File size: {os.path.getsize(input_path(file_path)):,} bytes"
+              f"{' (compressed)' if is_compressed(file_path) else ''}")
         print(f"Encoding: {structure_info.get('encoding', 'unknown')}")
+        encoding_report = structure_info.get('encoding_report')
+        if encoding_report and encoding_report.invalid_sequences:
+            print(f"  Invalid UTF-8: {encoding_report.invalid_sequences:,} sequences on "
+                  f"{len(encoding_report.invalid):,} lines (first on line {encoding_report.invalid.lines.first})")
         print(f"Delimiter: '{structure_info.get('likely_delimiter', 'unknown')}'")
         
         if malformed_info:
@@ -483,6 +2977,143 @@ class CSVDebugger:
             print("- Review the specific malformed records shown above")
             print("- Consider data preprocessing before ingestion")
 
+def expand_inputs(path: str) -> List[str]:
+    """The inputs to analyze for a file path, a directory (its CSV files, compressed or not) or a
+    glob pattern, sorted; zip archives are expanded to their members"""
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in os.listdir(path)
+                 if name.lower().endswith(BATCH_EXTENSIONS + COMPRESSED_SUFFIXES)]
+    elif any(char in path for char in '*?['):
+        files = glob.glob(path, recursive=True)
+    else:
+        files = [path]
+    inputs = []
+    for file in sorted(file for file in files if os.path.isfile(file)):
+        if file.lower().endswith('.zip'):
+            inputs.extend(member for member in zip_members(file)
+                          if member.lower().endswith(BATCH_EXTENSIONS + ('.gz', '.bz2')) or file == path)
+        else:
+            inputs.append(file)
+    return inputs
+
+def file_severity(summary: Dict[str, Any]) -> str:
+    """error: the file could not be analyzed; critical: records will fail to load;
+    warning: encoding or schema type issues; info: cosmetic issues only; ok: clean"""
+    if summary.get('error'):
+        return 'error'
+    if summary['malformed_records']:
+        return 'critical'
+    if summary['encoding_issues'] or summary['invalid_utf8_lines'] or summary['type_issues']:
+        return 'warning'
+    if summary['whitespace_issues'] or summary['long_fields'] or summary['empty_lines']:
+        return 'info'
+    return 'ok'
+
+def _analyze_file_task(task) -> Dict[str, Any]:
+    """Worker: run_single_pass on one file (output captured); returns its batch summary"""
+    file_path, options = task
+    debugger = CSVDebugger()
+    debugger.encoding = options['encoding']
+    summary = {'file_path': file_path, 'file_size': os.path.getsize(input_path(file_path)), 'error': None}
+    try:
+        cache = ScanCache(options['cache_dir']) if options['cache_dir'] else None
+        quarantine = None
+        if options['quarantine_dir']:
+            quarantine = QuarantineWriter(quarantine_paths(file_path, options['quarantine_dir'],
+                                                           options['quarantine_format']))
+        with contextlib.redirect_stdout(io.StringIO()):
+            structure_info, malformed_info, results = debugger.run_single_pass(
+                file_path, options['delimiter'], has_header=options['has_header'],
+                expected_schema=options['expected_schema'], sample_size=options['sample_size'], cache=cache,
+                quarantine=quarantine)
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+        summary['severity'] = file_severity(summary)
+        return summary
+    
+    total_records = malformed_info['total_records']
+    summary.update({
+        'encoding': structure_info['encoding'],
+        'delimiter': structure_info['likely_delimiter'],
+        'total_records': total_records,
+        'valid_records': malformed_info['valid_records'],
+        'malformed_records': len(malformed_info['malformed_records']),
+        'malformed_rate': len(malformed_info['malformed_records']) / total_records if total_records else 0.0,
+        'first_malformed_line': malformed_info['malformed_records'].first,
+        'field_count_issues': len(malformed_info['field_count_issues']),
+        'quote_issues': len(malformed_info['quote_issues']),
+        'encoding_issues': len(malformed_info['encoding_issues']),
+        'invalid_utf8_lines': len(structure_info['encoding_report'].invalid) if structure_info['encoding_report'] else 0,
+        'empty_lines': len(malformed_info['empty_lines']),
+        'type_issues': results['types']['rows']['count'],
+        'whitespace_issues': results['whitespace']['rows']['count'],
+        'long_fields': results['long_fields']['rows']['count'],
+        'results': results
+    })
+    summary['severity'] = file_severity(summary)
+    return summary
+
+def analyze_files(file_paths: List[str], workers: int = 1, delimiter: str = None, has_header: bool = True,
+                  expected_schema: Optional[Dict[str, str]] = None, sample_size: int = 100,
+                  encoding: str = None, cache_dir: str = None, quarantine_dir: str = None,
+                  quarantine_format: str = 'csv') -> List[Dict[str, Any]]:
+    """Single-pass analysis of many files, one file per task in a pool of workers processes
+    
+    Returns one summary per file (counts per issue type, severity and the
+    full check results), worst first: by severity, then malformed rate.
+    With a quarantine_dir, every file's clean, repaired and rejects outputs
+    are written there (see quarantine_paths).
+    """
+    options = {'delimiter': delimiter, 'has_header': has_header, 'expected_schema': expected_schema,
+               'sample_size': sample_size, 'encoding': encoding, 'cache_dir': cache_dir,
+               'quarantine_dir': quarantine_dir, 'quarantine_format': quarantine_format}
+    tasks = [(file_path, options) for file_path in file_paths]
+    summaries = []
+    
+    def collect(summary):
+        summaries.append(summary)
+        print(f"  [{len(summaries)}/{len(tasks)}] {summary['severity']:>8}  {summary['file_path']}")
+    
+    print(f"Analyzing {len(tasks)} files with {workers} worker(s)...")
+    if workers > 1 and len(tasks) > 1:
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            for summary in pool.imap_unordered(_analyze_file_task, tasks):
+                collect(summary)
+    else:
+        for task in tasks:
+            collect(_analyze_file_task(task))
+    
+    summaries.sort(key=lambda summary: (SEVERITY_LEVELS.index(summary['severity']),
+                                        -summary.get('malformed_rate', 0.0), summary['file_path']))
+    return summaries
+
+def print_batch_report(summaries: List[Dict[str, Any]]) -> None:
+    """Combined report for analyze_files, worst files first"""
+    print("\n" + "=" * 80)
+    print("BATCH REPORT")
+    print("=" * 80)
+    
+    severities = Counter(summary['severity'] for summary in summaries)
+    print(f"Files analyzed: {len(summaries)}")
+    print("  " + ", ".join(f"{level}: {severities[level]}" for level in SEVERITY_LEVELS if severities[level]))
+    
+    print(f"\n{'severity':<9} {'records':>12} {'malformed':>10} {'rate':>8} {'encoding':>9} "
+          f"{'types':>8} {'whitespace':>10}  file")
+    print("-" * 80)
+    for summary in summaries:
+        if summary['error']:
+            print(f"{summary['severity']:<9} {summary['file_path']}: {summary['error']}")
+            continue
+        print(f"{summary['severity']:<9} {summary['total_records']:>12,} {summary['malformed_records']:>10,} "
+              f"{summary['malformed_rate']:>8.2%} {summary['encoding_issues']:>9,} {summary['type_issues']:>8,} "
+              f"{summary['whitespace_issues']:>10,}  {summary['file_path']}")
+    
+    critical = [summary for summary in summaries if summary['severity'] == 'critical']
+    if critical:
+        print(f"\n*** FIRST MALFORMED RECORD PER CRITICAL FILE ***")
+        for summary in critical:
+            print(f"{summary['file_path']}: line {summary['first_malformed_line']}")
+
 def parse_schema_string(schema_str: str) -> Dict[str, str]:
     """Parse schema string into dictionary"""
     schema = {}
@@ -493,18 +3124,62 @@ def parse_schema_string(schema_str: str) -> Dict[str, str]:
             schema[col_name.strip()] = col_type.strip()
     return schema
 
+def _json_default(value):
+    """JSON encoding for LineRanges, IssueLog and numpy values"""
+    if hasattr(value, 'as_dict'):
+        return value.as_dict()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, np.ndarray)):
+        return list(value.tolist() if isinstance(value, np.ndarray) else value)
+    return str(value)
+
+def save_results(path: str, results: Dict[str, Any]) -> None:
+    """Write a results dict to path as JSON"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, default=_json_default)
+    print(f"\nResults saved to {path}")
+
 def main():
     parser = argparse.ArgumentParser(description='Debug CSV files for malformed records (Pure Python)')
-    parser.add_argument('file_path', help='Path to CSV file')
+    parser.add_argument('file_path', help='Path to a CSV file (optionally .gz, .bz2 or .zip), a directory of CSV '
+                                          'files, a glob pattern, or archive.zip::member.csv')
     parser.add_argument('--delimiter', help='CSV delimiter (auto-detected if not specified)')
     parser.add_argument('--no-header', action='store_true', help='CSV has no header row')
     parser.add_argument('--schema', help='Expected schema as string (e.g., "col1:string,col2:int")')
     parser.add_argument('--sample-size', type=int, default=100, help='Sample size for initial analysis')
     parser.add_argument('--encoding', help='File encoding (auto-detected if not specified)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Scan byte ranges of the file (or, for a directory or glob, whole files) '
+                             'in this many parallel processes')
+    parser.add_argument('--legacy', action='store_true',
+                        help='Run the separate structure, malformed-record, pandas and Spark passes')
+    parser.add_argument('--sample', type=int, metavar='K',
+                        help='Estimate issue rates from K sample points instead of scanning the whole file')
+    parser.add_argument('--sample-method', choices=['seek', 'reservoir'], default='seek',
+                        help='seek: K stratified seek offsets; reservoir: one streaming pass, uniform sample')
+    parser.add_argument('--sample-records', type=int, default=10,
+                        help='Records read per sample point')
+    parser.add_argument('--json', metavar='PATH', help='Also save the results as JSON to PATH')
+    parser.add_argument('--cache-dir', metavar='DIR',
+                        help='Cache scan results in DIR: unchanged files are not rescanned and appended '
+                             'files are only scanned from where the last run stopped (DIR holds example rows)')
+    parser.add_argument('--quarantine', metavar='DIR',
+                        help='Also write the clean, repaired and rejected records to DIR in the same pass '
+                             '(<name>_clean, <name>_repaired and <name>_rejects.csv; disables --cache-dir)')
+    parser.add_argument('--quarantine-format', choices=['csv', 'parquet'], default='csv',
+                        help='Format of the clean and repaired outputs')
     
     args = parser.parse_args()
     
-    if not os.path.exists(args.file_path):
+    batch = (os.path.isdir(args.file_path) or any(char in args.file_path for char in '*?[') or
+             (args.file_path.lower().endswith('.zip') and os.path.isfile(args.file_path) and
+              len(zip_members(args.file_path)) > 1))
+    if batch and (args.sample or args.legacy):
+        parser.error("--sample and --legacy analyze a single file")
+    if args.quarantine and (args.sample or args.legacy):
+        parser.error("--quarantine needs the full single-pass scan")
+    if not batch and not os.path.exists(input_path(args.file_path)):
         print(f"Error: File '{args.file_path}' not found.")
         sys.exit(1)
     
@@ -515,15 +3190,9 @@ def main():
         if args.encoding:
             debugger.encoding = args.encoding
         
-        # Step 1: Analyze CSV structure
-        print(f"Analyzing CSV file: {args.file_path}")
-        structure_info = debugger.analyze_csv_structure(args.file_path, args.sample_size)
+        print(f"Analyzing {'CSV files' if batch else 'CSV file'}: {args.file_path}")
         
-        if not structure_info:
-            print("Failed to analyze file structure.")
-            sys.exit(1)
-        
-        # Step 2: Parse schema if provided
+        # Parse schema if provided
         expected_schema = None
         if args.schema:
             try:
@@ -532,6 +3201,56 @@ def main():
             except Exception as e:
                 print(f"Error parsing schema: {e}")
         
+        if args.quarantine:
+            os.makedirs(args.quarantine, exist_ok=True)
+        
+        if batch:
+            file_paths = expand_inputs(args.file_path)
+            if not file_paths:
+                print(f"Error: No CSV files found for '{args.file_path}'.")
+                sys.exit(1)
+            summaries = analyze_files(file_paths, workers=args.workers, delimiter=args.delimiter,
+                                      has_header=not args.no_header, expected_schema=expected_schema,
+                                      sample_size=args.sample_size, encoding=args.encoding,
+                                      cache_dir=args.cache_dir, quarantine_dir=args.quarantine,
+                                      quarantine_format=args.quarantine_format)
+            print_batch_report(summaries)
+            if args.json:
+                save_results(args.json, {'input': args.file_path, 'files': summaries})
+            return
+        
+        if args.sample:
+            estimate = debugger.estimate_error_rates(
+                args.file_path, num_samples=args.sample, records_per_sample=args.sample_records,
+                method=args.sample_method, delimiter=args.delimiter, has_header=not args.no_header,
+                expected_schema=expected_schema)
+            if args.json:
+                save_results(args.json, {'file_path': args.file_path, 'estimate': estimate})
+            return
+        
+        if not args.legacy:
+            # All checks in one pass over the file
+            quarantine = None
+            if args.quarantine:
+                quarantine = QuarantineWriter(quarantine_paths(args.file_path, args.quarantine,
+                                                               args.quarantine_format))
+            structure_info, malformed_info, results = debugger.run_single_pass(
+                args.file_path, args.delimiter, has_header=not args.no_header,
+                expected_schema=expected_schema, sample_size=args.sample_size, workers=args.workers,
+                cache=ScanCache(args.cache_dir) if args.cache_dir else None, quarantine=quarantine)
+            debugger.generate_summary_report(args.file_path, structure_info, malformed_info)
+            if args.json:
+                save_results(args.json, {'file_path': args.file_path, 'structure': structure_info,
+                                         'malformed': malformed_info, 'checks': results})
+            return
+        
+        # Step 1: Analyze CSV structure
+        structure_info = debugger.analyze_csv_structure(args.file_path, args.sample_size)
+        
+        if not structure_info:
+            print("Failed to analyze file structure.")
+            sys.exit(1)
+        
         # Step 3: Detect malformed records
         delimiter = args.delimiter or structure_info.get('likely_delimiter')
         malformed_info = debugger.detect_malformed_records(
@@ -541,13 +3260,17 @@ def main():
         )
         
         # Step 4: Pandas validation
-        debugger.pandas_validation(args.file_path, delimiter, expected_schema)
+        pandas_validation = debugger.pandas_validation(args.file_path, delimiter, expected_schema)
         
         # Step 4b: Spark-compatible validation (more strict)
         spark_validation = debugger.spark_compatible_validation(args.file_path, delimiter, expected_schema)
         
         # Step 5: Generate summary report
         debugger.generate_summary_report(args.file_path, structure_info, malformed_info)
+        if args.json:
+            save_results(args.json, {'file_path': args.file_path, 'structure': structure_info,
+                                     'malformed': malformed_info, 'pandas_validation': pandas_validation,
+                                     'spark_validation': spark_validation})
         
     except KeyboardInterrupt:
         print("\nAnalysis interrupted by user.")
@@ -562,4 +3285,14 @@ if __name__ == "__main__":
 # Example usage:
 # python csv_debugger.py /path/to/file.csv
 # python csv_debugger.py /path/to/file.csv --delimiter "|" --schema "id:int,name:string"
-# python csv_debugger.py /path/to/file.csv --no-header --encoding utf-8
\ No newline at end of file
+# python csv_debugger.py /path/to/file.csv --no-header --encoding utf-8
+# python csv_debugger.py /path/to/file.csv --workers 8  # parallel full-file scan
+# python csv_debugger.py /path/to/file.csv --sample 1000  # estimated issue rates from 1000 seeks
+# python csv_debugger.py /path/to/file.csv --legacy  # separate passes per stage
+# python csv_debugger.py /path/to/file.csv --json results.json  # machine-readable results
+# python csv_debugger.py /path/to/provider_drop/ --workers 8  # every CSV in a directory, worst first
+# python csv_debugger.py /path/to/file.csv --cache-dir ~/.cache/csv_debugger  # reuse/resume earlier scans
+# python csv_debugger.py /path/to/file.csv.gz --workers 8  # checks run in parallel on the decompressed stream
+# python csv_debugger.py /path/to/extract.zip --workers 8  # every member of a zip archive, in parallel
+# python csv_debugger.py /path/to/file.csv --quarantine out/ --quarantine-format parquet  # clean/repaired/rejects
+# python csv_debugger.py "/path/to/provider_drop/*_2026*.csv" --workers 8 --json batch.json
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Regression tests for the single-pass scan of csv_debugging.py
+Run from this directory with: python -m pytest -q
+"""
+
+import gzip
+import json
+import os
+import random
+
+import pytest
+
+import csv_debugging as cd
+
+SCHEMA = {'id': 'int', 'amount': 'float', 'created': 'date'}
+SMALL_RANGE_SIZE = 4096  # Splits the test file into many byte ranges
+OPEN_QUOTE_EVERY = 700  # Rows between quotes left open for more than MAX_RECORD_LINES lines
+
+def messy_rows(num_rows, seed=0, start=0):
+    """CSV lines with the issues the scan has to keep straight across range and block boundaries"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(start, start + num_rows):
+        created = rng.choice(['2024-03-04', '03/04/2024', '25/12/2024', '12/25/2024', 'not a date', ''])
+        amount = rng.choice(['12.5', '-3', '', 'N/A', '1e3', 'abc'])
+        kind = rng.random()
+        if 0 < i % OPEN_QUOTE_EVERY <= cd.MAX_RECORD_LINES:
+            kind = max(kind, 0.10)  # No odd quote count until the open quote is given up on
+        if i % OPEN_QUOTE_EVERY == 0:
+            notes = '"never closed'  # Open for more than MAX_RECORD_LINES lines
+        elif kind < 0.05:
+            notes = '"line one\nline two, with a comma\nline three"'  # Quoted newlines
+        elif kind < 0.08:
+            notes = 'stray " quote'  # Flips the quote parity until the next odd line
+        elif kind < 0.10:
+            notes = '"unterminated'
+        elif kind < 0.13:
+            notes = 'too,many,fields'
+        elif kind < 0.16:
+            notes = ' café '
+        else:
+            notes = f'note {i}'
+        rows.append(f'{i},name {i},{notes},{amount},{created}')
+    return rows
+
+def plain_rows(num_rows, start=0):
+    return [f'{i},name {i},note {i},1.5,2024-01-01' for i in range(start, start + num_rows)]
+
+def write_messy_csv(path, num_rows=3000, seed=0):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('id,name,notes,amount,created\n')
+        f.write('\n'.join(messy_rows(num_rows, seed)) + '\n')
+    return str(path)
+
+def append_rows(path, rows):
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        f.write('\n'.join(rows) + '\n')
+
+def scan_results(file_path, **options):
+    """run_single_pass results as JSON, for comparing whole reports"""
+    debugger = cd.CSVDebugger()
+    debugger.encoding = 'utf-8'
+    structure_info, malformed_info, results = debugger.run_single_pass(
+        file_path, delimiter=',', expected_schema=SCHEMA, **options)
+    results.pop('quarantine', None)  # Holds the output paths
+    return json.dumps(results, default=cd._json_default, sort_keys=True)
+
+@pytest.fixture
+def messy_csv(tmp_path):
+    return write_messy_csv(tmp_path / 'messy.csv')
+
+@pytest.fixture
+def small_ranges(monkeypatch):
+    monkeypatch.setattr(cd, 'PARALLEL_MIN_RANGE_SIZE', SMALL_RANGE_SIZE)
+
+@pytest.mark.parametrize('workers', [2, 4])
+def test_parallel_scan_matches_serial(messy_csv, small_ranges, workers):
+    serial = scan_results(messy_csv)
+    assert scan_results(messy_csv, workers=workers) == serial
+
+def record_chunks(file_path, block_size):
+    """(offsets, ends, line numbers, unterminated flags) from iter_record_chunks"""
+    offsets, ends, line_nums, unterminated = [], [], [], []
+    with open(file_path, 'rb') as f:
+        for chunk_lines, chunk_offsets, records, chunk_flags in cd.iter_record_chunks(f, block_size=block_size):
+            offsets += chunk_offsets
+            ends += [offset + len(record) for offset, record in zip(chunk_offsets, records)]
+            line_nums += chunk_lines
+            unterminated += chunk_flags
+    return offsets, ends, line_nums, unterminated
+
+def record_boundaries(file_path, block_size):
+    """(offsets, ends, line numbers, unterminated flags, field counts) from iter_record_boundaries"""
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    blocks = list(cd.iter_record_boundaries(data, block_size=block_size))
+    offsets, ends, line_nums, field_counts, unterminated = (
+        [value.item() for block in blocks for value in block[k]] for k in range(5))
+    return offsets, ends, line_nums, unterminated, field_counts
+
+@pytest.mark.parametrize('block_size', [64, 1000, cd.SCAN_BLOCK_SIZE])
+def test_record_boundaries_match_record_chunks(messy_csv, block_size):
+    expected = record_chunks(messy_csv, cd.SCAN_BLOCK_SIZE)
+    assert any(expected[3])  # The file has quotes the scan gives up on
+    assert record_chunks(messy_csv, block_size) == expected
+    boundaries = record_boundaries(messy_csv, block_size)
+    assert boundaries[:4] == expected
+    assert boundaries[4] == record_boundaries(messy_csv, cd.SCAN_BLOCK_SIZE)[4]
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_cache_resume_after_append_matches_full_scan(tmp_path, small_ranges, capsys, workers):
+    file_path = write_messy_csv(tmp_path / 'growing.csv', num_rows=1000)
+    # Settle any open quote, so the cached scan can resume where it ended
+    append_rows(file_path, plain_rows(cd.MAX_RECORD_LINES + 10, start=1000))
+    cache = cd.ScanCache(str(tmp_path / 'cache'))
+    scan_results(file_path, cache=cache, workers=workers)
+    
+    append_rows(file_path, messy_rows(1500, seed=1, start=2000))
+    capsys.readouterr()
+    resumed = scan_results(file_path, cache=cache, workers=workers)
+    assert 'resuming the cached scan' in capsys.readouterr().out
+    assert resumed == scan_results(file_path)
+
+def quarantine_outputs(file_path, output_dir, workers):
+    """{kind: bytes} of the clean, repaired and rejects outputs of a quarantine scan"""
+    output_dir.mkdir()
+    paths = cd.quarantine_paths(file_path, str(output_dir))
+    scan_results(file_path, workers=workers, quarantine=cd.QuarantineWriter(paths))
+    outputs = {}
+    for kind, path in paths.items():
+        with open(path, 'rb') as f:
+            outputs[kind] = f.read()
+    assert sorted(p.name for p in output_dir.iterdir()) == sorted(os.path.basename(p) for p in paths.values())
+    return outputs
+
+def test_quarantine_outputs_match_across_workers_and_compression(messy_csv, tmp_path, small_ranges):
+    with open(messy_csv, 'rb') as f, gzip.open(f'{messy_csv}.gz', 'wb') as out:
+        out.write(f.read())
+    expected = quarantine_outputs(messy_csv, tmp_path / 'serial', workers=1)
+    assert all(expected.values())  # Some records of each kind
+    assert quarantine_outputs(messy_csv, tmp_path / 'parallel', workers=4) == expected
+    assert quarantine_outputs(f'{messy_csv}.gz', tmp_path / 'gz', workers=1) == expected
+    assert quarantine_outputs(f'{messy_csv}.gz', tmp_path / 'gz_parallel', workers=4) == expected